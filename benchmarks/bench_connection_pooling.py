@@ -0,0 +1,48 @@
+"""
+Compare the throughput of pooled and unpooled connections against a local stub server.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_connection_pooling --requests 500 --threads 8
+"""
+import time
+import argparse
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+from pyclipdrop import ClipdropClient
+from tests.mock_server import MockClipdropServer
+
+
+def run(submit, total: int, threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: submit(), range(total)))
+
+    return total / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    files = {'image_file': ('input.png', b'\x00' * 64 * 1024, 'image/png')}
+
+    with MockClipdropServer() as server:
+        url = f'{server.base_url}/remove-background/v1'
+
+        unpooled = run(lambda: requests.post(url, files=files, headers={'x-api-key': 'benchmark'}), args.requests, args.threads)
+        unpooled_connections = server.connection_count
+
+        with ClipdropClient('benchmark', base_url=server.base_url, pool_maxsize=args.threads) as client:
+            pooled = run(lambda: client._submit_request(url, files=files), args.requests, args.threads)
+        pooled_connections = server.connection_count - unpooled_connections
+
+    print(f'unpooled: {unpooled:8.1f} requests/sec ({unpooled_connections} connections)')
+    print(f'pooled:   {pooled:8.1f} requests/sec ({pooled_connections} connections)')
+
+
+if __name__ == '__main__':
+    main()
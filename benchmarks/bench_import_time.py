@@ -0,0 +1,70 @@
+"""
+Measure the time it takes to import the package and its clients in a fresh interpreter, with `python -X importtime`, and check it against a budget.
+
+The time spent in the modules of the package itself is reported apart from the time spent in its dependencies, such as requests, which the package cannot make faster. Every measurement is the median of several runs, since cold starts are noisy.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_import_time --runs 10 --budget 50
+"""
+import sys
+import argparse
+import statistics
+import subprocess
+from typing import Dict, List, Text, Tuple
+
+
+# The modules measured, from the cheapest to the most expensive
+MODULES = ['pyclipdrop', 'pyclipdrop.client', 'pyclipdrop.async_client']
+
+
+def measure_import(module: Text) -> Tuple[float, float, List[Tuple[Text, float]]]:
+    """
+    Import a module in a fresh interpreter.
+
+    Returns:
+        Tuple: The total import time in milliseconds, the time spent in the modules of the package in milliseconds, and the self time in milliseconds of every module imported.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True, text=True, check=True)
+
+    times: Dict[Text, float] = {}
+    total = 0.0
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative_time, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        times[name] = int(self_time) / 1000
+        if name == module:
+            total = int(cumulative_time) / 1000
+
+    own = sum(value for name, value in times.items() if name.split('.')[0] == 'pyclipdrop')
+    return total, own, sorted(times.items(), key=lambda item: item[1], reverse=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=50, help='The maximum time in milliseconds spent in the modules of the package when importing the synchronous client.')
+    parser.add_argument('--top', type=int, default=10, help='The number of the slowest modules to list.')
+    args = parser.parse_args()
+
+    over_budget = False
+    for module in MODULES:
+        runs = [measure_import(module) for _ in range(args.runs)]
+        total = statistics.median(run[0] for run in runs)
+        own = statistics.median(run[1] for run in runs)
+        print(f'{module:26} total {total:7.1f} ms   package {own:6.1f} ms')
+        for name, self_time in runs[-1][2][:args.top]:
+            print(f'    {name:40} {self_time:6.1f} ms')
+
+        if module == 'pyclipdrop.client' and own > args.budget:
+            over_budget = True
+
+    if over_budget:
+        print(f'The package takes more than its budget of {args.budget:g} ms to import the synchronous client.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
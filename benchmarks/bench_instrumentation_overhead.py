@@ -0,0 +1,45 @@
+"""
+Measure the overhead the instrumentation adds to every call of an endpoint, with and without hooks.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_instrumentation_overhead --calls 1000000
+"""
+import timeit
+import argparse
+
+from pyclipdrop.instrumentation import instrumented, measure
+
+
+class Endpoint:
+    def __init__(self, hooks) -> None:
+        self.hooks = hooks
+
+    def plain(self) -> None:
+        pass
+
+    @instrumented
+    def instrumented(self) -> None:
+        with measure('request'):
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=1000000)
+    args = parser.parse_args()
+
+    disabled = Endpoint([])
+    enabled = Endpoint([lambda record: None])
+
+    baseline = timeit.timeit(disabled.plain, number=args.calls)
+    without_hooks = timeit.timeit(disabled.instrumented, number=args.calls)
+    with_hooks = timeit.timeit(enabled.instrumented, number=args.calls)
+
+    print(f'uninstrumented: {baseline / args.calls * 1e9:8.0f} ns/call')
+    print(f'without hooks:  {without_hooks / args.calls * 1e9:8.0f} ns/call')
+    print(f'with a hook:    {with_hooks / args.calls * 1e9:8.0f} ns/call')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Compare the throughput of thread and process batches on a mixed workload, where every item holds the GIL for some CPU-bound postprocessing after its API call to a local stub server.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_process_batch --items 64 --workers 4
+"""
+import os
+import time
+import argparse
+
+from pyclipdrop import ClipdropClient
+from pyclipdrop.batch import BatchRun
+from tests.mock_server import MockClipdropServer
+
+
+def postprocess(result: bytes) -> int:
+    # Pure Python work, standing in for decoding, mask generation or format conversion
+    checksum = 0
+    for _ in range(20):
+        for byte in result:
+            checksum = (checksum * 31 + byte) & 0xFFFFFFFF
+    return checksum
+
+
+def run(batch, items: int) -> float:
+    start = time.perf_counter()
+    results = list(batch)
+    assert all(result.succeeded for result in results), [result.exception for result in results if not result.succeeded][:1]
+
+    return items / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=64)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--size', type=int, default=64 * 1024, help='The size of the inputs and results in bytes.')
+    args = parser.parse_args()
+
+    payload = b'\x89PNG\r\n\x1a\n' + b'\x00' * (args.size - 8)
+    inputs = [{'input_file': payload, 'return_bytes': True} for _ in range(args.items)]
+
+    with MockClipdropServer(response_content=payload, keep_request_body=False) as server:
+        with ClipdropClient('benchmark', base_url=server.base_url, pool_maxsize=args.workers) as client:
+            threads = run(BatchRun(lambda **arguments: postprocess(client.remove_background(**arguments)), inputs, max_workers=args.workers), args.items)
+            processes = run(client.batch('remove_background', inputs, max_workers=args.workers, processes=True, postprocess=postprocess), args.items)
+
+    print(f'threads:   {threads:8.1f} items/sec ({args.workers} workers)')
+    print(f'processes: {processes:8.1f} items/sec ({args.workers} workers)')
+
+
+if __name__ == '__main__':
+    main()
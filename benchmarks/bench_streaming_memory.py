@@ -0,0 +1,43 @@
+"""
+Compare the peak memory of buffered and streamed downloads of large responses from a local stub server.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_streaming_memory --size-mb 64
+"""
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+from pyclipdrop import ClipdropClient
+from tests.mock_server import MockClipdropServer
+
+
+def measure(server: MockClipdropServer, output_file: str, stream: bool) -> int:
+    with ClipdropClient('benchmark', base_url=server.base_url, stream=stream) as client:
+        tracemalloc.start()
+        client.remove_background(input_file='tests/integration/input/car.jpg', output_file=output_file)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    with MockClipdropServer(response_content=os.urandom(args.size_mb * 1024 * 1024)) as server, tempfile.TemporaryDirectory() as directory:
+        output_file = os.path.join(directory, 'output.png')
+        buffered = measure(server, output_file, stream=False)
+        streamed = measure(server, output_file, stream=True)
+
+    print(f'response size: {args.size_mb} MB')
+    print(f'buffered: {buffered / 1024 / 1024:8.1f} MB peak')
+    print(f'streamed: {streamed / 1024 / 1024:8.1f} MB peak')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare the peak memory of buffered and streamed uploads of large input files to a local stub server.
+
+Run from the root of the repository:
+
+    python -m benchmarks.bench_upload_memory --size-mb 64
+"""
+import os
+import argparse
+import tempfile
+import tracemalloc
+
+from pyclipdrop import ClipdropClient
+from tests.mock_server import MockClipdropServer
+
+
+def measure(server: MockClipdropServer, input_file: str, output_file: str, stream_uploads: bool) -> int:
+    with ClipdropClient('benchmark', base_url=server.base_url, stream_uploads=stream_uploads) as client:
+        tracemalloc.start()
+        client.remove_background(input_file=input_file, output_file=output_file)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=64)
+    args = parser.parse_args()
+
+    with MockClipdropServer(keep_request_body=False) as server, tempfile.TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, 'input.png')
+        with open(input_file, 'wb') as f:
+            f.write(os.urandom(args.size_mb * 1024 * 1024))
+
+        output_file = os.path.join(directory, 'output.png')
+        buffered = measure(server, input_file, output_file, stream_uploads=False)
+        streamed = measure(server, input_file, output_file, stream_uploads=True)
+
+    print(f'input size: {args.size_mb} MB')
+    print(f'buffered: {buffered / 1024 / 1024:8.1f} MB peak')
+    print(f'streamed: {streamed / 1024 / 1024:8.1f} MB peak')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+A benchmark suite of the client against a local stand-in for the Clipdrop API, which requires pytest-benchmark.
+
+The server, payloads and seeds are fixed, so results can be saved and compared across versions of the package. Run from the root of the repository:
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare
+"""
+import os
+import tempfile
+import tracemalloc
+
+import pytest
+
+from pyclipdrop import ClipdropClient, RateLimiter
+from tests.mock_server import MockClipdropServer
+
+pytest.importorskip('pytest_benchmark')
+
+INPUT_FILE = 'tests/integration/input/jeep_in_desert.jpg'
+MASK_FILE = 'tests/integration/input/jeep_in_desert_mask.png'
+LARGE_PAYLOAD_SIZE = 32 * 1024 * 1024
+
+# The smallest valid arguments of every endpoint
+ENDPOINT_ARGUMENTS = {
+    'text_to_image': {'prompt': 'A jeep in the desert'},
+    'replace_background': {'input_file': INPUT_FILE, 'prompt': 'A beach'},
+    'remove_background': {'input_file': INPUT_FILE},
+    'remove_text': {'input_file': INPUT_FILE},
+    'reimagine': {'input_file': INPUT_FILE},
+    'sketch_to_image': {'input_file': INPUT_FILE, 'prompt': 'A jeep'},
+    'uncrop': {'input_file': INPUT_FILE, 'extend_left': 64},
+    'image_upscaling': {'input_file': INPUT_FILE, 'target_width': 2048, 'target_height': 2048},
+    'cleanup': {'input_file': INPUT_FILE, 'mask_file': MASK_FILE},
+    'portrait_depth_estimation': {'input_file': INPUT_FILE},
+    'portrait_surface_normals': {'input_file': INPUT_FILE},
+    'text_inpainting': {'input_file': INPUT_FILE, 'mask_file': MASK_FILE, 'prompt': 'A car'}
+}
+
+
+@pytest.fixture(scope='module')
+def server():
+    with MockClipdropServer(response_size=64 * 1024, keep_request_body=False) as server:
+        yield server
+
+
+@pytest.fixture(scope='module')
+def client(server):
+    with ClipdropClient('benchmark', base_url=server.base_url, pool_maxsize=16) as client:
+        yield client
+
+
+@pytest.mark.parametrize('endpoint', sorted(ENDPOINT_ARGUMENTS))
+def test_call_overhead(benchmark, client, endpoint):
+    # Without latency, the time of a call is the overhead of the client and the local round trip
+    function = getattr(client, endpoint)
+    result = benchmark(function, **ENDPOINT_ARGUMENTS[endpoint], return_bytes=True)
+
+    assert result
+
+
+@pytest.mark.parametrize('workers', [1, 8, 32])
+def test_concurrent_throughput(benchmark, workers):
+    items = 64
+    with MockClipdropServer(response_size=64 * 1024, latency=0.02, latency_jitter=0.01, keep_request_body=False, seed=0) as server:
+        with ClipdropClient('benchmark', base_url=server.base_url, pool_maxsize=workers) as client:
+            def run():
+                inputs = [{'input_file': INPUT_FILE, 'return_bytes': True}] * items
+                return [result for result in client.batch('remove_background', inputs, max_workers=workers) if result.succeeded]
+
+            results = benchmark.pedantic(run, rounds=3)
+
+    benchmark.extra_info['items_per_second'] = items / benchmark.stats.stats.mean
+    assert len(results) == items
+
+
+def test_throughput_under_rate_limit(benchmark):
+    items = 40
+    with MockClipdropServer(rate_limit=100, rate_limit_headers=True, retry_after=0.1, keep_request_body=False) as server:
+        with ClipdropClient('benchmark', base_url=server.base_url, pool_maxsize=8, rate_limiter=RateLimiter(max_in_flight=8)) as client:
+            def run():
+                inputs = [{'input_file': INPUT_FILE, 'return_bytes': True}] * items
+                return [result for result in client.batch('remove_background', inputs, max_workers=8) if result.succeeded]
+
+            results = benchmark.pedantic(run, rounds=3)
+
+        benchmark.extra_info['throttled_requests'] = server.throttled_count
+
+    assert len(results) == items
+
+
+@pytest.mark.parametrize('stream', [False, True], ids=['buffered', 'streamed'])
+def test_download_peak_memory(benchmark, stream):
+    with MockClipdropServer(response_size=LARGE_PAYLOAD_SIZE, keep_request_body=False) as server, tempfile.TemporaryDirectory() as directory:
+        with ClipdropClient('benchmark', base_url=server.base_url, stream=stream) as client:
+            output_file = os.path.join(directory, 'output.png')
+            peak = benchmark.pedantic(_measure_peak_memory, args=(client.remove_background, INPUT_FILE, output_file), rounds=1)
+
+    benchmark.extra_info['peak_memory_mb'] = peak / 1024 / 1024
+    if stream:
+        assert peak < LARGE_PAYLOAD_SIZE / 4
+
+
+@pytest.mark.parametrize('stream_uploads', [False, True], ids=['buffered', 'streamed'])
+def test_upload_peak_memory(benchmark, stream_uploads):
+    with MockClipdropServer(keep_request_body=False) as server, tempfile.TemporaryDirectory() as directory:
+        input_file = os.path.join(directory, 'input.png')
+        with open(input_file, 'wb') as file:
+            file.write(b'\x89PNG\r\n\x1a\n' + b'\x00' * LARGE_PAYLOAD_SIZE)
+
+        with ClipdropClient('benchmark', base_url=server.base_url, stream_uploads=stream_uploads) as client:
+            output_file = os.path.join(directory, 'output.png')
+            peak = benchmark.pedantic(_measure_peak_memory, args=(client.remove_background, input_file, output_file), rounds=1)
+
+    benchmark.extra_info['peak_memory_mb'] = peak / 1024 / 1024
+    if stream_uploads:
+        assert peak < LARGE_PAYLOAD_SIZE / 4
+
+
+def _measure_peak_memory(function, input_file, output_file) -> int:
+    tracemalloc.start()
+    try:
+        function(input_file=input_file, output_file=output_file)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
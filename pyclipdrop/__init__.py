@@ -1,4 +1,27 @@
-from pyclipdrop.client import ClipdropClient
+import importlib
 
 
 __version__ = "1.0.1"
+
+# The public classes are imported on first access, so that importing the package, e.g. for the command line interface, does not import requests
+_LAZY_ATTRIBUTES = {
+    'ClipdropClient': 'pyclipdrop.client',
+    'AsyncClipdropClient': 'pyclipdrop.async_client',
+    'RateLimiter': 'pyclipdrop.rate_limiter',
+    'RetryPolicy': 'pyclipdrop.retry'
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module 'pyclipdrop' has no attribute '{name}'")
+
+    value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
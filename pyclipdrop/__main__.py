@@ -0,0 +1,6 @@
+import sys
+
+from pyclipdrop.cli import main
+
+
+sys.exit(main())
@@ -0,0 +1,605 @@
+import os
+import asyncio
+from contextlib import nullcontext
+from typing import Callable, Text, Dict, Iterable, Optional
+
+from pyclipdrop.settings import settings
+from pyclipdrop.rate_limiter import RateLimiter
+from pyclipdrop.cache import CachedResponse, ResponseCache
+from pyclipdrop.coalescing import RequestCoalescer
+from pyclipdrop.credits import CreditLedger, CreditReservation, get_current_credit_job
+from pyclipdrop.masks import MaskCache
+from pyclipdrop.preprocessing import ImagePreprocessor
+from pyclipdrop.retry import RetryPolicy, NO_RETRY
+from pyclipdrop.endpoints import ENDPOINTS, Endpoint
+from pyclipdrop.engine import EndpointEngine, Steps, run_steps_async
+from pyclipdrop.timeouts import DEFAULT_TIMEOUT, Timeout, check_deadline, get_current_deadline, get_httpx_timeout, limit_timeout, within_deadline
+from pyclipdrop.instrumentation import CallRecord, get_current_record, instrumented, measure
+from pyclipdrop.utilities import ImageInfo, get_image_info
+from pyclipdrop.io_file_handlers import InputFileHandler, InputStream, OutputFileHandler
+from pyclipdrop.exceptions import DeadlineExceededError
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncClipdropClient(EndpointEngine):
+    """
+    The asynchronous client class for the Clipdrop API.
+
+    It exposes the same endpoints as `ClipdropClient` as coroutines, on top of a pooled httpx connection.
+
+    Args:
+        api_key (Text): The API key for the Clipdrop API.
+        base_url (Text): The base URL for the Clipdrop API. The default value is maintained in the settings module.
+        version (Text): The version of the Clipdrop API to use. The default value is maintained in the settings module.
+        max_connections (int): The maximum number of concurrent connections to the API. The default value is 100.
+        max_keepalive_connections (int): The maximum number of idle connections to keep open. The default value is 20.
+        keep_alive (bool): Whether to keep connections open between requests. The default value is True.
+        rate_limiter (RateLimiter): The rate limiter applied to every request. It can be shared between clients. The default value is None, which does not limit requests.
+        retry_policy (RetryPolicy): The policy for retrying requests that fail with a transient error. The default value is None, which does not retry requests.
+        cache (ResponseCache): The cache for the responses of deterministic endpoints. The default value is None, which does not cache responses.
+        cache_nondeterministic (bool): Whether to also cache the responses of non-deterministic endpoints, such as `reimagine`. The default value is False.
+        coalescer (RequestCoalescer): The single-flight layer that lets concurrent identical calls to deterministic endpoints share one request. It can be shared between clients. The default value is None, which sends every call to the API.
+        credits (CreditLedger): The ledger of the credits consumed per endpoint and of the credits left on the account, read from the headers of every response. It can be shared between clients using the same API key. The default value is None, which uses a ledger for the client.
+        stream (bool): Whether to stream responses to the output files in chunks instead of holding them in memory. Streamed responses are not added to the cache. The default value is False.
+        chunk_size (int): The size of the chunks in bytes when streaming responses. The default value is 1 MB.
+        stream_uploads (bool): Whether to stream input files to the API instead of reading them into memory before uploading them. The default value is False.
+        preprocessor (ImagePreprocessor): The preprocessor fitting input images to the limits of each endpoint before they are uploaded. The default value is None, which uploads input images unchanged.
+        mask_cache (MaskCache): The cache of the masks of `cleanup` and `text_inpainting` given as `Mask` shapes, NumPy arrays or file paths, which are encoded or read once and reused by content. The default value is None, which uses a cache of 64 MB for the client.
+        hooks (Iterable): The functions called with a `CallRecord` of timings, byte counts and outcome after every call to an endpoint, such as `OpenTelemetryHook` or `PrometheusHook`. The default value is None, which records nothing.
+        timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. It also applies to the downloads of URL inputs. It can be overridden per call. The default value is (10, 300).
+        deadline (float): The time in seconds every operation may take, including reading the input, uploading it, retries and writing the output. It can be overridden per call. The default value is None, which does not limit operations.
+
+    Raises:
+        ValueError: If the API key is not passed to the client or set as an environment variable.
+        ImportError: If httpx is not installed.
+    """
+
+    # The transport errors that are retried if the retry policy does not name its own
+    _retry_exceptions = (httpx.TransportError,) if httpx is not None else ()
+
+    def __init__(
+        self,
+        api_key: Text = None,
+        base_url: Text = settings.BASE_URL,
+        version: Text = settings.VERSION,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keep_alive: bool = True,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        cache: ResponseCache = None,
+        cache_nondeterministic: bool = False,
+        coalescer: RequestCoalescer = None,
+        credits: CreditLedger = None,
+        stream: bool = False,
+        chunk_size: int = 1024 * 1024,
+        stream_uploads: bool = False,
+        preprocessor: ImagePreprocessor = None,
+        mask_cache: MaskCache = None,
+        hooks: Iterable[Callable[[CallRecord], None]] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None
+    ) -> None:
+        if httpx is None:
+            raise ImportError("The asynchronous client requires httpx. Install it with 'pip install pyclipdrop[async]'.")
+
+        self.api_key = api_key or os.environ.get('CLIPDROP_API_KEY')
+        if not self.api_key:
+            raise ValueError("A Clipdrop API key must either be passed to the client or set as the CLIPDROP_API_KEY environment variable.")
+
+        self.base_url = base_url
+        self.version = version
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or NO_RETRY
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+        self.coalescer = coalescer
+        self.credits = credits or CreditLedger()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.stream_uploads = stream_uploads
+        self.preprocessor = preprocessor
+        self.mask_cache = mask_cache or MaskCache()
+        self.hooks = list(hooks or [])
+        self.timeout = timeout
+        self.deadline = deadline
+
+        headers = {'x-api-key': self.api_key}
+        if not keep_alive:
+            headers['Connection'] = 'close'
+
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections if keep_alive else 0
+        )
+        self.http_client = httpx.AsyncClient(headers=headers, limits=limits, timeout=get_httpx_timeout(timeout))
+
+        # Input URLs are downloaded through a separate pool, so that the API key is never sent to third parties
+        self.download_client = httpx.AsyncClient(limits=limits, timeout=get_httpx_timeout(timeout))
+
+    async def __aenter__(self) -> 'AsyncClipdropClient':
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled connections held by the client.
+        """
+        await self.http_client.aclose()
+        await self.download_client.aclose()
+
+    @instrumented
+    async def text_to_image(self, prompt: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Generate an image from a text prompt.
+
+        Args:
+            prompt (Text): The text prompt to generate the image from.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the path to the output file is not valid or the extension is not PNG.
+            APIRequestError: If the API request fails.        
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('text_to_image', prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def replace_background(self, input_file: Text, prompt: Text = "", output_file: Text = None, return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Replace the background of an image with a new background.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            prompt (Text): The text prompt to generate the new background from. The default value is an empty string.
+            output_file (Text): The name of the output file. The default value is 'output' with the same extension as the input file. The extension of the output file must match the extension of the input file. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension does not match that of the input file.
+            APIRequestError: If the API request fails.       
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('replace_background', input_file=input_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def remove_background(self, input_file: Text, transparency_handling: Text = None, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Remove the background of an image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            transparency_handling (Text): The transparency handling mode for the output image. The default value is None. The supported values are 'return_input_if_non_opaque' and 'discard_alpha_layer',
+            output_file (Text): The name of the output file. The default value is 'output.png'. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('remove_background', input_file=input_file, transparency_handling=transparency_handling, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def remove_text(self, input_file: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Remove the text from an image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG or JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not PNG.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('remove_text', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def reimagine(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Reimagine an image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('reimagine', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def sketch_to_image(self, input_file: Text, prompt: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Generate an image from a sketch.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            prompt (Text): The text prompt describing the image to generate.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not PNG.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('sketch_to_image', input_file=input_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def uncrop(self, input_file: Text, extend_up: int = 0, extend_down: int = 0, extend_left: int = 0, extend_right: int = 0, seed: int = None, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Generate new extensions of an image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            extend_up (int): The number of pixels to extend the canvas up. The default value is 0.
+            extend_down (int): The number of pixels to extend the canvas down. The default value is 0.
+            extend_left (int): The number of pixels to extend the canvas left. The default value is 0.
+            extend_right (int): The number of pixels to extend the canvas right. The default value is 0.
+            seed (int): The seed for making the result deterministic. The default value is None.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('uncrop', input_file=input_file, extend_up=extend_up, extend_down=extend_down, extend_left=extend_left, extend_right=extend_right, seed=seed, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def image_upscaling(self, input_file: Text, target_width: int, target_height: int, output_file: Text = None, return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Upscale an image to a target width and height.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            target_width (int): The target width of the output image in pixels.
+            target_height (int): The target height of the output image in pixels.
+            output_file (Text): The name of the output file. The default value is None, but if not specified, the output file will be 'output' with the relevant extension. The extension of the output file should be in the WEBP format if the image contains transparency, otherwise it should be in the JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('image_upscaling', input_file=input_file, target_width=target_width, target_height=target_height, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def cleanup(self, input_file: Text, mask_file: Text, mode: Text = 'fast', output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Clean up an image using a mask.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            mask_file (Text): The name of the mask file. The only supported extension is PNG. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array, or a `Mask` of boxes and polygons drawn at the size of the input image.
+            mode (Text): The mode to use for cleaning up the image. The default value is 'fast'. The supported modes are 'fast' and 'quality'.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the mask file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not PNG.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('cleanup', input_file=input_file, mask_file=mask_file, mode=mode, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def portrait_depth_estimation(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Estimate the depth of a portrait image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('portrait_depth_estimation', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def portrait_surface_normals(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Generate surface normals of a portrait image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('portrait_surface_normals', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    @instrumented
+    async def text_inpainting(self, input_file: Text, mask_file: Text, prompt: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
+        """
+        Inpaint text in an image.
+
+        Args:
+            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            mask_file (Text): The name of the mask file. The only supported extension is PNG. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array, or a `Mask` of boxes and polygons drawn at the size of the input image.
+            prompt (Text): The text prompt to generate the inpainted text.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            ValueError: If the input file does not exist or the extension is not supported.
+            ValueError: If the mask file does not exist or the extension is not supported.
+            ValueError: If the path to the output file is not valid or the extension is not supported.
+            APIRequestError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return await self._call_endpoint('text_inpainting', input_file=input_file, mask_file=mask_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    async def _call_endpoint(self, name: Text, timeout: Optional[Timeout] = None, deadline: Optional[float] = None, **arguments) -> Optional[bytes]:
+        """
+        Run an endpoint described in the registry: validate the arguments, read and prepare the inputs, submit the request and write the response.
+
+        Args:
+            name (Text): The name of the endpoint, e.g. 'remove_background'.
+            timeout (Timeout): The timeout of the requests. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the operation may take. The default value is None, which uses the deadline of the client.
+            **arguments: The other arguments of the client method of the endpoint.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
+
+        Raises:
+            DeadlineExceededError: If the operation does not complete within its deadline.
+            CreditBudgetExceededError: If the call is made within a credit job and would exceed its budget, or if the credits left stay below the reserve of its priority.
+        """
+        # The deadline is held by the context, so that it is shared by the steps of the operation, and enforced around the whole operation
+        with within_deadline(self.deadline if deadline is None else deadline) as current:
+            # Calls made within a credit job reserve their estimated credits first, which may wait for credits to be left above the reserve of the job
+            job = get_current_credit_job()
+            reservation = await job.reserve_async(name) if job is not None else None
+            with reservation or nullcontext():
+                operation = self._run_endpoint(ENDPOINTS[name], self.timeout if timeout is None else timeout, arguments, reservation)
+                if current is None:
+                    return await operation
+
+                try:
+                    return await asyncio.wait_for(operation, current.remaining())
+                except asyncio.TimeoutError as e:
+                    raise DeadlineExceededError(f"The deadline of {current.seconds:g} seconds was exceeded.", seconds=current.seconds) from e
+
+    async def _run_endpoint(self, endpoint: Endpoint, timeout: Timeout, arguments: Dict, reservation: Optional[CreditReservation] = None) -> Optional[bytes]:
+        return await run_steps_async(self._endpoint_steps(endpoint, timeout, arguments, reservation))
+
+    async def _submit_request(self, url: Text, files: Dict, data: Dict = None, deterministic: bool = True, timeout: Optional[Timeout] = None, name: Optional[Text] = None) -> 'httpx.Response':
+        """
+        Submit a request to the Clipdrop API, retrying transient failures according to the retry policy of the client.
+
+        Args:
+            url (Text): The URL of the endpoint of the API to submit the request to.
+            files (Dict): A dictionary of files to submit with the request.
+            data (Dict): A dictionary of data to submit with the request.
+            deterministic (bool): Whether the endpoint returns the same result for the same request, which makes the response cacheable.
+            timeout (Timeout): The timeout of every attempt. The default value is None, which uses the timeout of the client.
+            name (Text): The name of the endpoint, under which the credits consumed by the request are recorded in the ledger of the client. The default value is None, which uses the URL.
+
+        Returns:
+            httpx.Response: The response object from the API request. The `attempts` attribute holds the `RequestAttempt` objects of every attempt, and the `credits` attribute the credits the request consumed.
+
+        Raises:
+            APIRequestError: If the API request fails.
+        """
+        return await run_steps_async(self._request_steps(url, files, data, deterministic, timeout, name))
+
+    async def _coalesce(self, key: Text, steps: Callable[[], Steps]):
+        return await self.coalescer.run_async(key, lambda: run_steps_async(steps()))
+
+    async def _read_input(self, input_file_handler: InputFileHandler):
+        check_deadline('reading the input')
+
+        # httpx streams file objects on its own, while URL inputs are still downloaded asynchronously
+        if self.stream_uploads and input_file_handler.get_is_file():
+            return input_file_handler.get_stream()
+
+        with measure('read'):
+            return await input_file_handler.read_async(self.download_client, self.timeout)
+
+    async def _inspect_input(self, input_file_handler: InputFileHandler, input_data) -> Optional[ImageInfo]:
+        # Inputs read into memory are inspected as they are, while only the header of streamed files is read, off the event loop
+        with measure('validate'):
+            if isinstance(input_data, bytes):
+                return get_image_info(input_data)
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, input_file_handler.inspect)
+
+    async def _encode_mask(self, mask_file, image_size):
+        # Drawing, encoding and reading masks is blocking, so it is kept off the event loop
+        loop = asyncio.get_running_loop()
+        with measure('prepare'):
+            return await loop.run_in_executor(None, self.mask_cache.encode, mask_file, image_size)
+
+    async def _prepare_image(self, operation: Text, image_data, input_extension: Text):
+        if self.preprocessor is None:
+            return image_data
+
+        # Decoding and encoding images is CPU bound, so it is kept off the event loop
+        loop = asyncio.get_running_loop()
+        with measure('prepare'):
+            return await loop.run_in_executor(None, self.preprocessor.prepare, operation, image_data, input_extension)
+
+    async def _prepare_mask(self, mask_data, image_data):
+        if self.preprocessor is None:
+            return mask_data
+
+        loop = asyncio.get_running_loop()
+        with measure('prepare'):
+            return await loop.run_in_executor(None, self.preprocessor.prepare_mask, mask_data, image_data)
+
+    async def _write_response(self, response: 'httpx.Response', output_file_handler: OutputFileHandler) -> Optional[bytes]:
+        check_deadline('downloading the output')
+        record = get_current_record()
+        if self.stream and not isinstance(response, CachedResponse):
+            if output_file_handler.return_bytes:
+                with measure('write'):
+                    await response.aread()
+                    await response.aclose()
+                if record is not None:
+                    record.response_bytes += len(response.content)
+                return response.content
+
+            try:
+                with measure('write'):
+                    await output_file_handler.write_stream_async(self._count_chunks(response.aiter_bytes(self.chunk_size), record))
+            finally:
+                await response.aclose()
+        else:
+            if record is not None:
+                record.response_bytes += len(response.content)
+            with measure('write'):
+                return await output_file_handler.write_async(response.content)
+
+    @staticmethod
+    def _count_chunks(chunks, record: Optional[CallRecord]):
+        if record is None:
+            return chunks
+
+        async def count():
+            async for chunk in chunks:
+                record.response_bytes += len(chunk)
+                yield chunk
+
+        return count()
+
+    async def _read_body(self, response: 'httpx.Response') -> bytes:
+        return await response.aread()
+
+    async def _close_response(self, response: 'httpx.Response') -> None:
+        await response.aclose()
+
+    async def _sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    async def _post(self, url: Text, files: Dict, data: Dict = None, timeout: Optional[Timeout] = None) -> 'httpx.Response':
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async(get_current_deadline())
+
+        sources = []
+        try:
+            # Input streams are opened for every attempt, so that retries upload the whole file again
+            opened_files = {}
+            for name, (filename, content, content_type) in files.items():
+                if isinstance(content, InputStream):
+                    content, _ = content.open()
+                    sources.append(content)
+                opened_files[name] = (filename, content, content_type)
+
+            # The timeout of the request is cut short by the deadline of the operation, if any
+            request_timeout = get_httpx_timeout(limit_timeout(self.timeout if timeout is None else timeout))
+            request = self.http_client.build_request('POST', url, files=opened_files, data=data, timeout=request_timeout)
+            response = await self.http_client.send(request, stream=self.stream)
+        except httpx.TimeoutException as e:
+            check_deadline('submitting the request', e)
+            raise
+        finally:
+            for source in sources:
+                source.close()
+            if self.rate_limiter is not None:
+                self.rate_limiter.release()
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response.status_code, response.headers)
+
+        record = get_current_record()
+        if record is not None and 'Content-Length' in request.headers:
+            record.request_bytes += int(request.headers['Content-Length'])
+
+        return response
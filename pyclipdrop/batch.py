@@ -0,0 +1,287 @@
+import os
+import time
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Text
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from pyclipdrop.endpoints import ENDPOINTS
+from pyclipdrop.timeouts import Deadline, check_deadline, within_deadline
+from pyclipdrop.credits import CreditJob, within_credit_job
+from pyclipdrop.exceptions import BatchCancelledError, ValueNotSupportedError
+from pyclipdrop.utilities.shared_memory import SharedPayload
+
+
+SUPPORTED_OPERATIONS = frozenset(ENDPOINTS)
+
+
+class BatchResult:
+    """
+    The outcome of a single item of a batch.
+
+    Attributes:
+        index (int): The position of the item in the inputs of the batch.
+        arguments (Any): The argument set the operation was called with.
+        result (Any): The value returned by the operation, if it succeeded.
+        exception (Exception): The exception raised by the operation, if it failed.
+    """
+
+    def __init__(self, index: int, arguments: Any, result: Any = None, exception: Exception = None) -> None:
+        self.index = index
+        self.arguments = arguments
+        self.result = result
+        self.exception = exception
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+    def __repr__(self) -> Text:
+        outcome = f'result={self.result!r}' if self.succeeded else f'exception={self.exception!r}'
+        return f'BatchResult(index={self.index}, {outcome})'
+
+
+class BatchRun:
+    """
+    An iterator over the results of a batch that is being processed concurrently.
+
+    Inputs are pulled lazily, so at most `max_pending` items are held in memory at any time.
+
+    Args:
+        function (Callable): The function to call for each argument set.
+        inputs (Iterable): The argument sets. A dictionary is passed as keyword arguments, a tuple or list as positional arguments and any other value as the only positional argument.
+        max_workers (int): The maximum number of items processed concurrently.
+        ordered (bool): Whether to yield results in the order of the inputs instead of the order of completion.
+        max_pending (int): The maximum number of items submitted but not yet yielded. The default value is twice `max_workers`.
+        deadline (float): The time in seconds the whole batch may take from now. Every item is run within the time left, and items started after the deadline fail at once with a `DeadlineExceededError`. The default value is None, which does not limit the batch.
+        credit_job (CreditJob): The credit job the calls of every item are charged to, which limits the credits of the batch to the budget of the job and makes it back off at the reserve of its priority. The default value is None, which does not limit the credits of the batch.
+    """
+
+    def __init__(self, function: Callable, inputs: Iterable, max_workers: int = 4, ordered: bool = True, max_pending: Optional[int] = None, deadline: Optional[float] = None, credit_job: Optional[CreditJob] = None) -> None:
+        if max_workers < 1:
+            raise ValueError("The number of workers must be at least 1.")
+
+        self.function = function
+        self.max_workers = max_workers
+        self.ordered = ordered
+        self.max_pending = max(max_pending or 2 * max_workers, max_workers)
+        self.deadline = Deadline(deadline) if deadline is not None else None
+        self.credit_job = credit_job
+
+        self._inputs = enumerate(inputs)
+        self._cancelled = threading.Event()
+        self._results = self._run()
+
+    def __iter__(self) -> Iterator[BatchResult]:
+        return self
+
+    def __next__(self) -> BatchResult:
+        return next(self._results)
+
+    def __enter__(self) -> 'BatchRun':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cancel()
+        self._results.close()
+
+    def cancel(self) -> None:
+        """
+        Stop submitting new items and drop the items that have not started yet.
+
+        Items that are already being processed are allowed to finish, but their results are not yielded.
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _run(self) -> Iterator[BatchResult]:
+        executor = self._create_executor()
+        pending = deque()
+        try:
+            self._submit(executor, pending, self.max_pending)
+            while pending and not self.cancelled:
+                if self.ordered:
+                    future = pending.popleft()
+                    # Wait on the oldest item, while allowing cancellation to interrupt the wait
+                    while not wait([future], timeout=0.1).done and not self.cancelled:
+                        pass
+                    if self.cancelled:
+                        pending.appendleft(future)
+                        break
+                else:
+                    done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    if not done:
+                        continue
+                    future = next(f for f in pending if f in done)
+                    pending.remove(future)
+
+                self._submit(executor, pending, 1)
+                yield self._get_result(future)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            self._discard(pending)
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='pyclipdrop-batch')
+
+    def _submit(self, executor: Executor, pending: deque, count: int) -> None:
+        for index, arguments in islice(self._inputs, count):
+            if self.cancelled:
+                return
+            pending.append(executor.submit(self._call, index, arguments))
+
+    def _get_result(self, future: Future) -> BatchResult:
+        return future.result()
+
+    def _discard(self, pending: deque) -> None:
+        pass
+
+    def _call(self, index: int, arguments: Any) -> BatchResult:
+        if self.cancelled:
+            return BatchResult(index, arguments, exception=BatchCancelledError("The batch was cancelled."))
+
+        try:
+            # Worker threads do not inherit the context of the batch, so the deadline and the credit job of the batch are entered for every item
+            with within_deadline(self.deadline), within_credit_job(self.credit_job):
+                check_deadline('waiting for the item to start')
+                if isinstance(arguments, dict):
+                    result = self.function(**arguments)
+                elif isinstance(arguments, (tuple, list)):
+                    result = self.function(*arguments)
+                else:
+                    result = self.function(arguments)
+        except Exception as e:
+            return BatchResult(index, arguments, exception=e)
+
+        return BatchResult(index, arguments, result=result)
+
+
+class ProcessBatchRun(BatchRun):
+    """
+    A batch processed by a pool of worker processes, for operations surrounded by CPU-heavy work that would be serialized by the GIL in threads.
+
+    Every worker process creates its own `ClipdropClient` with its own connection pool. Bytes arguments and bytes results are passed between processes through shared memory instead of being pickled.
+
+    Args:
+        operation (Text): The name of the operation to run, e.g. 'cleanup'.
+        inputs (Iterable): The argument sets, as for `BatchRun`. They must be picklable.
+        client_options (Dict): The keyword arguments of the `ClipdropClient` of each worker process. They must be picklable.
+        max_workers (int): The number of worker processes. The default value is the number of CPUs.
+        ordered (bool): Whether to yield results in the order of the inputs instead of the order of completion.
+        max_pending (int): The maximum number of items submitted but not yet yielded. The default value is twice `max_workers`.
+        preprocess (Callable): A module-level function called in the worker process with the argument set of an item, returning the argument set to call the operation with.
+        postprocess (Callable): A module-level function called in the worker process with the result of the operation, returning the result of the item.
+        deadline (float): The time in seconds the whole batch may take from now, as for `BatchRun`. The default value is None.
+    """
+
+    def __init__(self, operation: Text, inputs: Iterable, client_options: Optional[Dict] = None, max_workers: Optional[int] = None, ordered: bool = True, max_pending: Optional[int] = None, preprocess: Optional[Callable] = None, postprocess: Optional[Callable] = None, deadline: Optional[float] = None) -> None:
+        if operation not in SUPPORTED_OPERATIONS:
+            raise ValueNotSupportedError(f"The operation must be one of: {', '.join(sorted(SUPPORTED_OPERATIONS))}.")
+
+        self.operation = operation
+        self.client_options = client_options or {}
+        self.preprocess = preprocess
+        self.postprocess = postprocess
+        self._shared = {}
+        super().__init__(None, inputs, max_workers=max_workers or os.cpu_count() or 1, ordered=ordered, max_pending=max_pending, deadline=deadline)
+
+    def _create_executor(self) -> Executor:
+        # The process pool imports multiprocessing, which batches in threads do not need
+        from concurrent.futures import ProcessPoolExecutor
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_initialize_worker, initargs=(self.client_options,))
+
+    def _submit(self, executor: Executor, pending: deque, count: int) -> None:
+        for index, arguments in islice(self._inputs, count):
+            if self.cancelled:
+                return
+
+            # Monotonic clocks are not comparable between processes, so the deadline is passed as a point in wall-clock time
+            expires_at = time.time() + self.deadline.remaining() if self.deadline is not None else None
+            shared_arguments = _map_arguments(arguments, _share)
+            future = executor.submit(_call_in_worker, self.operation, shared_arguments, self.preprocess, self.postprocess, expires_at)
+            future.index = index
+            future.arguments = arguments
+            self._shared[future] = shared_arguments
+            pending.append(future)
+
+    def _get_result(self, future: Future) -> BatchResult:
+        _map_arguments(self._shared.pop(future), _unlink)
+        try:
+            result = future.result()
+        except Exception as e:
+            return BatchResult(future.index, future.arguments, exception=e)
+
+        if isinstance(result, SharedPayload):
+            result = result.read(unlink=True)
+
+        return BatchResult(future.index, future.arguments, result=result)
+
+    def _discard(self, pending: deque) -> None:
+        # The executor has been shut down, so every remaining item has either finished or been cancelled
+        for future in pending:
+            _map_arguments(self._shared.pop(future), _unlink)
+            if not future.cancelled() and future.exception() is None and isinstance(future.result(), SharedPayload):
+                future.result().unlink()
+
+
+# The client of a worker process of a `ProcessBatchRun`
+_worker_client = None
+
+
+def _initialize_worker(client_options: Dict) -> None:
+    global _worker_client
+    from pyclipdrop.client import ClipdropClient
+    _worker_client = ClipdropClient(**client_options)
+
+
+def _call_in_worker(operation: Text, arguments: Any, preprocess: Optional[Callable], postprocess: Optional[Callable], expires_at: Optional[float] = None) -> Any:
+    arguments = _map_arguments(arguments, _read)
+    if preprocess is not None:
+        arguments = preprocess(arguments)
+
+    function = getattr(_worker_client, operation)
+    with within_deadline(max(expires_at - time.time(), 0.0) if expires_at is not None else None):
+        check_deadline('waiting for the item to start')
+        if isinstance(arguments, dict):
+            result = function(**arguments)
+        elif isinstance(arguments, (tuple, list)):
+            result = function(*arguments)
+        else:
+            result = function(arguments)
+
+    if postprocess is not None:
+        result = postprocess(result)
+
+    if isinstance(result, (bytes, bytearray, memoryview)):
+        # The parent process reads and unlinks the block
+        return SharedPayload.create(result, owned=False)
+
+    return result
+
+
+def _map_arguments(arguments: Any, function: Callable) -> Any:
+    if isinstance(arguments, dict):
+        return {key: function(value) for key, value in arguments.items()}
+    if isinstance(arguments, (tuple, list)):
+        return type(arguments)(function(value) for value in arguments)
+    return function(arguments)
+
+
+def _share(value: Any) -> Any:
+    return SharedPayload.create(value) if isinstance(value, (bytes, bytearray, memoryview)) else value
+
+
+def _read(value: Any) -> Any:
+    return value.read() if isinstance(value, SharedPayload) else value
+
+
+def _unlink(value: Any) -> Any:
+    if isinstance(value, SharedPayload):
+        value.unlink()
+    return value
@@ -0,0 +1,261 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Text
+
+
+# The headers used to revalidate a cached response with its origin
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+class CachedResponse:
+    """
+    A response of the Clipdrop API served from a cache.
+
+    It exposes the subset of the interface of a response that the clients rely on.
+
+    Attributes:
+        content (bytes): The content of the response.
+        headers (Mapping): The headers of the response. Only the content type and the validators are preserved.
+        status_code (int): The status code of the response, which is always 200.
+    """
+
+    def __init__(self, content: bytes, content_type: Text, validators: Optional[Mapping[Text, Text]] = None) -> None:
+        # requests is imported on first use, so that the asynchronous client does not import it
+        from requests.structures import CaseInsensitiveDict
+
+        self.content = content
+        self.headers = CaseInsensitiveDict({'Content-Type': content_type})
+        self.headers.update(validators or {})
+        self.status_code = 200
+        self.attempts = []
+
+    @classmethod
+    def from_response(cls, response) -> 'CachedResponse':
+        validators = {name: response.headers[name] for name in VALIDATOR_HEADERS if name in response.headers}
+        return cls(response.content, response.headers.get('Content-Type', 'application/octet-stream'), validators)
+
+    @property
+    def validators(self) -> Dict[Text, Text]:
+        return {name: self.headers[name] for name in VALIDATOR_HEADERS if name in self.headers}
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class CacheStats:
+    """
+    The counters of a response cache.
+
+    Attributes:
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups not found in the cache.
+        stores (int): The number of responses added to the cache.
+        evictions (int): The number of responses removed from the cache to respect its size or age limits.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[Text, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'stores': self.stores, 'evictions': self.evictions}
+
+    def __repr__(self) -> Text:
+        return f'CacheStats(hits={self.hits}, misses={self.misses}, stores={self.stores}, evictions={self.evictions})'
+
+
+class ResponseCache(ABC):
+    """
+    The base class of the backends of the response cache.
+
+    Subclasses implement `_get` and `_set`, and count evictions in `stats`. Lookups are counted by this class.
+    """
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: Text, files: Mapping, data: Optional[Mapping] = None) -> Text:
+        """
+        Compute the key of a request from the URL, the content of the uploaded files and the form data.
+
+        The names of the uploaded files are left out, so the same image is found under a different path. Input streams are read to compute the key.
+        """
+        digest = hashlib.sha256(url.encode())
+        for field in sorted(files):
+            _, content, content_type = files[field]
+            digest.update(b'\x00file\x00' + field.encode() + b'\x00' + str(content_type).encode() + b'\x00')
+            if isinstance(content, str):
+                digest.update(content.encode())
+            elif isinstance(content, (bytes, bytearray, memoryview)):
+                digest.update(content)
+            else:
+                # Input streams are hashed in chunks rather than read into memory
+                source, _ = content.open()
+                with source:
+                    for chunk in iter(lambda: source.read(1024 * 1024), b''):
+                        digest.update(chunk)
+        for field in sorted(data or {}):
+            digest.update(b'\x00data\x00' + field.encode() + b'\x00' + str(data[field]).encode())
+
+        return digest.hexdigest()
+
+    def get(self, key: Text) -> Optional[CachedResponse]:
+        response = self._get(key)
+        with self._lock:
+            if response is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+
+        return response
+
+    def set(self, key: Text, response: CachedResponse) -> None:
+        self._set(key, response)
+        with self._lock:
+            self.stats.stores += 1
+
+    @abstractmethod
+    def _get(self, key: Text) -> Optional[CachedResponse]:
+        pass
+
+    @abstractmethod
+    def _set(self, key: Text, response: CachedResponse) -> None:
+        pass
+
+
+class MemoryCache(ResponseCache):
+    """
+    An in-memory, least recently used response cache.
+
+    Args:
+        max_bytes (int): The maximum total size of the cached content. The default value is 256 MB.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+
+    def _get(self, key: Text) -> Optional[CachedResponse]:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+
+            return response
+
+    def _set(self, key: Text, response: CachedResponse) -> None:
+        if len(response.content) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous.content)
+
+            self._entries[key] = response
+            self.size += len(response.content)
+
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted.content)
+                self.stats.evictions += 1
+
+
+class DiskCache(ResponseCache):
+    """
+    A response cache stored in a directory, which can be shared between processes.
+
+    Args:
+        directory (Text): The directory to store the cached responses in. It is created if it does not exist.
+        max_bytes (int): The maximum total size of the cached content. The least recently used responses are evicted first. The default value is None, which does not limit the size.
+        max_age (float): The maximum age of a cached response in seconds. The default value is None, which does not expire responses.
+    """
+
+    def __init__(self, directory: Text, max_bytes: Optional[int] = None, max_age: Optional[float] = None) -> None:
+        super().__init__()
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    def _get(self, key: Text) -> Optional[CachedResponse]:
+        content_path, metadata_path = self._get_paths(key)
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+            if self.max_age is not None and time.time() - metadata['created_at'] > self.max_age:
+                self._remove(key)
+                with self._lock:
+                    self.stats.evictions += 1
+                return None
+
+            with open(content_path, 'rb') as f:
+                content = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # The modification time of the content records the last use of the response for eviction
+        try:
+            os.utime(content_path)
+        except OSError:
+            pass
+
+        return CachedResponse(content, metadata['content_type'], metadata.get('validators'))
+
+    def _set(self, key: Text, response: CachedResponse) -> None:
+        if self.max_bytes is not None and len(response.content) > self.max_bytes:
+            return
+
+        content_path, metadata_path = self._get_paths(key)
+
+        # Write to temporary files first, so that concurrent readers never see a partial response
+        suffix = f'.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(f'{content_path}{suffix}', 'wb') as f:
+            f.write(response.content)
+        with open(f'{metadata_path}{suffix}', 'w') as f:
+            json.dump({'content_type': response.headers['Content-Type'], 'validators': response.validators, 'created_at': time.time()}, f)
+        os.replace(f'{content_path}{suffix}', content_path)
+        os.replace(f'{metadata_path}{suffix}', metadata_path)
+
+        if self.max_bytes is not None:
+            self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for path in self.directory.glob('*.bin'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path.stem))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, key in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            self._remove(key)
+            size -= entry_size
+            with self._lock:
+                self.stats.evictions += 1
+
+    def _remove(self, key: Text) -> None:
+        for path in self._get_paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _get_paths(self, key: Text):
+        return self.directory / f'{key}.bin', self.directory / f'{key}.json'
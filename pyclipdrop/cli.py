@@ -0,0 +1,291 @@
+"""
+The `pyclipdrop` command, which runs an operation over a directory, a glob pattern or a manifest of inputs.
+
+Only the standard library is imported at startup. The client, and with it requests, is imported once there is work to do.
+"""
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Text
+
+
+OPERATIONS = {
+    'text-to-image': 'text_to_image',
+    'replace-background': 'replace_background',
+    'remove-background': 'remove_background',
+    'remove-text': 'remove_text',
+    'reimagine': 'reimagine',
+    'sketch-to-image': 'sketch_to_image',
+    'uncrop': 'uncrop',
+    'upscale': 'image_upscaling',
+    'cleanup': 'cleanup',
+    'portrait-depth-estimation': 'portrait_depth_estimation',
+    'portrait-surface-normals': 'portrait_surface_normals',
+    'text-inpainting': 'text_inpainting'
+}
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+
+def main(argv: Optional[List[Text]] = None) -> int:
+    args = _parse_args(argv)
+
+    done = _load_state(args.state_file) if args.state_file else set()
+    items = _read_inputs(args.input)
+    jobs = _pending_jobs(items, args, done, _get_input_root(args.input))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    return _run(jobs, args)
+
+
+def _parse_args(argv: Optional[List[Text]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='pyclipdrop', description='Run a Clipdrop operation over many inputs.')
+    parser.add_argument('operation', choices=sorted(OPERATIONS), help='The operation to run.')
+    parser.add_argument('input', help='A directory of images, a glob pattern, or a JSONL or CSV manifest with one set of arguments per line.')
+    parser.add_argument('output_dir', help='The directory to write the results to.')
+    parser.add_argument('-p', '--param', action='append', default=[], metavar='NAME=VALUE', help='A parameter passed to every call, e.g. target_width=2048. Manifest values take precedence.')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='The number of concurrent requests. The default value is 4.')
+    parser.add_argument('--state-file', help='A file recording the items that are done, so that an interrupted run can be resumed.')
+    parser.add_argument('--overwrite', action='store_true', help='Process items whose output already exists.')
+    parser.add_argument('--retries', type=int, default=3, help='The maximum number of attempts per request. The default value is 3.')
+    parser.add_argument('--rate-limit', type=float, help='The maximum number of requests per second.')
+    parser.add_argument('--timeout', type=float, default=300, help='The timeout in seconds for reading a response from the API. The default value is 300.')
+    parser.add_argument('--deadline', type=float, help='The time in seconds an item may take, including downloading its input, retries and writing its output.')
+    parser.add_argument('--api-key', help='The Clipdrop API key. The default value is the CLIPDROP_API_KEY environment variable.')
+    parser.add_argument('--base-url', help='The base URL of the Clipdrop API.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not display progress.')
+
+    return parser.parse_args(argv)
+
+
+def _read_inputs(source: Text) -> Iterator[Dict]:
+    """
+    Yield the arguments of every item, read lazily from a directory, a glob pattern or a manifest.
+    """
+    if os.path.isdir(source):
+        paths = sorted(os.path.join(source, name) for name in os.listdir(source) if name.lower().endswith(IMAGE_EXTENSIONS))
+        return ({'input_file': path} for path in paths)
+
+    if source.endswith('.jsonl'):
+        return _read_jsonl(source)
+
+    if source.endswith('.csv'):
+        return _read_csv(source)
+
+    return ({'input_file': path} for path in sorted(glob.glob(source, recursive=True)))
+
+
+def _get_input_root(source: Text) -> Optional[Text]:
+    """
+    Get the directory the output names of the inputs are relative to, so that inputs with the same name in different directories matched by a recursive glob pattern do not share an output. Manifests have no root and use the name of each input.
+    """
+    if os.path.isdir(source):
+        return source
+    if source.endswith(('.jsonl', '.csv')):
+        return None
+
+    # The root of a glob pattern is the directory before its first wildcard
+    root = os.path.dirname(source)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+
+    return root or os.curdir
+
+
+def _read_jsonl(path: Text) -> Iterator[Dict]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _read_csv(path: Text) -> Iterator[Dict]:
+    # Cells are kept as text, and converted by the endpoint for the parameters it declares as numbers
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            yield {name: value for name, value in row.items() if value != ''}
+
+
+def _pending_jobs(items: Iterable[Dict], args: argparse.Namespace, done: Set[Text], root: Optional[Text] = None) -> Iterator[Dict]:
+    params = dict(_parse_param(param) for param in args.param)
+    output_names = set()
+    for index, item in enumerate(items):
+        arguments = dict(params, **item)
+        key = _get_key(arguments)
+
+        # Items whose names collide, e.g. inputs with the same name in different directories of a manifest, are told apart by their index, which is stable across resumed runs
+        output_name = _get_output_name(index, arguments, root)
+        while output_name in output_names:
+            output_name = f'{output_name}_{index}'
+        output_names.add(output_name)
+        output_stem = os.path.join(args.output_dir, output_name)
+
+        if key in done:
+            continue
+        if not args.overwrite and any(os.path.exists(output_stem + extension) for extension in IMAGE_EXTENSIONS):
+            continue
+
+        arguments.pop('output_file', None)
+        yield {'key': key, 'output_stem': output_stem, 'arguments': arguments}
+
+
+def _parse_param(param: Text):
+    name, separator, value = param.partition('=')
+    if not separator:
+        raise SystemExit(f"pyclipdrop: error: parameters must be given as NAME=VALUE, got '{param}'")
+
+    return name, value
+
+
+def _get_key(arguments: Dict) -> Text:
+    # Every argument is part of the key, so that the same input run with other parameters is not taken as done
+    return json.dumps(arguments, sort_keys=True, default=str)
+
+
+def _get_output_name(index: int, arguments: Dict, root: Optional[Text] = None) -> Text:
+    if arguments.get('output_file'):
+        return os.path.splitext(os.path.basename(arguments['output_file']))[0]
+    if arguments.get('input_file'):
+        input_file = str(arguments['input_file'])
+        # Keep the directories below the root of the inputs, e.g. 'a/photo' and 'b/photo' for a recursive glob pattern
+        name = os.path.relpath(input_file, root) if root is not None else os.path.basename(input_file)
+        return os.path.splitext(name)[0]
+
+    return f'output_{index}'
+
+
+def _load_state(path: Text) -> Set[Text]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by an interruption
+                continue
+            if record.get('status') == 'done':
+                done.add(record['key'])
+
+    return done
+
+
+def _run(jobs: Iterator[Dict], args: argparse.Namespace) -> int:
+    # Imported here, so that invocations that fail on their arguments do not pay for the client
+    from pyclipdrop.batch import BatchRun
+    from pyclipdrop.client import ClipdropClient
+    from pyclipdrop.endpoints import ENDPOINTS
+    from pyclipdrop.io_file_handlers import OutputFileHandler
+    from pyclipdrop.retry import RetryPolicy
+    from pyclipdrop.rate_limiter import RateLimiter
+    from pyclipdrop.utilities import get_extension_from_content
+
+    client_options = {'base_url': args.base_url} if args.base_url else {}
+    try:
+        client = ClipdropClient(
+            api_key=args.api_key,
+            pool_maxsize=args.workers,
+            retry_policy=RetryPolicy(max_attempts=args.retries),
+            rate_limiter=RateLimiter(requests_per_second=args.rate_limit) if args.rate_limit else None,
+            timeout=(10.0, args.timeout),
+            deadline=args.deadline,
+            **client_options
+        )
+    except ValueError as e:
+        sys.stderr.write(f'pyclipdrop: error: {e}\n')
+        return 2
+
+    operation = OPERATIONS[args.operation]
+    endpoint = ENDPOINTS[operation]
+    progress = Progress(enabled=not args.quiet)
+    state_file = open(args.state_file, 'a') if args.state_file else None
+
+    def call(key: Text, output_stem: Text, arguments: Dict) -> Text:
+        # Parameters read as text, e.g. 'target_width=2048', are converted to the types declared by the endpoint
+        content = getattr(client, operation)(**endpoint.parse_arguments(arguments), return_bytes=True)
+
+        # The format of some results, e.g. of upscaling, is only known from their content
+        output_file = output_stem + (get_extension_from_content(content) or '.png')
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+        # Written to a temporary file and renamed, so that an interrupted run never leaves a partial output that would be skipped on resume
+        OutputFileHandler(output_file).write_stream([content])
+
+        return output_file
+
+    try:
+        with client, BatchRun(call, jobs, max_workers=args.workers, ordered=False) as results:
+            for result in results:
+                job = result.arguments
+                if result.succeeded:
+                    record = {'key': job['key'], 'status': 'done', 'output_file': result.result}
+                else:
+                    record = {'key': job['key'], 'status': 'failed', 'error': f'{type(result.exception).__name__}: {result.exception}'}
+                    progress.log(f"{job['key']}: {record['error']}")
+
+                if state_file is not None:
+                    state_file.write(json.dumps(record) + '\n')
+                    state_file.flush()
+                progress.update(result.succeeded)
+    except KeyboardInterrupt:
+        progress.log('Interrupted. Run the same command again to resume.')
+        return 130
+    finally:
+        progress.finish()
+        if state_file is not None:
+            state_file.close()
+
+    return 1 if progress.failed else 0
+
+
+class Progress:
+    """
+    A single line progress and throughput display on standard error.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = enabled and sys.stderr.isatty()
+        self.succeeded = 0
+        self.failed = 0
+        self.started_at = time.monotonic()
+        self._displayed_at = 0.0
+
+    def update(self, succeeded: bool) -> None:
+        if succeeded:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+
+        now = time.monotonic()
+        if self.enabled and now - self._displayed_at >= 0.1:
+            self._displayed_at = now
+            self._display()
+
+    def log(self, message: Text) -> None:
+        sys.stderr.write(('\r\033[K' if self.enabled else '') + message + '\n')
+
+    def finish(self) -> None:
+        if self.enabled:
+            self._display()
+            sys.stderr.write('\n')
+        elif self.succeeded or self.failed:
+            sys.stderr.write(self._format() + '\n')
+
+    def _display(self) -> None:
+        sys.stderr.write('\r\033[K' + self._format())
+        sys.stderr.flush()
+
+    def _format(self) -> Text:
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        total = self.succeeded + self.failed
+        return f'{total} processed, {self.succeeded} succeeded, {self.failed} failed, {total / elapsed:.2f} items/s'
+
+
+if __name__ == '__main__':
+    sys.exit(main())
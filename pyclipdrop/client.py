@@ -1,13 +1,32 @@
 import os
+import time
+import weakref
+import threading
 import requests
-from typing import Text, Dict
+from requests.adapters import HTTPAdapter
+from contextlib import nullcontext
+from typing import Callable, Text, Dict, Iterable, Iterator, Optional
 
 from pyclipdrop.settings import settings
-from pyclipdrop.io_file_handlers import InputFileHandler, OutputFileHandler
-from pyclipdrop.exceptions import APIRequestError, ValueTooLongError, ValueNotSupportedError, ValueOutOfRangeError
-
-
-class ClipdropClient:
+from pyclipdrop.rate_limiter import RateLimiter
+from pyclipdrop.cache import CachedResponse, ResponseCache
+from pyclipdrop.coalescing import RequestCoalescer
+from pyclipdrop.credits import CreditJob, CreditLedger, CreditReservation, get_current_credit_job
+from pyclipdrop.downloader import SourceDownloader
+from pyclipdrop.masks import MaskCache
+from pyclipdrop.preprocessing import ImagePreprocessor
+from pyclipdrop.retry import RetryPolicy, NO_RETRY
+from pyclipdrop.endpoints import ENDPOINTS, Endpoint
+from pyclipdrop.engine import EndpointEngine, Steps, run_steps
+from pyclipdrop.timeouts import DEFAULT_TIMEOUT, Timeout, check_deadline, get_current_deadline, limit_timeout, within_deadline
+from pyclipdrop.instrumentation import CallRecord, get_current_record, instrumented, measure
+from pyclipdrop.utilities import ImageInfo, MultipartEncoder, get_image_info
+from pyclipdrop.batch import BatchRun, ProcessBatchRun, SUPPORTED_OPERATIONS
+from pyclipdrop.io_file_handlers import InputFileHandler, InputStream, OutputFileHandler
+from pyclipdrop.exceptions import ValueNotSupportedError
+
+
+class ClipdropClient(EndpointEngine):
     """
     The client class for the Clipdrop API.
 
@@ -15,575 +34,647 @@ class ClipdropClient:
         api_key (Text): The API key for the Clipdrop API.
         base_url (Text): The base URL for the Clipdrop API. The default value is maintained in the settings module.
         version (Text): The version of the Clipdrop API to use. The default value is maintained in the settings module.
+        pool_connections (int): The number of connection pools to cache. The default value is 10.
+        pool_maxsize (int): The maximum number of connections to keep open per pool. The default value is 10.
+        pool_block (bool): Whether to block when no free connections are available in the pool instead of opening a new, unpooled one. The default value is False.
+        keep_alive (bool): Whether to keep connections open between requests. The default value is True.
+        rate_limiter (RateLimiter): The rate limiter applied to every request. It can be shared between clients. The default value is None, which does not limit requests.
+        retry_policy (RetryPolicy): The policy for retrying requests that fail with a transient error. The default value is None, which does not retry requests.
+        cache (ResponseCache): The cache for the responses of deterministic endpoints. The default value is None, which does not cache responses.
+        cache_nondeterministic (bool): Whether to also cache the responses of non-deterministic endpoints, such as `reimagine`. The default value is False.
+        coalescer (RequestCoalescer): The single-flight layer that lets concurrent identical calls to deterministic endpoints share one request. It can be shared between clients. The default value is None, which sends every call to the API.
+        credits (CreditLedger): The ledger of the credits consumed per endpoint and of the credits left on the account, read from the headers of every response. It can be shared between clients using the same API key. The default value is None, which uses a ledger for the client.
+        stream (bool): Whether to stream responses to the output files in chunks instead of holding them in memory. Streamed responses are not added to the cache. The default value is False.
+        chunk_size (int): The size of the chunks in bytes when streaming responses. The default value is 1 MB.
+        stream_uploads (bool): Whether to stream input files to the API instead of reading them into memory before uploading them. The default value is False.
+        preprocessor (ImagePreprocessor): The preprocessor fitting input images to the limits of each endpoint before they are uploaded. The default value is None, which uploads input images unchanged.
+        mask_cache (MaskCache): The cache of the masks of `cleanup` and `text_inpainting` given as `Mask` shapes, NumPy arrays or file paths, which are encoded or read once and reused by content. The default value is None, which uses a cache of 64 MB for the client.
+        downloader (SourceDownloader): The downloader of URL inputs. The default value is None, which downloads them through a pool of `pool_maxsize` connections per host, without caching them.
+        hooks (Iterable): The functions called with a `CallRecord` of timings, byte counts and outcome after every call to an endpoint, such as `OpenTelemetryHook` or `PrometheusHook`. The default value is None, which records nothing.
+        timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. It can be overridden per call. The default value is (10, 300).
+        deadline (float): The time in seconds every operation may take, including reading the input, uploading it, retries and writing the output. It can be overridden per call. The default value is None, which does not limit operations.
 
     Raises:
         ValueError: If the API key is not passed to the client or set as an environment variable.
     """
 
-    def __init__(self, api_key: Text = None, base_url: Text = settings.BASE_URL, version: Text = settings.VERSION) -> None:
+    # The transport errors that are retried if the retry policy does not name its own
+    _retry_exceptions = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+
+    def __init__(
+        self,
+        api_key: Text = None,
+        base_url: Text = settings.BASE_URL,
+        version: Text = settings.VERSION,
+        pool_connections: int = 10,
+        pool_maxsize: int = 10,
+        pool_block: bool = False,
+        keep_alive: bool = True,
+        rate_limiter: RateLimiter = None,
+        retry_policy: RetryPolicy = None,
+        cache: ResponseCache = None,
+        cache_nondeterministic: bool = False,
+        coalescer: RequestCoalescer = None,
+        credits: CreditLedger = None,
+        stream: bool = False,
+        chunk_size: int = 1024 * 1024,
+        stream_uploads: bool = False,
+        preprocessor: ImagePreprocessor = None,
+        mask_cache: MaskCache = None,
+        downloader: SourceDownloader = None,
+        hooks: Iterable[Callable[[CallRecord], None]] = None,
+        timeout: Timeout = DEFAULT_TIMEOUT,
+        deadline: Optional[float] = None
+    ) -> None:
         self.api_key = api_key or os.environ.get('CLIPDROP_API_KEY')
         if not self.api_key:
             raise ValueError("A Clipdrop API key must either be passed to the client or set as the CLIPDROP_API_KEY environment variable.")
 
         self.base_url = base_url
         self.version = version
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy or NO_RETRY
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+        self.coalescer = coalescer
+        self.credits = credits or CreditLedger()
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.stream_uploads = stream_uploads
+        self.preprocessor = preprocessor
+        self.mask_cache = mask_cache or MaskCache()
+        self.hooks = list(hooks or [])
+        self.timeout = timeout
+        self.deadline = deadline
+
+        # A downloader passed to the client may be shared, so the client only closes its own
+        self._owns_downloader = downloader is None
+        self.downloader = downloader or SourceDownloader(pool_maxsize=pool_maxsize)
+        self.keep_alive = keep_alive
+
+        # A single adapter owns the connection pool and is shared by the sessions of all threads
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+
+        # Sessions are keyed by their thread without holding it, so the sessions of finished threads are dropped with them
+        self._sessions = weakref.WeakKeyDictionary()
+        self._sessions_lock = threading.Lock()
+
+    def __enter__(self) -> 'ClipdropClient':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the sessions and the pooled connections held by the client.
+        """
+        with self._sessions_lock:
+            for session in list(self._sessions.values()):
+                session.close()
+            self._sessions = weakref.WeakKeyDictionary()
+
+        self._adapter.close()
+        if self._owns_downloader:
+            self.downloader.close()
 
-    def text_to_image(self, prompt: Text, output_file: Text = 'output.png') -> None:
+    @property
+    def session(self) -> requests.Session:
+        """
+        The session used by the current thread.
+
+        Sessions are not shared between threads, but all of them are mounted on the same adapter, so connections are pooled across threads.
+        """
+        thread = threading.current_thread()
+        session = self._sessions.get(thread)
+        if session is None:
+            session = self._create_session()
+            with self._sessions_lock:
+                self._sessions[thread] = session
+
+        return session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.mount('https://', self._adapter)
+        session.mount('http://', self._adapter)
+        session.headers['x-api-key'] = self.api_key
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    @instrumented
+    def text_to_image(self, prompt: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Generate an image from a text prompt.
 
         Args:
             prompt (Text): The text prompt to generate the image from.
-            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the path to the output file is not valid or the extension is not PNG.
             requests.exceptions.HTTPError: If the API request fails.        
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Check if prompt is less than 1000 characters
-        if len(prompt) > 1000:
-            raise ValueTooLongError("The prompt must be less than 1000 characters.")
-
-        # Initialize the output handler
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.png'])
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/text-to-image/{self.version}',
-            files={
-                'prompt': (None, prompt, 'text/plain')
-            }
-        )
+        return self._call_endpoint('text_to_image', prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        output_file_handler.write(response.content)
-
-    def replace_background(self, input_file: Text, prompt: Text = "", output_file: Text = None):
+    @instrumented
+    def replace_background(self, input_file: Text, prompt: Text = "", output_file: Text = None, return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Replace the background of an image with a new background.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
             prompt (Text): The text prompt to generate the new background from. The default value is an empty string.
-            output_file (Text): The name of the output file. The default value is 'output' with the same extension as the input file. The extension of the output file must match the extension of the input file.
+            output_file (Text): The name of the output file. The default value is 'output' with the same extension as the input file. The extension of the output file must match the extension of the input file. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension does not match that of the input file.
             requests.exceptions.HTTPError: If the API request fails.       
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Initialize the input handler
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
+        return self._call_endpoint('replace_background', input_file=input_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # If the output file is not specified, use 'output' with the same extension as the input file
-        if not output_file:
-            output_file = f'output{input_extension}'
-
-        # Initialize the output handler
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=[input_extension])
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/replace-background/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            },
-            data={
-                'prompt': prompt
-            }
-        )
-
-        output_file_handler.write(response.content)
-        
-    def remove_background(self, input_file: Text, transparency_handling: Text = None, output_file: Text = 'output.png'):
+    @instrumented
+    def remove_background(self, input_file: Text, transparency_handling: Text = None, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Remove the background of an image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
             transparency_handling (Text): The transparency handling mode for the output image. The default value is None. The supported values are 'return_input_if_non_opaque' and 'discard_alpha_layer',
-            output_file (Text): The name of the output file. The default value is 'output.png'. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Check if transparency handling is supported
-        if transparency_handling not in [None, 'return_input_if_non_opaque', 'discard_alpha_layer']:
-            raise ValueNotSupportedError("The transparency handling mode must be either 'return_input_if_non_opaque' or 'discard_alpha_layer'.")
-
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.png', '.jpg', '.webp'])
+        return self._call_endpoint('remove_background', input_file=input_file, transparency_handling=transparency_handling, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/remove-background/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            },
-            data={
-                'transparency_handling': transparency_handling
-            } if transparency_handling else {}
-        )
-
-        output_file_handler.write(response.content)
-
-    def remove_text(self, input_file: Text, output_file: Text = 'output.png'):
+    @instrumented
+    def remove_text(self, input_file: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Remove the text from an image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG or JPG (JPEG).
-            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG.
+            input_file (Text): The name of the input file. The supported extensions are PNG or JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not PNG.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.png'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
+        return self._call_endpoint('remove_text', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/remove-text/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            }
-        )
-
-        output_file_handler.write(response.content)
-
-    def reimagine(self, input_file: Text, output_file: Text = 'output.jpg'):
+    @instrumented
+    def reimagine(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Reimagine an image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()        
-
-        # Check if the output file is valid
-        output_file_handler.validate()
+        return self._call_endpoint('reimagine', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        response = self._submit_request(
-            f'{self.base_url}/reimagine/{self.version}/reimagine',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            }
-        )
-
-        output_file_handler.write(response.content)
-
-    def sketch_to_image(self, input_file: Text, prompt: Text, output_file: Text = 'output.png'):
+    @instrumented
+    def sketch_to_image(self, input_file: Text, prompt: Text, output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Generate an image from a sketch.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
             prompt (Text): The text prompt describing the image to generate.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not PNG.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Check if prompt is less than 5000 characters
-        if len(prompt) > 5000:
-            raise ValueTooLongError("The prompt must be less than 5000 characters.")
-
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
+        return self._call_endpoint('sketch_to_image', input_file=input_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        response = self._submit_request(
-            f'{self.base_url}/sketch-to-image/{self.version}/sketch-to-image',
-            files={
-                'sketch_file': (input_file, image_data, f'image/{input_extension[1:]}'),
-                'prompt': (None, prompt, 'text/plain')
-            }
-        )
-
-        output_file_handler.write(response.content)
-
-    def uncrop(self, input_file: Text, extend_up: int = 0, extend_down: int = 0, extend_left: int = 0, extend_right: int = 0, seed: int = None, output_file: Text = 'output.jpg'):
+    @instrumented
+    def uncrop(self, input_file: Text, extend_up: int = 0, extend_down: int = 0, extend_left: int = 0, extend_right: int = 0, seed: int = None, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Generate new extensions of an image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
             extend_up (int): The number of pixels to extend the canvas up. The default value is 0.
             extend_down (int): The number of pixels to extend the canvas down. The default value is 0.
             extend_left (int): The number of pixels to extend the canvas left. The default value is 0.
             extend_right (int): The number of pixels to extend the canvas right. The default value is 0.
             seed (int): The seed for making the result deterministic. The default value is None.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # TODO: Check if the extend values are within a valid range: negative values?
-
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
+        return self._call_endpoint('uncrop', input_file=input_file, extend_up=extend_up, extend_down=extend_down, extend_left=extend_left, extend_right=extend_right, seed=seed, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        # Add the data to the request
-        data = {
-            'extend_up': extend_up,
-            'extend_down': extend_down,
-            'extend_left': extend_left,
-            'extend_right': extend_right
-        }
-
-        if seed:
-            data['seed'] = seed
-
-        response = self._submit_request(
-            f'{self.base_url}/uncrop/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            },
-            data=data
-        )
-
-        output_file_handler.write(response.content)
-
-    def image_upscaling(self, input_file: Text, target_width: int, target_height: int, output_file: Text = None):
+    @instrumented
+    def image_upscaling(self, input_file: Text, target_width: int, target_height: int, output_file: Text = None, return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Upscale an image to a target width and height.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
             target_width (int): The target width of the output image in pixels.
             target_height (int): The target height of the output image in pixels.
-            output_file (Text): The name of the output file. The default value is None, but if not specified, the output file will be 'output' with the relevant extension. The extension of the output file should be in the WEBP format if the image contains transparency, otherwise it should be in the JPG (JPEG).
+            output_file (Text): The name of the output file. The default value is None, but if not specified, the output file will be 'output' with the relevant extension. The extension of the output file should be in the WEBP format if the image contains transparency, otherwise it should be in the JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Check if the target width and height are within the valid range of 1 and 4096
-        if not 1 <= target_width <= 4096 or not 1 <= target_height <= 4096:
-            raise ValueOutOfRangeError("The target width and height must be between 1 and 4096 pixels.")
-
-        # Initialize the input handler
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
+        return self._call_endpoint('image_upscaling', input_file=input_file, target_width=target_width, target_height=target_height, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        response = self._submit_request(
-            f'{self.base_url}/image-upscaling/{self.version}/upscale',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            },
-            data={
-                'target_width': target_width,
-                'target_height': target_height
-            }
-        )
-
-        # Get the output file extension from the response content type
-        expected_output_extension = '.webp' if 'image/webp' in response.headers['Content-Type'] else '.jpg'
-
-        # If the output file is not specified, use 'output' with the above extension
-        if not output_file:
-            output_file = f'output{expected_output_extension}'
-
-        # Initialize the output handler
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=[expected_output_extension])
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        output_file_handler.write(response.content)
-
-    def cleanup(self, input_file: Text, mask_file: Text, mode: Text = 'fast', output_file: Text = 'output.png'):
+    @instrumented
+    def cleanup(self, input_file: Text, mask_file: Text, mode: Text = 'fast', output_file: Text = 'output.png', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Clean up an image using a mask.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG).
-            mask_file (Text): The name of the mask file. The only supported extension is PNG.
+            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            mask_file (Text): The name of the mask file. The only supported extension is PNG. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array, or a `Mask` of boxes and polygons drawn at the size of the input image.
             mode (Text): The mode to use for cleaning up the image. The default value is 'fast'. The supported modes are 'fast' and 'quality'.
-            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG.
+            output_file (Text): The name of the output file. The default value is 'output.png'. The only supported extension is PNG. It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the mask file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not PNG.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Check if the mode is supported
-        if mode not in ['fast', 'quality']:
-            raise ValueNotSupportedError("The mode must be either 'fast' or 'quality'.")
-
-        # Initialize two input handlers for the input and mask files
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg'])
-        mask_file_handler = InputFileHandler(mask_file, supported_extensions=['.png'])
-        # Initialize the output handler
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.png'])
-
-        # Check if the input files are valid
-        input_file_handler.validate()
-        mask_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Get mask data and suffix
-        mask_data = mask_file_handler.read()
-        mask_suffix = mask_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        # Check if the mode is valid
-        if mode not in ['fast', 'quality']:
-            raise ValueError("The mode must be either 'fast' or 'quality'.")
-
-        response = self._submit_request(
-            f'{self.base_url}/cleanup/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}'),
-                'mask_file': (mask_file, mask_data, f'image/{mask_suffix[1:]}')
-            },
-            data={
-                'mode': mode
-            }
-        )
-
-        output_file_handler.write(response.content)
+        return self._call_endpoint('cleanup', input_file=input_file, mask_file=mask_file, mode=mode, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-    def portrait_depth_estimation(self, input_file: Text, output_file: Text = 'output.jpg'):
+    @instrumented
+    def portrait_depth_estimation(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Estimate the depth of a portrait image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/portrait-depth-estimation/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            }
-        )
-
-        output_file_handler.write(response.content)
+        return self._call_endpoint('portrait_depth_estimation', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-    def portrait_surface_normals(self, input_file: Text, output_file: Text = 'output.jpg'):
+    @instrumented
+    def portrait_surface_normals(self, input_file: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Generate surface normals of a portrait image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            input_file (Text): The name of the input file. The supported extensions are PNG, JPG (JPEG), and WEBP. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
         """
-        # Initialize the input and output handlers
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg', '.webp'])
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input file is valid
-        input_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/portrait-surface-normals/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}')
-            }
-        )
+        return self._call_endpoint('portrait_surface_normals', input_file=input_file, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
 
-        output_file_handler.write(response.content)
-
-    def text_inpainting(self, input_file: Text, mask_file: Text, prompt: Text, output_file: Text = 'output.jpg'):
+    @instrumented
+    def text_inpainting(self, input_file: Text, mask_file: Text, prompt: Text, output_file: Text = 'output.jpg', return_bytes: bool = False, timeout: Optional[Timeout] = None, deadline: Optional[float] = None) -> Optional[bytes]:
         """
         Inpaint text in an image.
 
         Args:
-            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG).
-            mask_file (Text): The name of the mask file. The only supported extension is PNG.
+            input_file (Text): The name of the input file. The supported extensions are PNG and JPG (JPEG). It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array.
+            mask_file (Text): The name of the mask file. The only supported extension is PNG. It can also be an in-memory image: bytes, a binary file-like object, a PIL image or a NumPy array, or a `Mask` of boxes and polygons drawn at the size of the input image.
             prompt (Text): The text prompt to generate the inpainted text.
-            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG).
+            output_file (Text): The name of the output file. The default value is 'output.jpg'. The only supported extension is JPG (JPEG). It can also be a binary file-like object.
+            return_bytes (bool): Whether to return the result as bytes instead of writing it to the output file. The default value is False.
+            timeout (Timeout): The timeout in seconds for connecting to the API and for reading from it, either as a single value or as a (connect, read) pair. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the whole operation may take, including reading the input, uploading it, retries and writing the output. The default value is None, which uses the deadline of the client.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
         Raises:
             ValueError: If the input file does not exist or the extension is not supported.
             ValueError: If the mask file does not exist or the extension is not supported.
             ValueError: If the path to the output file is not valid or the extension is not supported.
             requests.exceptions.HTTPError: If the API request fails.
+            DeadlineExceededError: If the operation does not complete within its deadline.
+        """
+        return self._call_endpoint('text_inpainting', input_file=input_file, mask_file=mask_file, prompt=prompt, output_file=output_file, return_bytes=return_bytes, timeout=timeout, deadline=deadline)
+
+    def batch(self, operation: Text, inputs: Iterable, max_workers: int = 4, ordered: bool = True, max_pending: Optional[int] = None, processes: bool = False, preprocess: Optional[Callable] = None, postprocess: Optional[Callable] = None, prefetch: int = 0, deadline: Optional[float] = None, credit_job: Optional[CreditJob] = None) -> BatchRun:
         """
-        # Initialize two input handlers for the input and mask files
-        input_file_handler = InputFileHandler(input_file, supported_extensions=['.png', '.jpg'])
-        mask_file_handler = InputFileHandler(mask_file, supported_extensions=['.png'])
-        # Initialize the output handler
-        output_file_handler = OutputFileHandler(output_file, supported_extensions=['.jpg'])
-
-        # Check if the input files are valid
-        input_file_handler.validate()
-        mask_file_handler.validate()
-
-        # Get input data and suffix
-        image_data = input_file_handler.read()
-        input_extension = input_file_handler.get_extension()
-
-        # Get mask data and suffix
-        mask_data = mask_file_handler.read()
-        mask_suffix = mask_file_handler.get_extension()
-
-        # Check if the output file is valid
-        output_file_handler.validate()
-
-        response = self._submit_request(
-            f'{self.base_url}/text-inpainting/{self.version}',
-            files={
-                'image_file': (input_file, image_data, f'image/{input_extension[1:]}'),
-                'mask_file': (mask_file, mask_data, f'image/{mask_suffix[1:]}'),
-            },
-            data={
-                'text_prompt': prompt
+        Run an operation concurrently over many argument sets.
+
+        The workers share the connection pool of the client, so `pool_maxsize` should be at least `max_workers`.
+
+        Args:
+            operation (Text): The name of the operation to run, e.g. 'remove_background'.
+            inputs (Iterable): The argument sets for the operation. A dictionary is passed as keyword arguments, a tuple or list as positional arguments and any other value as the only positional argument. The inputs are consumed lazily.
+            max_workers (int): The maximum number of items processed concurrently. The default value is 4.
+            ordered (bool): Whether to yield results in the order of the inputs instead of the order of completion. The default value is True.
+            max_pending (int): The maximum number of items submitted but not yet yielded. The default value is twice `max_workers`.
+            processes (bool): Whether to process the items in `max_workers` worker processes instead of threads, for operations surrounded by CPU-heavy work. Every worker process creates its own client with the settings of this client, except for the rate limiter and the cache, which are not shared between processes. The arguments must be picklable. The default value is False.
+            preprocess (Callable): A module-level function called in the worker process with the argument set of an item, returning the argument set to call the operation with. It requires `processes`.
+            postprocess (Callable): A module-level function called in the worker process with the result of the operation, returning the result of the item. It requires `processes`.
+            prefetch (int): The number of argument sets beyond the pending items whose URL inputs are downloaded in the background, within the memory budget of the downloader. It is ignored with `processes`. The default value is 0, which downloads URL inputs when their item starts.
+            deadline (float): The time in seconds the whole batch may take from now. Every item is run within the time left, or within the deadline of the item if it is earlier, and items started after the deadline fail with a `DeadlineExceededError`. The default value is None, which only applies the deadline of each item.
+            credit_job (CreditJob): The credit job the calls of every item are charged to, created with `CreditScheduler.job`, which limits the credits of the batch to the budget of the job and makes it back off when the credits left fall to the reserve of its priority. It is not supported with `processes`. The default value is None, which does not limit the credits of the batch.
+
+        Returns:
+            BatchRun: An iterator of `BatchResult` objects holding the result or the exception of each item. It can be cancelled with `cancel()`.
+
+        Raises:
+            ValueNotSupportedError: If the operation is not supported.
+            ValueError: If a credit job is passed with `processes`.
+        """
+        if operation not in SUPPORTED_OPERATIONS:
+            raise ValueNotSupportedError(f"The operation must be one of: {', '.join(sorted(SUPPORTED_OPERATIONS))}.")
+
+        if processes:
+            # The ledger of the client is not shared with worker processes, so their credits could not be scheduled
+            if credit_job is not None:
+                raise ValueError("Credit jobs are not supported with processes.")
+
+            client_options = {
+                'api_key': self.api_key,
+                'base_url': self.base_url,
+                'version': self.version,
+                'pool_connections': 1,
+                'pool_maxsize': 1,
+                'keep_alive': self.keep_alive,
+                'retry_policy': self.retry_policy,
+                'stream': self.stream,
+                'chunk_size': self.chunk_size,
+                'stream_uploads': self.stream_uploads,
+                'preprocessor': self.preprocessor,
+                'timeout': self.timeout,
+                'deadline': self.deadline
             }
-        )
+            return ProcessBatchRun(operation, inputs, client_options=client_options, max_workers=max_workers, ordered=ordered, max_pending=max_pending, preprocess=preprocess, postprocess=postprocess, deadline=deadline)
+
+        if preprocess is not None or postprocess is not None:
+            raise ValueError("Preprocessing and postprocessing functions require processes.")
+
+        if prefetch:
+            inputs = self.downloader.prefetch_inputs(inputs, prefetch)
+
+        return BatchRun(getattr(self, operation), inputs, max_workers=max_workers, ordered=ordered, max_pending=max_pending, deadline=deadline, credit_job=credit_job)
+
+    def _call_endpoint(self, name: Text, timeout: Optional[Timeout] = None, deadline: Optional[float] = None, **arguments) -> Optional[bytes]:
+        """
+        Run an endpoint described in the registry: validate the arguments, read and prepare the inputs, submit the request and write the response.
 
-        output_file_handler.write(response.content)
+        Args:
+            name (Text): The name of the endpoint, e.g. 'remove_background'.
+            timeout (Timeout): The timeout of the requests. The default value is None, which uses the timeout of the client.
+            deadline (float): The time in seconds the operation may take. The default value is None, which uses the deadline of the client.
+            **arguments: The other arguments of the client method of the endpoint.
+
+        Returns:
+            bytes: The result, if `return_bytes` is True.
 
-    def _submit_request(self, url: Text, files: Dict, data: Dict = None) -> requests.Response:
+        Raises:
+            DeadlineExceededError: If the operation does not complete within its deadline.
+            CreditBudgetExceededError: If the call is made within a credit job and would exceed its budget, or if the credits left stay below the reserve of its priority.
+        """
+        # The deadline is held by the context, so that every step of the operation, down to the downloads of URL inputs, can check it
+        with within_deadline(self.deadline if deadline is None else deadline):
+            # Calls made within a credit job reserve their estimated credits first, which may wait for credits to be left above the reserve of the job
+            job = get_current_credit_job()
+            reservation = job.reserve(name) if job is not None else None
+            with reservation or nullcontext():
+                return self._run_endpoint(ENDPOINTS[name], self.timeout if timeout is None else timeout, arguments, reservation)
+
+    def _run_endpoint(self, endpoint: Endpoint, timeout: Timeout, arguments: Dict, reservation: Optional[CreditReservation] = None) -> Optional[bytes]:
+        return run_steps(self._endpoint_steps(endpoint, timeout, arguments, reservation))
+
+    def _submit_request(self, url: Text, files: Dict, data: Dict = None, deterministic: bool = True, timeout: Optional[Timeout] = None, name: Optional[Text] = None) -> requests.Response:
         """
-        Submit a request to the Clipdrop API.
+        Submit a request to the Clipdrop API, retrying transient failures according to the retry policy of the client.
 
         Args:
-            endpoint (Text): The endpoint of the API to submit the request to.
+            url (Text): The URL of the endpoint of the API to submit the request to.
             files (Dict): A dictionary of files to submit with the request.
             data (Dict): A dictionary of data to submit with the request.
+            deterministic (bool): Whether the endpoint returns the same result for the same request, which makes the response cacheable.
+            timeout (Timeout): The timeout of every attempt. The default value is None, which uses the timeout of the client.
+            name (Text): The name of the endpoint, under which the credits consumed by the request are recorded in the ledger of the client. The default value is None, which uses the URL.
 
         Returns:
-            requests.Response: The response object from the API request.
+            requests.Response: The response object from the API request. The `attempts` attribute holds the `RequestAttempt` objects of every attempt, and the `credits` attribute the credits the request consumed.
 
         Raises:
-            requests.exceptions.HTTPError: If the API request fails.
+            APIRequestError: If the API request fails.
         """
-        response = requests.post(
-            url,
-            files=files,
-            data=data,
-            headers={
-                'x-api-key': self.api_key
-            }
-        )
+        return run_steps(self._request_steps(url, files, data, deterministic, timeout, name))
 
-        try:
-            response.raise_for_status()
-        except requests.exceptions.HTTPError as e:
+    def _coalesce(self, key: Text, steps: Callable[[], Steps]):
+        return self.coalescer.run(key, lambda: run_steps(steps()))
+
+    def _read_input(self, input_file_handler: InputFileHandler):
+        check_deadline('reading the input')
+        if self.stream_uploads:
+            return input_file_handler.get_stream(self.downloader)
+
+        with measure('read'):
+            return input_file_handler.read(self.downloader)
+
+    def _inspect_input(self, input_file_handler: InputFileHandler, input_data) -> Optional[ImageInfo]:
+        # Inputs read into memory are inspected as they are, while only the header of streamed inputs is read
+        with measure('validate'):
+            if isinstance(input_data, bytes):
+                return get_image_info(input_data)
+            return input_file_handler.inspect(self.downloader)
+
+    def _encode_mask(self, mask_file, image_size):
+        with measure('prepare'):
+            return self.mask_cache.encode(mask_file, image_size)
+
+    def _prepare_image(self, operation: Text, image_data, input_extension: Text):
+        if self.preprocessor is None:
+            return image_data
+
+        with measure('prepare'):
+            return self.preprocessor.prepare(operation, image_data, input_extension)
+
+    def _prepare_mask(self, mask_data, image_data):
+        if self.preprocessor is None:
+            return mask_data
+
+        with measure('prepare'):
+            return self.preprocessor.prepare_mask(mask_data, image_data)
+
+    def _write_response(self, response: requests.Response, output_file_handler: OutputFileHandler) -> Optional[bytes]:
+        check_deadline('downloading the output')
+        record = get_current_record()
+        if self.stream and not isinstance(response, CachedResponse) and not output_file_handler.return_bytes:
+            chunks = _check_chunks(response.iter_content(self.chunk_size))
             try:
-                error_message = response.json().get('error', 'No error message provided by the API')
-            except ValueError:
-                error_message = 'The response content from the API could not be decoded as JSON'
-            raise APIRequestError(f"The request to the Clipdrop API failed: {error_message}") from e
+                with measure('write'):
+                    output_file_handler.write_stream(chunks if record is None else record.count_chunks(chunks))
+            finally:
+                response.close()
+        else:
+            if record is not None:
+                record.response_bytes += len(response.content)
+            with measure('write'):
+                return output_file_handler.write(response.content)
+
+    def _read_body(self, response: requests.Response) -> bytes:
+        return response.content
+
+    def _close_response(self, response: requests.Response) -> None:
+        response.close()
+
+    def _sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def _post(self, url: Text, files: Dict, data: Dict = None, timeout: Optional[Timeout] = None) -> requests.Response:
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(get_current_deadline())
+
+        # The timeout of the request is cut short by the deadline of the operation, if any
+        timeout = limit_timeout(self.timeout if timeout is None else timeout)
+
+        encoder = None
+        try:
+            # Waiting for the rate limiter may have used up the deadline
+            check_deadline('waiting for the rate limiter')
+            if any(isinstance(content, InputStream) for _, content, _ in files.values()):
+                # The multipart body is encoded while it is sent, so input streams are never held in memory
+                encoder = MultipartEncoder(files, data)
+                response = self.session.post(
+                    url,
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type},
+                    stream=self.stream,
+                    timeout=timeout
+                )
+            else:
+                response = self.session.post(
+                    url,
+                    files=files,
+                    data=data,
+                    stream=self.stream,
+                    timeout=timeout
+                )
+        except requests.exceptions.RequestException as e:
+            check_deadline('submitting the request', e)
+            raise
+        finally:
+            if encoder is not None:
+                encoder.close()
+            if self.rate_limiter is not None:
+                self.rate_limiter.release()
+
+        if self.rate_limiter is not None:
+            self.rate_limiter.update(response.status_code, response.headers)
+
+        record = get_current_record()
+        if record is not None:
+            # The length of a streamed multipart body is unknown if an input stream has no known size
+            length = encoder.len if encoder is not None else len(response.request.body or b'')
+            record.request_bytes += length or 0
 
         return response
+
+
+def _check_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    # Streamed responses are written chunk by chunk, so the deadline is checked between chunks
+    for chunk in chunks:
+        check_deadline('downloading the output')
+        yield chunk
@@ -0,0 +1,125 @@
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Text, Tuple
+
+from pyclipdrop.cache import CachedResponse
+from pyclipdrop.timeouts import check_deadline, get_current_deadline
+
+
+class CoalescedResponse(CachedResponse):
+    """
+    A copy of the response of the API to a request that was shared by concurrent identical calls, given to the calls that waited on it.
+    """
+    pass
+
+
+class CoalescingStats:
+    """
+    The counters of a request coalescer.
+
+    Attributes:
+        requests (int): The number of requests sent to the API on behalf of one or more callers.
+        coalesced (int): The number of calls that waited on the identical request of another call instead of sending their own.
+    """
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.coalesced = 0
+
+    def as_dict(self) -> Dict[Text, int]:
+        return {'requests': self.requests, 'coalesced': self.coalesced}
+
+    def __repr__(self) -> Text:
+        return f'CoalescingStats(requests={self.requests}, coalesced={self.coalesced})'
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'exception')
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class RequestCoalescer:
+    """
+    A single-flight layer that lets concurrent identical calls share one request to the API.
+
+    The first call with a key sends the request, and the calls with the same key that start before it completes wait for it and share its response, or its exception. Keys are forgotten as soon as their request completes, so later calls send a new request. It works across threads with `run` and across the tasks of an event loop with `run_async`, and can be shared between clients.
+    """
+
+    def __init__(self) -> None:
+        self.stats = CoalescingStats()
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._tasks: Dict[Tuple[Any, Hashable], Any] = {}
+
+    def run(self, key: Hashable, function: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Call `function`, unless another thread is already calling it for the same key, in which case wait for its result. Waiting threads give up at the deadline of their operation, if any.
+
+        Returns:
+            Tuple: The result of the function, and whether it was shared by a call made by another thread.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.stats.requests += 1
+            else:
+                self.stats.coalesced += 1
+
+        if not leader:
+            current = get_current_deadline()
+            while not flight.done.wait(current.remaining() if current is not None else None):
+                check_deadline('waiting for an identical request')
+            if flight.exception is not None:
+                raise flight.exception
+            return flight.result, True
+
+        try:
+            flight.result = function()
+        except BaseException as e:
+            flight.exception = e
+            raise
+        finally:
+            # The key is released before the waiting threads are woken, so that calls starting from now send a new request
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.result, False
+
+    async def run_async(self, key: Hashable, function: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Await `function`, unless another task of the event loop is already awaiting it for the same key, in which case wait for its result.
+
+        The coroutine runs in a task of its own, so a caller that is cancelled, e.g. by its deadline, does not cancel the request shared by the other callers.
+
+        Returns:
+            Tuple: The result of the coroutine, and whether it was shared by a call made by another task.
+        """
+        # asyncio is only imported by the asynchronous client, so that the synchronous client does not pay for it
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get((loop, key))
+            leader = task is None
+            if leader:
+                task = self._tasks[(loop, key)] = loop.create_task(function())
+                task.add_done_callback(lambda task: self._release_task(loop, key, task))
+                self.stats.requests += 1
+            else:
+                self.stats.coalesced += 1
+
+        return await asyncio.shield(task), not leader
+
+    def _release_task(self, loop: Any, key: Hashable, task: Any) -> None:
+        with self._lock:
+            self._tasks.pop((loop, key), None)
+
+        # The exception is retrieved here as well, in case every caller was cancelled before the task failed
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,298 @@
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Mapping, Optional, Text
+
+from pyclipdrop.timeouts import check_backoff
+from pyclipdrop.exceptions import CreditBudgetExceededError
+
+
+# The headers of the responses of the API holding the credits left on the account and the credits the request consumed
+REMAINING_CREDITS_HEADER = 'x-remaining-credits'
+CREDITS_CONSUMED_HEADER = 'x-credits-consumed'
+
+# The priorities of credit jobs. Jobs of higher priorities keep calling the API when the credits left run low.
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+# The credits that must be left on the account, beyond the calls in flight, for jobs of each priority to make a call. Priorities that are not listed have no reserve.
+DEFAULT_RESERVES = {PRIORITY_LOW: 100.0, PRIORITY_NORMAL: 10.0}
+
+# The job whose credits are spent by the calls made in the current thread or task, if any
+_current_job = ContextVar('pyclipdrop_credit_job', default=None)
+
+
+class EndpointCredits:
+    """
+    The credits consumed by the calls to an endpoint.
+
+    Attributes:
+        calls (int): The number of calls whose response reported the credits they consumed.
+        credits (float): The total credits consumed by these calls.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.credits = 0.0
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.credits / self.calls if self.calls else None
+
+    def as_dict(self) -> Dict[Text, float]:
+        return {'calls': self.calls, 'credits': self.credits}
+
+    def __repr__(self) -> Text:
+        return f'EndpointCredits(calls={self.calls}, credits={self.credits:g})'
+
+
+class CreditLedger:
+    """
+    The live account of the credits consumed by a client, per endpoint, and of the credits left on the account, read from the headers of the responses of the API.
+
+    Recording a response only parses two headers under a lock, so the ledger is kept for every request. It can be shared between clients using the same API key.
+
+    Attributes:
+        remaining (float): The credits left on the account according to the latest response, or None before the first response reporting them.
+        consumed (float): The total credits consumed by the recorded responses.
+        endpoints (Dict): The `EndpointCredits` of every endpoint called.
+        updated_at (float): The time of the latest response reporting the credits left, in seconds since the epoch, or None.
+    """
+
+    def __init__(self) -> None:
+        self.remaining = None
+        self.consumed = 0.0
+        self.endpoints: Dict[Text, EndpointCredits] = {}
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: Text, headers: Mapping[Text, Text]) -> float:
+        """
+        Record the credits reported by the headers of a response of an endpoint.
+
+        Returns:
+            float: The credits the request consumed, which is 0 if the response does not report them, e.g. if it was served from a cache.
+        """
+        consumed = _parse_credits(headers.get(CREDITS_CONSUMED_HEADER))
+        remaining = _parse_credits(headers.get(REMAINING_CREDITS_HEADER))
+        if consumed is None and remaining is None:
+            return 0.0
+
+        with self._lock:
+            if consumed is not None:
+                credits = self.endpoints.get(endpoint)
+                if credits is None:
+                    credits = self.endpoints[endpoint] = EndpointCredits()
+                credits.calls += 1
+                credits.credits += consumed
+                self.consumed += consumed
+            if remaining is not None:
+                self.remaining = remaining
+                self.updated_at = time.time()
+
+        return consumed or 0.0
+
+    def update(self, remaining: float) -> None:
+        """
+        Set the credits left on the account, e.g. after it was topped up, so that jobs waiting for credits notice it before the next response.
+        """
+        with self._lock:
+            self.remaining = remaining
+            self.updated_at = time.time()
+
+    def estimate(self, endpoint: Text, default: float = 1.0) -> float:
+        """
+        Estimate the credits a call to an endpoint consumes, from the average of the recorded calls, or `default` before the first one.
+        """
+        credits = self.endpoints.get(endpoint)
+        average = credits.average if credits is not None else None
+        return average if average is not None else default
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'remaining': self.remaining,
+                'consumed': self.consumed,
+                'endpoints': {name: credits.as_dict() for name, credits in self.endpoints.items()}
+            }
+
+    def __repr__(self) -> Text:
+        return f'CreditLedger(remaining={self.remaining}, consumed={self.consumed:g})'
+
+
+class CreditScheduler:
+    """
+    The scheduler of the credits of jobs, such as batches, that have a budget and a priority.
+
+    Before every call of a job, the credits the call is estimated to consume are reserved. A call fails with a `CreditBudgetExceededError` if it would take the job over its budget. A call waits if the credits left on the account, less the reservations of the calls in flight, would fall below the reserve of its priority, and fails if they are still too low after `max_wait` seconds. Low priority bulk work thus backs off when credits run low, while calls of higher priorities and calls outside of any job still go through.
+
+    Args:
+        ledger (CreditLedger): The ledger of the client making the calls, e.g. `client.credits`.
+        reserves (Mapping): The credits that must be left for jobs of each priority to make a call. The default value is 100 for `PRIORITY_LOW` and 10 for `PRIORITY_NORMAL`.
+        default_cost (float): The estimated credits of a call to an endpoint before the ledger has recorded one. The default value is 1.
+        max_wait (float): The time in seconds a call waits for credits to be left above its reserve before it fails. The default value is 0, which fails at once.
+        poll_interval (float): The time in seconds between checks of the credits left while waiting. The default value is 1.
+    """
+
+    def __init__(self, ledger: CreditLedger, reserves: Optional[Mapping[int, float]] = None, default_cost: float = 1.0, max_wait: float = 0.0, poll_interval: float = 1.0) -> None:
+        self.ledger = ledger
+        self.reserves = dict(DEFAULT_RESERVES if reserves is None else reserves)
+        self.default_cost = default_cost
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    def job(self, budget: Optional[float] = None, priority: int = PRIORITY_NORMAL, name: Optional[Text] = None) -> 'CreditJob':
+        """
+        Create a job whose calls spend at most `budget` credits, at the given priority.
+        """
+        return CreditJob(self, budget, priority, name)
+
+    def _try_reserve(self, job: 'CreditJob', endpoint: Text) -> Optional['CreditReservation']:
+        estimate = self.ledger.estimate(endpoint, self.default_cost)
+        with self._lock:
+            if job.budget is not None and job.spent + job.reserved + estimate > job.budget:
+                raise CreditBudgetExceededError(f"The credit budget of {job.budget:g} of the job would be exceeded.", budget=job.budget, remaining=self.ledger.remaining)
+
+            remaining = self.ledger.remaining
+            if remaining is not None and remaining - self.reserved - estimate < self.reserves.get(job.priority, 0.0):
+                return None
+
+            job.reserved += estimate
+            self.reserved += estimate
+
+        return CreditReservation(job, estimate)
+
+    def _release(self, reservation: 'CreditReservation') -> None:
+        with self._lock:
+            reservation.job.reserved -= reservation.estimate
+            reservation.job.spent += reservation.consumed
+            reservation.job.calls += 1
+            self.reserved -= reservation.estimate
+
+    def _get_low_credits_error(self, job: 'CreditJob') -> CreditBudgetExceededError:
+        return CreditBudgetExceededError(f"The credits left on the account, {self.ledger.remaining:g}, are below the reserve of {self.reserves.get(job.priority, 0.0):g} for jobs of priority {job.priority}.", budget=job.budget, remaining=self.ledger.remaining)
+
+
+class CreditJob:
+    """
+    A job whose calls share a credit budget and a priority, created with `CreditScheduler.job`.
+
+    Calls spend the credits of a job when they are made within `within_credit_job(job)` or by a batch run with `credit_job=job`.
+
+    Attributes:
+        budget (float): The maximum credits the calls of the job may consume, or None for no limit.
+        priority (int): The priority of the job, e.g. `PRIORITY_LOW`.
+        name (Text): The name of the job, if any.
+        spent (float): The credits consumed by the completed calls of the job.
+        reserved (float): The credits reserved by the calls of the job in flight.
+        calls (int): The number of completed calls of the job.
+    """
+
+    def __init__(self, scheduler: CreditScheduler, budget: Optional[float] = None, priority: int = PRIORITY_NORMAL, name: Optional[Text] = None) -> None:
+        self.scheduler = scheduler
+        self.budget = budget
+        self.priority = priority
+        self.name = name
+        self.spent = 0.0
+        self.reserved = 0.0
+        self.calls = 0
+
+    @property
+    def available(self) -> Optional[float]:
+        return self.budget - self.spent - self.reserved if self.budget is not None else None
+
+    def reserve(self, endpoint: Text) -> 'CreditReservation':
+        """
+        Reserve the credits of a call to an endpoint, waiting up to `max_wait` seconds of the scheduler for credits to be left above the reserve of the job.
+
+        Raises:
+            CreditBudgetExceededError: If the call would take the job over its budget, or if the credits left stay below the reserve of the job.
+            DeadlineExceededError: If the deadline of the call would expire while waiting.
+        """
+        waited_until = time.monotonic() + self.scheduler.max_wait
+        while True:
+            reservation = self.scheduler._try_reserve(self, endpoint)
+            if reservation is not None:
+                return reservation
+
+            wait = min(self.scheduler.poll_interval, waited_until - time.monotonic())
+            if wait <= 0:
+                raise self.scheduler._get_low_credits_error(self)
+            check_backoff(wait, 'waiting for credits')
+            time.sleep(wait)
+
+    async def reserve_async(self, endpoint: Text) -> 'CreditReservation':
+        """
+        Reserve the credits of a call to an endpoint, as `reserve` does, without blocking the event loop while waiting.
+        """
+        # asyncio is only imported by the asynchronous client, so that the synchronous client does not pay for it
+        import asyncio
+
+        waited_until = time.monotonic() + self.scheduler.max_wait
+        while True:
+            reservation = self.scheduler._try_reserve(self, endpoint)
+            if reservation is not None:
+                return reservation
+
+            wait = min(self.scheduler.poll_interval, waited_until - time.monotonic())
+            if wait <= 0:
+                raise self.scheduler._get_low_credits_error(self)
+            check_backoff(wait, 'waiting for credits')
+            await asyncio.sleep(wait)
+
+    def __repr__(self) -> Text:
+        return f'CreditJob(name={self.name!r}, priority={self.priority}, budget={self.budget}, spent={self.spent:g}, calls={self.calls})'
+
+
+class CreditReservation:
+    """
+    The credits reserved by a call of a job, which are released when the reservation is exited and replaced by the credits the call consumed.
+    """
+
+    def __init__(self, job: CreditJob, estimate: float) -> None:
+        self.job = job
+        self.estimate = estimate
+        self.consumed = 0.0
+
+    def charge(self, credits: float) -> None:
+        self.consumed += credits
+
+    def __enter__(self) -> 'CreditReservation':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.job.scheduler._release(self)
+
+
+def get_current_credit_job() -> Optional[CreditJob]:
+    return _current_job.get()
+
+
+@contextmanager
+def within_credit_job(job: Optional[CreditJob]) -> Iterator[Optional[CreditJob]]:
+    """
+    Spend the credits of the calls made in the context from a job. None leaves the current job, if any, unchanged.
+    """
+    if job is None:
+        yield _current_job.get()
+        return
+
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
+
+
+def _parse_credits(value: Optional[Text]) -> Optional[float]:
+    if value is None:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        return None
@@ -0,0 +1,278 @@
+import hashlib
+import weakref
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import BinaryIO, Iterable, Iterator, Optional, Text, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pyclipdrop.cache import CachedResponse, ResponseCache
+from pyclipdrop.timeouts import check_deadline, get_current_deadline, limit_timeout
+from pyclipdrop.exceptions import DeadlineExceededError, URLReadError
+
+
+class SourceDownloader:
+    """
+    The downloader of URL inputs, which reuses pooled connections to the hosts of the inputs.
+
+    It never sends the API key of the client, since the inputs are hosted by third parties.
+
+    Args:
+        pool_maxsize (int): The maximum number of connections to keep open per host. The default value is 10.
+        timeout (Union): The timeout in seconds for connecting to a host and for reading from it, either as a single value or as a (connect, read) pair. The default value is (5, 60).
+        cache (ResponseCache): The cache for downloaded inputs, keyed by URL. Cached inputs with an ETag or a Last-Modified date are revalidated with a conditional request. The default value is None, which does not cache inputs.
+        revalidate (bool): Whether to revalidate cached inputs before using them. The default value is True.
+        prefetch_workers (int): The maximum number of inputs prefetched concurrently. The default value is 4.
+        max_prefetch_bytes (int): The maximum total size of the prefetched inputs that are not used yet. Prefetching pauses while it is exceeded. The default value is 256 MB.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 10,
+        timeout: Union[float, Tuple[float, float]] = (5.0, 60.0),
+        cache: Optional[ResponseCache] = None,
+        revalidate: bool = True,
+        prefetch_workers: int = 4,
+        max_prefetch_bytes: int = 256 * 1024 * 1024
+    ) -> None:
+        self.timeout = timeout
+        self.cache = cache
+        self.revalidate = revalidate
+        self.prefetch_workers = prefetch_workers
+        self.max_prefetch_bytes = max_prefetch_bytes
+        self.prefetched_bytes = 0
+
+        self._adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize)
+        # Sessions are keyed by their thread without holding it, so the sessions of finished threads are dropped with them
+        self._sessions = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._prefetched = {}
+        self._executor = None
+
+    def __enter__(self) -> 'SourceDownloader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Drop the prefetched inputs and close the pooled connections.
+        """
+        self.clear()
+        with self._lock:
+            executor, self._executor = self._executor, None
+            for session in list(self._sessions.values()):
+                session.close()
+            self._sessions = weakref.WeakKeyDictionary()
+
+        if executor is not None:
+            executor.shutdown(wait=True)
+        self._adapter.close()
+
+    @property
+    def session(self) -> requests.Session:
+        thread = threading.current_thread()
+        session = self._sessions.get(thread)
+        if session is None:
+            session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            with self._lock:
+                self._sessions[thread] = session
+
+        return session
+
+    def fetch(self, url: Text) -> bytes:
+        """
+        Get the content of a URL input, from the prefetched inputs, the cache or the host, in this order.
+
+        Raises:
+            URLReadError: If the input cannot be downloaded.
+        """
+        with self._lock:
+            future = self._prefetched.pop(url, None)
+
+        if future is not None:
+            # The prefetched input is waited for no longer than the deadline of the operation, if any
+            current = get_current_deadline()
+            try:
+                content = future.result(timeout=current.remaining() if current is not None else None)
+            except FutureTimeoutError as e:
+                raise DeadlineExceededError(f"The deadline of {current.seconds:g} seconds was exceeded while downloading the input.", seconds=current.seconds) from e
+            finally:
+                self._release(future)
+            return content
+
+        return self._download(url)
+
+    def fetch_header(self, url: Text, size: int) -> bytes:
+        """
+        Get up to `size` bytes from the start of a URL input, from the prefetched inputs or the cache if the input is there, or from the host with a Range request otherwise.
+
+        Raises:
+            URLReadError: If the input cannot be downloaded.
+        """
+        with self._lock:
+            future = self._prefetched.get(url)
+        if future is not None and future.done() and not future.cancelled() and future.exception() is None:
+            return future.result()[:size]
+
+        if self.cache is not None and not self.revalidate:
+            cached_response = self.cache.get(_get_cache_key(url))
+            if cached_response is not None:
+                return cached_response.content[:size]
+
+        # Hosts that ignore the Range header send the whole input, of which only the first bytes are read before the connection is closed
+        try:
+            response = self.session.get(url, headers={'Range': f'bytes=0-{size - 1}'}, stream=True, timeout=limit_timeout(self.timeout))
+            try:
+                response.raise_for_status()
+                return response.raw.read(size, decode_content=True)
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            check_deadline('downloading the input', e)
+            raise URLReadError("Error in API request: " + str(e)) from e
+
+    def open(self, url: Text) -> Tuple[BinaryIO, Optional[int]]:
+        """
+        Open a URL input as a stream, without reading it into memory.
+
+        Returns:
+            Tuple: A binary file-like object and its size in bytes, if known.
+
+        Raises:
+            URLReadError: If the input cannot be downloaded.
+        """
+        try:
+            response = self.session.get(url, stream=True, timeout=limit_timeout(self.timeout))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            check_deadline('downloading the input', e)
+            raise URLReadError("Error in API request: " + str(e)) from e
+
+        # The raw stream is read by the multipart encoder, so it must be decoded as it is read
+        response.raw.decode_content = True
+        length = response.headers.get('Content-Length')
+        size = int(length) if length is not None and 'Content-Encoding' not in response.headers else None
+        return response.raw, size
+
+    def prefetch(self, url: Text) -> bool:
+        """
+        Start downloading a URL input in the background, so that a later `fetch` finds it ready.
+
+        Returns:
+            bool: Whether the input is being prefetched. It is not if the prefetched inputs exceed the memory budget.
+        """
+        with self._lock:
+            if url in self._prefetched:
+                return True
+            if self.prefetched_bytes >= self.max_prefetch_bytes:
+                return False
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.prefetch_workers, thread_name_prefix='pyclipdrop-prefetch')
+
+            future = self._executor.submit(self._download, url)
+            future.size = 0
+            self._prefetched[url] = future
+
+        future.add_done_callback(self._account)
+        return True
+
+    def prefetch_inputs(self, inputs: Iterable, depth: int) -> Iterator:
+        """
+        Iterate over the argument sets of a batch, prefetching the URL inputs of the next `depth` argument sets.
+
+        The argument sets are yielded unchanged, and their URL inputs are found ready by `fetch`.
+        """
+        window = deque()
+        try:
+            for arguments in inputs:
+                window.append(arguments)
+                for url in _get_urls(arguments):
+                    self.prefetch(url)
+                if len(window) > depth:
+                    yield window.popleft()
+
+            while window:
+                yield window.popleft()
+        finally:
+            # Prefetched inputs of argument sets that were never run must not be held indefinitely
+            if window:
+                self.clear()
+
+    def clear(self) -> None:
+        """
+        Drop the prefetched inputs that have not been used.
+        """
+        with self._lock:
+            futures = list(self._prefetched.values())
+            self._prefetched = {}
+
+        for future in futures:
+            future.cancel()
+            self._release(future)
+
+    def _download(self, url: Text) -> bytes:
+        cache_key = cached_response = None
+        headers = {}
+        if self.cache is not None:
+            cache_key = _get_cache_key(url)
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                if not self.revalidate:
+                    return cached_response.content
+                validators = cached_response.validators
+                if 'ETag' in validators:
+                    headers['If-None-Match'] = validators['ETag']
+                if 'Last-Modified' in validators:
+                    headers['If-Modified-Since'] = validators['Last-Modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=limit_timeout(self.timeout))
+            if response.status_code == 304 and cached_response is not None:
+                return cached_response.content
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            check_deadline('downloading the input', e)
+            raise URLReadError("Error in API request: " + str(e)) from e
+
+        if cache_key is not None:
+            self.cache.set(cache_key, CachedResponse.from_response(response))
+
+        return response.content
+
+    def _account(self, future: Future) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        with self._lock:
+            # The input is only held if it has not been fetched or cleared already
+            if any(prefetched is future for prefetched in self._prefetched.values()):
+                future.size = len(future.result())
+                self.prefetched_bytes += future.size
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self.prefetched_bytes -= future.size
+            future.size = 0
+
+
+def _get_cache_key(url: Text) -> Text:
+    return hashlib.sha256(b'source\x00' + url.encode()).hexdigest()
+
+
+def _get_urls(arguments) -> Iterator[Text]:
+    if isinstance(arguments, dict):
+        values = arguments.values()
+    elif isinstance(arguments, (tuple, list)):
+        values = arguments
+    else:
+        values = [arguments]
+
+    for value in values:
+        if isinstance(value, str) and value.startswith(('http://', 'https://')):
+            yield value
@@ -0,0 +1,317 @@
+from typing import Any, Callable, Collection, Dict, FrozenSet, Mapping, Optional, Text, Tuple, Union
+
+from pyclipdrop.utilities.image_headers import ImageInfo
+from pyclipdrop.utilities.validators import JPG, PNG, PNG_JPG, PNG_JPG_WEBP, is_extension_supported
+from pyclipdrop.exceptions import FileExtensionError, ImageSizeError, ValueNotSupportedError, ValueOutOfRangeError, ValueTooLongError
+
+
+# Output extension rules of endpoints whose output format is not fixed
+SAME_AS_INPUT = 'same_as_input'
+FROM_RESPONSE = 'from_response'
+
+
+class Parameter:
+    """
+    A form field of an endpoint, other than its images.
+
+    Args:
+        name (Text): The name of the argument of the client method.
+        field (Text): The name of the form field. The default value is the name of the argument.
+        as_file (bool): Whether to send the field as a text part of the files of the request rather than as form data. The default value is False.
+        omit_if_empty (bool): Whether to leave the field out of the request if its value is empty. The default value is False.
+        choices (Collection): The supported values, if any.
+        max_length (int): The maximum length of the value, if any.
+        value_range (Tuple): The inclusive (minimum, maximum) range of the value, if any.
+        value_type (type): The type of the value, used to parse values given as text, e.g. on the command line. The default value is None, which keeps text as it is.
+        error (Text): The message of the error raised for an invalid value.
+    """
+
+    def __init__(
+        self,
+        name: Text,
+        field: Optional[Text] = None,
+        as_file: bool = False,
+        omit_if_empty: bool = False,
+        choices: Optional[Collection[Any]] = None,
+        max_length: Optional[int] = None,
+        value_range: Optional[Tuple[float, float]] = None,
+        value_type: Optional[type] = None,
+        error: Optional[Text] = None
+    ) -> None:
+        self.name = name
+        self.field = field or name
+        self.as_file = as_file
+        self.omit_if_empty = omit_if_empty
+        self.choices = frozenset(choices) if choices is not None else None
+        self.max_length = max_length
+        self.value_range = value_range
+        self.value_type = value_type
+        self.error = error
+
+    def parse(self, value: Any) -> Any:
+        """
+        Convert a value given as text to the type of the parameter, leaving other values as they are.
+
+        Raises:
+            ValueNotSupportedError: If the text is not a valid value of the type.
+        """
+        if self.value_type is None or not isinstance(value, str):
+            return value
+
+        try:
+            return self.value_type(value)
+        except ValueError:
+            raise ValueNotSupportedError(f"The value of '{self.name}' must be of type {self.value_type.__name__}, got '{value}'.")
+
+    def validate(self, value: Any) -> None:
+        if self.choices is not None and value not in self.choices:
+            raise ValueNotSupportedError(self.error)
+        if self.max_length is not None and len(value) > self.max_length:
+            raise ValueTooLongError(self.error)
+        if self.value_range is not None and not self.value_range[0] <= value <= self.value_range[1]:
+            raise ValueOutOfRangeError(self.error)
+
+
+class Endpoint:
+    """
+    The description of an endpoint of the Clipdrop API, which the clients run with a single execution engine.
+
+    Args:
+        name (Text): The name of the client method, e.g. 'remove_background'.
+        path (Text): The path of the endpoint, with the version of the API as the '{version}' placeholder.
+        input_field (Text): The form field of the input image, or None if the endpoint takes no image.
+        input_extensions (FrozenSet): The supported extensions of the input image.
+        mask_extensions (FrozenSet): The supported extensions of the mask, or None if the endpoint takes no mask.
+        parameters (Tuple): The `Parameter` objects of the other form fields, in the order they are validated and sent.
+        output_extensions (Union): The supported extensions of the output file, or `SAME_AS_INPUT` or `FROM_RESPONSE`.
+        deterministic (Union): Whether the endpoint returns the same result for the same request, or a function of the arguments deciding it.
+        image_validator (Callable): A function of the arguments and the `ImageInfo` of the input image that raises if they do not fit together, if any.
+    """
+
+    def __init__(
+        self,
+        name: Text,
+        path: Text,
+        input_field: Optional[Text] = 'image_file',
+        input_extensions: FrozenSet[Text] = PNG_JPG_WEBP,
+        mask_extensions: Optional[FrozenSet[Text]] = None,
+        parameters: Tuple[Parameter, ...] = (),
+        output_extensions: Union[FrozenSet[Text], Text] = JPG,
+        deterministic: Union[bool, Callable[[Mapping[Text, Any]], bool]] = True,
+        image_validator: Optional[Callable[[Mapping[Text, Any], ImageInfo], None]] = None
+    ) -> None:
+        self.name = name
+        self.path = path
+        self.input_field = input_field
+        self.input_extensions = input_extensions
+        self.mask_extensions = mask_extensions
+        self.parameters = parameters
+        self.output_extensions = output_extensions
+        self.deterministic = deterministic
+        self.image_validator = image_validator
+
+    def get_url(self, base_url: Text, version: Text) -> Text:
+        return base_url + self.path.format(version=version)
+
+    def parse_arguments(self, arguments: Mapping[Text, Any]) -> Dict[Text, Any]:
+        """
+        Convert the arguments given as text to the types of the parameters of the endpoint. Other arguments, such as the input file, are left as they are.
+        """
+        parameters = {parameter.name: parameter for parameter in self.parameters}
+        return {name: parameters[name].parse(value) if name in parameters else value for name, value in arguments.items()}
+
+    def validate_parameters(self, arguments: Mapping[Text, Any]) -> None:
+        for parameter in self.parameters:
+            parameter.validate(arguments[parameter.name])
+
+    def is_deterministic(self, arguments: Mapping[Text, Any]) -> bool:
+        return self.deterministic(arguments) if callable(self.deterministic) else self.deterministic
+
+    def validate_images(self, arguments: Mapping[Text, Any], image: Optional[ImageInfo], mask: Optional[ImageInfo] = None, mask_resized: bool = False) -> None:
+        """
+        Check the input image and the mask against their headers, before they are uploaded. Images whose format is not recognized are left to the API.
+
+        Args:
+            arguments (Mapping): The arguments of the client method.
+            image (ImageInfo): The header of the input image, if it was recognized.
+            mask (ImageInfo): The header of the mask, if it was recognized.
+            mask_resized (bool): Whether the mask is resized to the image before it is uploaded, which skips the check of its size. The default value is False.
+
+        Raises:
+            FileExtensionError: If the content of an image is not in one of the supported formats.
+            ImageSizeError: If the mask is not the same size as the image.
+            ValueOutOfRangeError: If the arguments do not fit the size of the image.
+        """
+        _validate_format(image, self.input_extensions, 'input file')
+        if mask is not None:
+            _validate_format(mask, self.mask_extensions, 'mask file')
+
+        if image is None or image.size is None:
+            return
+
+        if mask is not None and mask.size is not None and not mask_resized and mask.size != image.size:
+            raise ImageSizeError(f"The mask file must be the same size as the input file, {image.width}x{image.height} pixels, but it is {mask.width}x{mask.height} pixels.")
+
+        if self.image_validator is not None:
+            self.image_validator(arguments, image)
+
+    def get_output_extensions(self, input_extension: Optional[Text], content_type: Optional[Text] = None, image: Optional[ImageInfo] = None) -> Optional[FrozenSet[Text]]:
+        """
+        Get the supported extensions of the output file.
+
+        Args:
+            input_extension (Text): The extension of the input file, if the endpoint takes one.
+            content_type (Text): The content type of the response, if it has been received.
+            image (ImageInfo): The header of the input image, if it was recognized.
+
+        Returns:
+            FrozenSet: The supported extensions, or None if they depend on a response that has not been received.
+        """
+        if self.output_extensions == SAME_AS_INPUT:
+            return frozenset([input_extension])
+        if self.output_extensions == FROM_RESPONSE:
+            if content_type is not None:
+                return frozenset(['.webp' if 'image/webp' in content_type else '.jpg'])
+            # Images with transparency are returned as WEBP and other images as JPEG, which is known ahead of the response from the header of the input
+            if image is not None and image.has_alpha is not None:
+                return frozenset(['.webp' if image.has_alpha else '.jpg'])
+            return None
+        return self.output_extensions
+
+    def build_form(self, arguments: Mapping[Text, Any], image: Optional[Tuple] = None, mask: Optional[Tuple] = None) -> Tuple[Dict, Dict]:
+        """
+        Build the files and the form data of a request.
+
+        Args:
+            arguments (Mapping): The arguments of the client method.
+            image (Tuple): The (name, content, content type) of the input image, if the endpoint takes one.
+            mask (Tuple): The (name, content, content type) of the mask, if the endpoint takes one.
+
+        Returns:
+            Tuple: The files and the form data of the request.
+        """
+        files = {}
+        data = {}
+        if image is not None:
+            files[self.input_field] = image
+        if mask is not None:
+            files['mask_file'] = mask
+
+        for parameter in self.parameters:
+            value = arguments[parameter.name]
+            if parameter.omit_if_empty and not value:
+                continue
+            if parameter.as_file:
+                files[parameter.field] = (None, value, 'text/plain')
+            else:
+                data[parameter.field] = value
+
+        return files, data
+
+
+def _validate_format(image: Optional[ImageInfo], supported_extensions: FrozenSet[Text], name: Text) -> None:
+    if image is not None and not is_extension_supported(image.extension, supported_extensions):
+        raise FileExtensionError(f"The {name} is a {image.format} image, which is not one of the supported formats: {', '.join(sorted(supported_extensions))}")
+
+
+def _validate_upscaling_target(arguments: Mapping[Text, Any], image: ImageInfo) -> None:
+    # The image is fitted into the target size, so a target that is smaller than the image on both sides can only shrink it
+    if arguments['target_width'] < image.width and arguments['target_height'] < image.height:
+        raise ValueOutOfRangeError(f"The target size of {arguments['target_width']}x{arguments['target_height']} pixels is smaller than the input image, which is {image.width}x{image.height} pixels.")
+
+
+ENDPOINTS: Dict[Text, Endpoint] = {endpoint.name: endpoint for endpoint in [
+    Endpoint(
+        'text_to_image',
+        '/text-to-image/{version}',
+        input_field=None,
+        parameters=(Parameter('prompt', as_file=True, max_length=1000, error="The prompt must be less than 1000 characters."),),
+        output_extensions=PNG,
+        deterministic=False
+    ),
+    Endpoint(
+        'replace_background',
+        '/replace-background/{version}',
+        parameters=(Parameter('prompt'),),
+        output_extensions=SAME_AS_INPUT,
+        deterministic=False
+    ),
+    Endpoint(
+        'remove_background',
+        '/remove-background/{version}',
+        parameters=(
+            Parameter(
+                'transparency_handling',
+                omit_if_empty=True,
+                choices=[None, 'return_input_if_non_opaque', 'discard_alpha_layer'],
+                error="The transparency handling mode must be either 'return_input_if_non_opaque' or 'discard_alpha_layer'."
+            ),
+        ),
+        output_extensions=PNG_JPG_WEBP
+    ),
+    Endpoint(
+        'remove_text',
+        '/remove-text/{version}',
+        input_extensions=PNG_JPG,
+        output_extensions=PNG
+    ),
+    Endpoint(
+        'reimagine',
+        '/reimagine/{version}/reimagine',
+        deterministic=False
+    ),
+    Endpoint(
+        'sketch_to_image',
+        '/sketch-to-image/{version}/sketch-to-image',
+        input_field='sketch_file',
+        parameters=(Parameter('prompt', as_file=True, max_length=5000, error="The prompt must be less than 5000 characters."),),
+        deterministic=False
+    ),
+    Endpoint(
+        'uncrop',
+        '/uncrop/{version}',
+        parameters=(
+            Parameter('extend_up', value_type=int),
+            Parameter('extend_down', value_type=int),
+            Parameter('extend_left', value_type=int),
+            Parameter('extend_right', value_type=int),
+            Parameter('seed', omit_if_empty=True, value_type=int)
+        ),
+        # Without a seed, every request returns a different result
+        deterministic=lambda arguments: bool(arguments['seed'])
+    ),
+    Endpoint(
+        'image_upscaling',
+        '/image-upscaling/{version}/upscale',
+        parameters=(
+            Parameter('target_width', value_range=(1, 4096), value_type=int, error="The target width and height must be between 1 and 4096 pixels."),
+            Parameter('target_height', value_range=(1, 4096), value_type=int, error="The target width and height must be between 1 and 4096 pixels.")
+        ),
+        output_extensions=FROM_RESPONSE,
+        image_validator=_validate_upscaling_target
+    ),
+    Endpoint(
+        'cleanup',
+        '/cleanup/{version}',
+        input_extensions=PNG_JPG,
+        mask_extensions=PNG,
+        parameters=(Parameter('mode', choices=['fast', 'quality'], error="The mode must be either 'fast' or 'quality'."),),
+        output_extensions=PNG
+    ),
+    Endpoint(
+        'portrait_depth_estimation',
+        '/portrait-depth-estimation/{version}'
+    ),
+    Endpoint(
+        'portrait_surface_normals',
+        '/portrait-surface-normals/{version}'
+    ),
+    Endpoint(
+        'text_inpainting',
+        '/text-inpainting/{version}',
+        input_extensions=PNG_JPG,
+        mask_extensions=PNG,
+        parameters=(Parameter('prompt', field='text_prompt'),),
+        deterministic=False
+    )
+]}
@@ -0,0 +1,262 @@
+import time
+from functools import partial
+from typing import Any, Callable, Dict, Generator, Optional, Text
+
+from pyclipdrop.cache import CachedResponse, ResponseCache
+from pyclipdrop.coalescing import CoalescedResponse
+from pyclipdrop.credits import CreditReservation
+from pyclipdrop.endpoints import FROM_RESPONSE, Endpoint
+from pyclipdrop.exceptions import APIRequestError
+from pyclipdrop.instrumentation import get_current_record
+from pyclipdrop.io_file_handlers import InputFileHandler, OutputFileHandler
+from pyclipdrop.retry import RequestAttempt
+from pyclipdrop.timeouts import Timeout, check_backoff
+from pyclipdrop.utilities import get_image_info, get_retry_after_from_headers
+
+
+# A step of an operation that does I/O: a call of a method of the client, which returns the result in the synchronous client and an awaitable of the result in the asynchronous client
+Step = Callable[[], Any]
+
+# The steps of an operation, which yield every I/O step and are sent its result
+Steps = Generator[Step, Any, Any]
+
+
+class EndpointEngine:
+    """
+    The execution engine shared by `ClipdropClient` and `AsyncClipdropClient`.
+
+    The logic of an operation, from validating the arguments to recording the credits of the response, is written once as generators of steps, which yield the I/O they need instead of doing it. The synchronous client runs the steps with `run_steps` and the asynchronous client with `run_steps_async`, so each client only supplies its transport and the methods reading the inputs and writing the output:
+
+    - `_read_input`, `_inspect_input`, `_encode_mask`, `_prepare_image`, `_prepare_mask` and `_write_response`, which read, check and prepare the inputs and write the output.
+    - `_post`, `_read_body`, `_close_response` and `_sleep`, which send a single attempt of a request, read or close its response and wait between attempts.
+    - `_coalesce`, which runs the steps of a request through the coalescer of the client.
+    - `_retry_exceptions`, the transport errors that are retried by default.
+    """
+
+    def _endpoint_steps(self, endpoint: Endpoint, timeout: Timeout, arguments: Dict, reservation: Optional[CreditReservation] = None) -> Steps:
+        output_file = arguments['output_file']
+        return_bytes = arguments['return_bytes']
+
+        # Check if the parameters are valid
+        endpoint.validate_parameters(arguments)
+
+        image = mask = input_extension = image_info = None
+        if endpoint.input_field is not None:
+            # Initialize the input handlers and check if the input files are valid
+            input_file_handler = InputFileHandler(arguments['input_file'], supported_extensions=endpoint.input_extensions)
+            input_file_handler.validate()
+
+            # Get input data and suffix, and the format and size of the image from its header
+            image_data = yield partial(self._read_input, input_file_handler)
+            input_extension = input_file_handler.get_extension()
+            image_info = yield partial(self._inspect_input, input_file_handler, image_data)
+            endpoint.validate_images(arguments, image_info)
+            image_size = image_info.size if image_info is not None else None
+
+            # Fit the image to the limits of the endpoint, if a preprocessor is set
+            prepared_data = yield partial(self._prepare_image, endpoint.name, image_data, input_extension)
+            if prepared_data is not image_data:
+                image_data, image_info = prepared_data, get_image_info(prepared_data)
+            image = (input_file_handler.get_name(), image_data, f'image/{(image_info.extension if image_info is not None else input_extension)[1:]}')
+
+            if endpoint.mask_extensions is not None:
+                # Get the mask, drawing shapes at the size of the image and reusing masks encoded or read before
+                mask_file = yield partial(self._encode_mask, arguments['mask_file'], image_size)
+                mask_file_handler = InputFileHandler(mask_file, supported_extensions=endpoint.mask_extensions)
+                mask_file_handler.validate()
+
+                # Get mask data and check it against the image, unless a preprocessor is set to fit the mask to the image
+                mask_data = yield partial(self._read_input, mask_file_handler)
+                mask_info = yield partial(self._inspect_input, mask_file_handler, mask_data)
+                endpoint.validate_images(arguments, image_info, mask_info, mask_resized=self.preprocessor is not None)
+                mask_data = yield partial(self._prepare_mask, mask_data, image_data)
+                mask = (mask_file_handler.get_name(), mask_data, f'image/{mask_file_handler.get_extension()[1:]}')
+
+        # The output extensions are only unknown if they depend on a response whose content type cannot be predicted from the input
+        output_extensions = endpoint.get_output_extensions(input_extension, image=image_info)
+        if endpoint.output_extensions == FROM_RESPONSE and output_file:
+            # The prediction only picks the default output file, while an explicit one is checked against the content type of the response
+            output_extensions = None
+        output_file_handler = None
+        if output_extensions is not None:
+            # If the output file is not specified, use 'output' with the extension of the input file or the predicted extension
+            output_file_handler = OutputFileHandler(output_file or f'output{input_extension if endpoint.output_extensions != FROM_RESPONSE else next(iter(output_extensions))}', supported_extensions=output_extensions, return_bytes=return_bytes)
+
+            # Check if the output file is valid
+            output_file_handler.validate()
+
+        files, data = endpoint.build_form(arguments, image, mask)
+        response = yield from self._request_steps(
+            endpoint.get_url(self.base_url, self.version),
+            files=files,
+            data=data,
+            deterministic=endpoint.is_deterministic(arguments),
+            timeout=timeout,
+            name=endpoint.name
+        )
+
+        # Charge the credits the request consumed to the job of the call, if any
+        if reservation is not None:
+            reservation.charge(response.credits)
+
+        if endpoint.output_extensions == FROM_RESPONSE:
+            # Get the output file extension from the response content type, unless it was predicted correctly
+            response_extensions = endpoint.get_output_extensions(input_extension, response.headers['Content-Type'])
+            if response_extensions != output_extensions:
+                # If the output file is not specified, use 'output' with the above extension
+                output_file_handler = OutputFileHandler(output_file or f'output{next(iter(response_extensions))}', supported_extensions=response_extensions, return_bytes=return_bytes)
+
+                # Check if the output file is valid
+                output_file_handler.validate()
+
+        return (yield partial(self._write_response, response, output_file_handler))
+
+    def _request_steps(self, url: Text, files: Dict, data: Dict = None, deterministic: bool = True, timeout: Optional[Timeout] = None, name: Optional[Text] = None) -> Steps:
+        record = get_current_record()
+        if record is None:
+            response = yield from self._send_steps(url, files, data, deterministic, timeout)
+            return self._record_credits(name or url, response)
+
+        with record.phase('request'):
+            try:
+                response = yield from self._send_steps(url, files, data, deterministic, timeout)
+            except APIRequestError as e:
+                record.status_code = e.status_code
+                record.attempts = e.attempts or []
+                raise
+
+        if isinstance(response, CoalescedResponse):
+            record.coalesced = True
+            record.status_code = response.status_code
+        elif isinstance(response, CachedResponse):
+            record.cache_hit = True
+            record.status_code = response.status_code
+        else:
+            record.add_response(response, response.attempts)
+
+        record.credits = self._record_credits(name or url, response).credits
+        return response
+
+    def _record_credits(self, name: Text, response: Any) -> Any:
+        # Cached and shared responses do not carry the credit headers, so only the requests sent by the call consume credits
+        response.credits = self.credits.record(name, response.headers)
+        return response
+
+    def _send_steps(self, url: Text, files: Dict, data: Dict = None, deterministic: bool = True, timeout: Optional[Timeout] = None) -> Steps:
+        cache_key = None
+        if self.cache is not None and (deterministic or self.cache_nondeterministic):
+            cache_key = self.cache.make_key(url, files, data)
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+
+        if self.coalescer is None or not deterministic:
+            return (yield from self._fetch_steps(url, files, data, timeout, cache_key))
+
+        # Concurrent identical calls wait on the request of the first one and get a copy of its response, which is read into memory to be shared
+        response, shared = yield partial(self._coalesce, cache_key or ResponseCache.make_key(url, files, data), lambda: self._fetch_shared_steps(url, files, data, timeout, cache_key))
+        return CoalescedResponse.from_response(response) if shared else response
+
+    def _fetch_shared_steps(self, url: Text, files: Dict, data: Dict, timeout: Optional[Timeout], cache_key: Optional[Text]) -> Steps:
+        response = yield from self._fetch_steps(url, files, data, timeout, cache_key)
+        # The content is read before it is shared, since the caller that sent the request may stream it to its output
+        yield partial(self._read_body, response)
+        return response
+
+    def _fetch_steps(self, url: Text, files: Dict, data: Dict, timeout: Optional[Timeout], cache_key: Optional[Text]) -> Steps:
+        retry_exceptions = self.retry_policy.retry_exceptions or self._retry_exceptions
+        attempts = []
+        failures = 0
+        throttled_attempts = 0
+        while True:
+            # The payload has already been read, so every attempt resubmits the same bytes
+            started_at = time.perf_counter()
+            try:
+                response = yield partial(self._post, url, files, data, timeout)
+            except retry_exceptions as e:
+                failures += 1
+                attempt = RequestAttempt(len(attempts) + 1, time.perf_counter() - started_at, exception=e)
+                attempts.append(attempt)
+                backoff = self.retry_policy.next_backoff(url, attempt, failures)
+                if backoff is None:
+                    raise
+                check_backoff(backoff, 'waiting to retry the request')
+                yield partial(self._sleep, backoff)
+                continue
+
+            attempt = RequestAttempt(len(attempts) + 1, time.perf_counter() - started_at, status_code=response.status_code)
+            attempts.append(attempt)
+
+            # Rate limited requests are resubmitted once the rate limiter allows it, without counting against the retry policy
+            if response.status_code == 429 and self.rate_limiter is not None and throttled_attempts < self.rate_limiter.max_throttle_retries:
+                throttled_attempts += 1
+                self.retry_policy.notify(url, attempt)
+                yield partial(self._close_response, response)
+                continue
+
+            failures += 1
+            backoff = self.retry_policy.next_backoff(url, attempt, failures, get_retry_after_from_headers(response.headers))
+            if backoff is None:
+                break
+            yield partial(self._close_response, response)
+            check_backoff(backoff, 'waiting to retry the request')
+            yield partial(self._sleep, backoff)
+
+        response.attempts = attempts
+
+        if response.status_code >= 400:
+            # The body of a failed response is read for the error message, even if responses are streamed
+            yield partial(self._read_body, response)
+            raise APIRequestError(f"The request to the Clipdrop API failed: {_get_error_message(response)}", status_code=response.status_code, attempts=attempts)
+
+        if cache_key is not None and not self.stream:
+            self.cache.set(cache_key, CachedResponse.from_response(response))
+
+        return response
+
+
+def run_steps(steps: Steps) -> Any:
+    """
+    Run the steps of an operation, calling every I/O step and sending its result, or throwing its exception, back into the steps.
+
+    Returns:
+        Any: The result of the steps.
+    """
+    result = error = None
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as e:
+            return e.value
+
+        try:
+            result, error = step(), None
+        except BaseException as e:
+            result, error = None, e
+
+
+async def run_steps_async(steps: Steps) -> Any:
+    """
+    Run the steps of an operation as `run_steps` does, awaiting every I/O step.
+
+    Returns:
+        Any: The result of the steps.
+    """
+    result = error = None
+    while True:
+        try:
+            step = steps.throw(error) if error is not None else steps.send(result)
+        except StopIteration as e:
+            return e.value
+
+        try:
+            result, error = await step(), None
+        except BaseException as e:
+            result, error = None, e
+
+
+def _get_error_message(response: Any) -> Text:
+    try:
+        return response.json().get('error', 'No error message provided by the API')
+    except ValueError:
+        return 'The response content from the API could not be decoded as JSON'
@@ -2,8 +2,16 @@
 class APIRequestError(Exception):
     """
     Exception raised for errors in the API request to Clipdrop.
+
+    Attributes:
+        status_code (int): The status code of the response from the API.
+        attempts (List): The `RequestAttempt` objects of every attempt of the request.
     """
-    pass
+
+    def __init__(self, message: str, status_code: int = None, attempts: list = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.attempts = attempts or []
 
 
 class FileOrURLError(Exception):
@@ -41,6 +49,13 @@ class FileExtensionError(Exception):
     pass
 
 
+class ImageSizeError(Exception):
+    """
+    Exception raised when the size of an image does not fit the request, e.g. a mask that is not the same size as its image.
+    """
+    pass
+
+
 class URLReadError(Exception):
     """
     Exception raised for errors in reading from a URL.
@@ -66,4 +81,39 @@ class ValueNotSupportedError(Exception):
     """
     Exception raised when an input is not supported.
     """
-    pass
\ No newline at end of file
+    pass
+
+
+class BatchCancelledError(Exception):
+    """
+    Exception raised for items of a batch that were not processed because the batch was cancelled.
+    """
+    pass
+
+
+class DeadlineExceededError(Exception):
+    """
+    Exception raised when an operation does not complete within its deadline.
+
+    Attributes:
+        seconds (float): The deadline of the operation in seconds.
+    """
+
+    def __init__(self, message: str, seconds: float = None) -> None:
+        super().__init__(message)
+        self.seconds = seconds
+
+
+class CreditBudgetExceededError(Exception):
+    """
+    Exception raised when a call of a credit job would exceed the budget of the job, or when the credits left on the account stay below the reserve of its priority.
+
+    Attributes:
+        budget (float): The credit budget of the job, if any.
+        remaining (float): The credits left on the account according to the latest response, if known.
+    """
+
+    def __init__(self, message: str, budget: float = None, remaining: float = None) -> None:
+        super().__init__(message)
+        self.budget = budget
+        self.remaining = remaining
@@ -0,0 +1,275 @@
+import time
+import warnings
+import functools
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Text
+
+from pyclipdrop.retry import RequestAttempt
+
+
+# The flag of the code of coroutine functions, which is inspect.CO_COROUTINE. inspect is not imported for it, since the clients are decorated at import.
+_CO_COROUTINE = 0x80
+
+# The record of the call being made in the current thread or task, if the client has hooks
+_current_record = ContextVar('pyclipdrop_call_record', default=None)
+
+
+class CallRecord:
+    """
+    The structured record of a single call to an endpoint of a client, passed to the hooks of the client once the call returns or raises.
+
+    Attributes:
+        endpoint (Text): The name of the endpoint, e.g. 'remove_background'.
+        started_at (float): The time the call started, in seconds since the epoch.
+        duration (float): The time taken by the call in seconds.
+        phases (Dict): The time taken by every phase of the call in seconds: 'validate', 'read', 'prepare', 'request' and 'write'. The 'request' phase includes the upload, the server processing, retries and backoff, and the download unless the response is streamed, in which case the download is part of 'write'.
+        response_time (float): The time between sending the last attempt and receiving its response headers, in seconds, if known.
+        request_bytes (int): The number of bytes uploaded over all attempts, if known.
+        response_bytes (int): The number of bytes of the response body.
+        status_code (int): The status code of the last response, if one was received.
+        attempts (List): The `RequestAttempt` objects of every attempt.
+        cache_hit (bool): Whether the response was served from the cache of the client.
+        coalesced (bool): Whether the call shared the request of a concurrent identical call instead of sending its own.
+        credits (float): The credits consumed by the call, as reported by the response. Calls served from the cache or sharing the request of another call consume none.
+        exception (Exception): The exception raised by the call, if it failed.
+    """
+
+    def __init__(self, endpoint: Text) -> None:
+        self.endpoint = endpoint
+        self.started_at = time.time()
+        self.duration = None
+        self.phases = {}
+        self.response_time = None
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status_code = None
+        self.attempts = []
+        self.cache_hit = False
+        self.coalesced = False
+        self.credits = 0.0
+        self.exception = None
+        self._started = time.perf_counter()
+
+    @property
+    def retries(self) -> int:
+        return max(len(self.attempts) - 1, 0)
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exception is None
+
+    def phase(self, name: Text) -> '_Phase':
+        return _Phase(self, name)
+
+    def add_phase(self, name: Text, duration: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+    def add_response(self, response: Any, attempts: List[RequestAttempt]) -> None:
+        self.status_code = response.status_code
+        self.attempts = attempts
+        try:
+            self.response_time = response.elapsed.total_seconds()
+        except (AttributeError, RuntimeError):
+            # httpx only knows the elapsed time of a streamed response once it is closed
+            pass
+
+    def count_chunks(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        for chunk in chunks:
+            self.response_bytes += len(chunk)
+            yield chunk
+
+    def as_dict(self) -> Dict[Text, Any]:
+        return {
+            'endpoint': self.endpoint,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'phases': dict(self.phases),
+            'response_time': self.response_time,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'status_code': self.status_code,
+            'retries': self.retries,
+            'cache_hit': self.cache_hit,
+            'coalesced': self.coalesced,
+            'credits': self.credits,
+            'exception': repr(self.exception) if self.exception is not None else None
+        }
+
+    def __repr__(self) -> Text:
+        return f'CallRecord(endpoint={self.endpoint!r}, duration={self.duration}, status_code={self.status_code}, retries={self.retries})'
+
+
+class _Phase:
+    __slots__ = ('record', 'name', 'started')
+
+    def __init__(self, record: CallRecord, name: Text) -> None:
+        self.record = record
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *args) -> None:
+        self.record.add_phase(self.name, time.perf_counter() - self.started)
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *args) -> None:
+        pass
+
+
+_NO_PHASE = _NoPhase()
+
+
+def get_current_record() -> Optional[CallRecord]:
+    return _current_record.get()
+
+
+def measure(name: Text):
+    """
+    Get a context manager that adds the time spent in it to a phase of the current call. It does nothing if the client of the call has no hooks.
+    """
+    record = _current_record.get()
+    return _NO_PHASE if record is None else _Phase(record, name)
+
+
+def instrumented(function: Callable) -> Callable:
+    """
+    Record the calls to an endpoint method of a client and pass the records to the hooks of the client. Clients without hooks only pay for a truthiness check.
+    """
+    endpoint = function.__name__
+
+    if function.__code__.co_flags & _CO_COROUTINE:
+        @functools.wraps(function)
+        async def async_wrapper(self, *args, **kwargs):
+            if not self.hooks:
+                return await function(self, *args, **kwargs)
+
+            record = CallRecord(endpoint)
+            token = _current_record.set(record)
+            try:
+                return await function(self, *args, **kwargs)
+            except Exception as e:
+                record.exception = e
+                raise
+            finally:
+                _current_record.reset(token)
+                _emit(self.hooks, record)
+
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(self, *args, **kwargs):
+        if not self.hooks:
+            return function(self, *args, **kwargs)
+
+        record = CallRecord(endpoint)
+        token = _current_record.set(record)
+        try:
+            return function(self, *args, **kwargs)
+        except Exception as e:
+            record.exception = e
+            raise
+        finally:
+            _current_record.reset(token)
+            _emit(self.hooks, record)
+
+    return wrapper
+
+
+def _emit(hooks: List[Callable], record: CallRecord) -> None:
+    record.duration = time.perf_counter() - record._started
+    for hook in hooks:
+        # A failing hook must not fail the call it observes
+        try:
+            hook(record)
+        except Exception as e:
+            warnings.warn(f'The instrumentation hook {hook!r} failed: {e!r}', RuntimeWarning)
+
+
+class OpenTelemetryHook:
+    """
+    A hook that reports every call as an OpenTelemetry span, which requires the opentelemetry-api package.
+
+    Args:
+        tracer (Tracer): The tracer to create spans with. The default value is the tracer of the global tracer provider.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("The OpenTelemetry hook requires opentelemetry-api. Install it with 'pip install opentelemetry-api'.") from e
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('pyclipdrop')
+
+    def __call__(self, record: CallRecord) -> None:
+        attributes = {
+            'clipdrop.endpoint': record.endpoint,
+            'clipdrop.retries': record.retries,
+            'clipdrop.cache_hit': record.cache_hit,
+            'clipdrop.coalesced': record.coalesced,
+            'clipdrop.credits': record.credits,
+            'clipdrop.request_bytes': record.request_bytes,
+            'clipdrop.response_bytes': record.response_bytes
+        }
+        if record.status_code is not None:
+            attributes['http.response.status_code'] = record.status_code
+        for name, duration in record.phases.items():
+            attributes[f'clipdrop.phase.{name}'] = duration
+
+        span = self.tracer.start_span(f'clipdrop.{record.endpoint}', start_time=int(record.started_at * 1e9), attributes=attributes)
+        if record.exception is not None:
+            span.record_exception(record.exception)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(record.exception)))
+        span.end(end_time=int((record.started_at + record.duration) * 1e9))
+
+
+class PrometheusHook:
+    """
+    A hook that reports every call as Prometheus counters and histograms, which requires the prometheus-client package.
+
+    Args:
+        registry (CollectorRegistry): The registry to register the metrics in. The default value is the global registry.
+        namespace (Text): The prefix of the names of the metrics. The default value is 'clipdrop'.
+    """
+
+    def __init__(self, registry: Any = None, namespace: Text = 'clipdrop') -> None:
+        try:
+            from prometheus_client import REGISTRY, Counter, Histogram
+        except ImportError as e:
+            raise ImportError("The Prometheus hook requires prometheus-client. Install it with 'pip install prometheus-client'.") from e
+
+        registry = registry if registry is not None else REGISTRY
+        self.requests = Counter('requests', 'Calls to the Clipdrop API.', ['endpoint', 'status'], namespace=namespace, registry=registry)
+        self.retries = Counter('retries', 'Retried attempts of calls to the Clipdrop API.', ['endpoint'], namespace=namespace, registry=registry)
+        self.cache_hits = Counter('cache_hits', 'Calls served from the response cache.', ['endpoint'], namespace=namespace, registry=registry)
+        self.coalesced = Counter('coalesced', 'Calls that shared the request of a concurrent identical call.', ['endpoint'], namespace=namespace, registry=registry)
+        self.credits = Counter('credits', 'Credits consumed by calls to the Clipdrop API.', ['endpoint'], namespace=namespace, registry=registry)
+        self.request_bytes = Counter('request_bytes', 'Bytes uploaded to the Clipdrop API.', ['endpoint'], namespace=namespace, registry=registry)
+        self.response_bytes = Counter('response_bytes', 'Bytes downloaded from the Clipdrop API.', ['endpoint'], namespace=namespace, registry=registry)
+        self.duration = Histogram('call_duration_seconds', 'The duration of calls to the Clipdrop API.', ['endpoint'], namespace=namespace, registry=registry)
+        self.phase_duration = Histogram('phase_duration_seconds', 'The duration of the phases of calls to the Clipdrop API.', ['endpoint', 'phase'], namespace=namespace, registry=registry)
+
+    def __call__(self, record: CallRecord) -> None:
+        endpoint = record.endpoint
+        status = str(record.status_code) if record.status_code is not None else 'error'
+
+        self.requests.labels(endpoint, status).inc()
+        self.retries.labels(endpoint).inc(record.retries)
+        self.request_bytes.labels(endpoint).inc(record.request_bytes)
+        self.response_bytes.labels(endpoint).inc(record.response_bytes)
+        self.credits.labels(endpoint).inc(record.credits)
+        self.duration.labels(endpoint).observe(record.duration)
+        if record.cache_hit:
+            self.cache_hits.labels(endpoint).inc()
+        if record.coalesced:
+            self.coalesced.labels(endpoint).inc()
+        for name, duration in record.phases.items():
+            self.phase_duration.labels(endpoint, name).observe(duration)
@@ -1,2 +1,2 @@
-from pyclipdrop.io_file_handlers.input_file_handler import InputFileHandler
+from pyclipdrop.io_file_handlers.input_file_handler import InputFileHandler, InputStream
 from pyclipdrop.io_file_handlers.output_file_handler import OutputFileHandler
\ No newline at end of file
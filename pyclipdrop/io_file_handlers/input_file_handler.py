@@ -1,35 +1,89 @@
+import socket
 import urllib.request
 from pathlib import Path
-from typing import Text, List
+from typing import Any, BinaryIO, Optional, Text, List, Tuple, Union
 from urllib.parse import urlparse
 from pyclipdrop.exceptions import FileOrURLError, FileOpenError, FileExtensionError, URLReadError
-from pyclipdrop.utilities import get_extension_from_file_path, get_extension_from_url, is_extension_supported
+from pyclipdrop.instrumentation import measure
+from pyclipdrop.timeouts import Timeout, check_deadline, get_httpx_timeout, limit_timeout
+from pyclipdrop.utilities import HEADER_SIZE, ImageInfo, convert_to_bytes, get_extension_from_content, get_extension_from_file_path, get_extension_from_url, get_stream_size, is_extension_supported, is_in_memory_image, read_image_info
+
+
+# The timeout in seconds of URL inputs read without a downloader
+URL_TIMEOUT = 60
+
+
+class InputStream:
+    """
+    A source of the content of an input file that is uploaded without reading it into memory.
+
+    It can be opened any number of times, so that the upload can be retried. URL inputs are downloaded again on every opening and piped into the upload.
+    """
+
+    def __init__(self, input_file: Text, is_file: bool, downloader: Any = None) -> None:
+        self.input_file = input_file
+        self.is_file = is_file
+        self.downloader = downloader
+
+    def open(self) -> Tuple[BinaryIO, Optional[int]]:
+        """
+        Open the input file.
+
+        Returns:
+            Tuple: A binary file-like object and its size in bytes, if known.
+        """
+        if self.is_file:
+            try:
+                source = open(self.input_file, 'rb')
+            except (PermissionError, OSError) as e:
+                raise FileOpenError("Error opening file: " + str(e)) from e
+        elif self.downloader is not None:
+            return self.downloader.open(self.input_file)
+        else:
+            try:
+                source = urllib.request.urlopen(self.input_file, timeout=limit_timeout(URL_TIMEOUT))
+            except (urllib.error.HTTPError, urllib.error.URLError, socket.timeout) as e:
+                check_deadline('downloading the input', e)
+                raise URLReadError("Error in API request: " + str(e)) from e
+
+        return source, get_stream_size(source)
 
 
 class InputFileHandler:
-    def __init__(self, input_file: Text, supported_extensions: List[Text] = None) -> None:
+    def __init__(self, input_file: Union[Text, Any], supported_extensions: List[Text] = None) -> None:
         self.input_file = input_file
         self.supported_extensions =  supported_extensions
         self.input_extension = None
         self.is_file = None
+        self.data = None
 
     def validate(self) -> None:
-        if self._is_valid_file_path():
-            self.set_is_file(True)
-            self.set_extension(get_extension_from_file_path(self.input_file))
+        with measure('validate'):
+            if is_in_memory_image(self.input_file):
+                # In-memory inputs have no suffix, so their format is detected from their content
+                self.data = convert_to_bytes(self.input_file)
+                self.set_is_file(False)
+                self.set_extension(get_extension_from_content(self.data))
 
-        elif self._is_valid_url():
-            self.set_is_file(False)
-            self.set_extension(get_extension_from_url(self.input_file))
+            elif self._is_valid_file_path():
+                self.set_is_file(True)
+                self.set_extension(get_extension_from_file_path(self.input_file))
 
-        else:
-            raise FileOrURLError("Input file must be a valid file path or URL.")
+            elif self._is_valid_url():
+                self.set_is_file(False)
+                self.set_extension(get_extension_from_url(self.input_file))
+
+            else:
+                raise FileOrURLError("Input file must be a valid file path, URL or in-memory image.")
 
-        if not is_extension_supported(self.get_extension(), self.supported_extensions):
-            raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(self.supported_extensions)}")
+            if not is_extension_supported(self.get_extension(), self.supported_extensions):
+                raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(sorted(self.supported_extensions))}")
         
     def _is_valid_file_path(self) -> bool:
-        return Path(self.input_file).exists()
+        try:
+            return Path(self.input_file).exists()
+        except TypeError:
+            return False
     
     def _is_valid_url(self) -> bool:
         try:
@@ -44,28 +98,103 @@ class InputFileHandler:
     def set_extension(self, extension: Text) -> None:
         self.input_extension = extension
 
+    def get_name(self) -> Text:
+        if self.is_in_memory():
+            return f'image{self.get_extension()}'
+
+        return str(self.input_file)
+
+    def is_in_memory(self) -> bool:
+        return self.data is not None
+
     def get_is_file(self) -> bool:
         return self.is_file
     
     def set_is_file(self, is_file: bool) -> None:
         self.is_file = is_file
     
-    def read(self) -> bytes:
-        if self.get_is_file():
+    def read(self, downloader: Any = None) -> bytes:
+        if self.is_in_memory():
+            return self.data
+        elif self.get_is_file():
             return self._read_file(self.input_file)
+        elif downloader is not None:
+            return downloader.fetch(self.input_file)
         else:
             return self._read_url(self.input_file)
     
-    def _read_file(self, file_path) -> bytes:
+    def get_stream(self, downloader: Any = None) -> Union[InputStream, bytes]:
+        if self.is_in_memory():
+            return self.data
+
+        return InputStream(self.input_file, self.get_is_file(), downloader)
+
+    def read_header(self, downloader: Any = None, size: int = HEADER_SIZE) -> bytes:
+        """
+        Read up to `size` bytes from the start of the input, without reading the rest of it. URL inputs are requested with a Range header.
+        """
+        if self.is_in_memory():
+            return self.data[:size]
+        elif self.get_is_file():
+            return self._read_file(self.input_file, size)
+        elif downloader is not None:
+            return downloader.fetch_header(self.input_file, size)
+        else:
+            return self._read_url(self.input_file, size)
+
+    def inspect(self, downloader: Any = None) -> Optional[ImageInfo]:
+        """
+        Read the format, size and transparency of the input from its header.
+
+        Returns:
+            ImageInfo: The information found in the header, or None if the format is not recognized.
+        """
+        return read_image_info(lambda size: self.read_header(downloader, size))
+
+    async def read_async(self, http_client=None, timeout: Optional[Timeout] = None) -> bytes:
+        # asyncio is only imported by the asynchronous client, so that the synchronous client does not pay for it
+        import asyncio
+        import contextvars
+
+        if self.is_in_memory():
+            return self.data
+        elif self.get_is_file():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._read_file, self.input_file)
+        elif http_client is not None:
+            return await self._read_url_async(self.input_file, http_client, timeout)
+        else:
+            # The context is copied into the executor, so that the download is limited by the deadline of the operation
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, contextvars.copy_context().run, self._read_url, self.input_file)
+
+    def _read_file(self, file_path, size: Optional[int] = None) -> bytes:
         try:
             with open(file_path, 'rb') as file:
-                return file.read()
+                return file.read(size)
         except (PermissionError, OSError) as e:
             raise FileOpenError("Error opening file: " + str(e)) from e
         
-    def _read_url(self, url) -> bytes:
+    def _read_url(self, url, size: Optional[int] = None) -> bytes:
+        # Only the requested part of the input is downloaded, if the host supports Range requests
+        request = urllib.request.Request(url, headers={'Range': f'bytes=0-{size - 1}'} if size is not None else {})
+        try:
+            with urllib.request.urlopen(request, timeout=limit_timeout(URL_TIMEOUT)) as response:
+                return response.read(size)
+        except (urllib.error.HTTPError, urllib.error.URLError, socket.timeout) as e:
+            check_deadline('downloading the input', e)
+            raise URLReadError("Error in API request: " + str(e)) from e
+
+    async def _read_url_async(self, url, http_client, timeout: Optional[Timeout] = None) -> bytes:
+        # httpx is an optional dependency that is only required by the asynchronous client
+        import httpx
+
+        # The timeout of the download is cut short by the deadline of the operation, if any
+        request_timeout = limit_timeout(timeout if timeout is not None else URL_TIMEOUT)
         try:
-            with urllib.request.urlopen(url) as response:
-                return response.read()
-        except (urllib.error.HTTPError, urllib.error.URLError) as e:
+            response = await http_client.get(url, follow_redirects=True, timeout=get_httpx_timeout(request_timeout))
+            response.raise_for_status()
+            return response.content
+        except httpx.HTTPError as e:
+            check_deadline('downloading the input', e)
             raise URLReadError("Error in API request: " + str(e)) from e
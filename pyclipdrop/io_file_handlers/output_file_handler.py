@@ -1,32 +1,57 @@
+import os
+import uuid
 from pathlib import Path
-from typing import Text, List
-from pyclipdrop.utilities import get_extension_from_file_path, is_extension_supported
+from typing import Any, AsyncIterable, Iterable, Optional, Text, List, Union
+from pyclipdrop.utilities import directory_cache, get_extension_from_file_path, is_extension_supported
 from pyclipdrop.exceptions import FilePathError, FileExtensionError, FileOpenError, FileWriteError
+from pyclipdrop.instrumentation import measure
 
 
 class OutputFileHandler:
-    def __init__(self, output_file: Text, supported_extensions: List[Text] = None) -> None:
+    def __init__(self, output_file: Union[Text, Any], supported_extensions: List[Text] = None, return_bytes: bool = False) -> None:
         self.output_file = output_file
         self.supported_extensions = supported_extensions
         self.output_extension = None
+        self.return_bytes = return_bytes
 
     def validate(self) -> None:
-        if self._is_valid_parent_directory():
-            self.set_extension(get_extension_from_file_path(self.output_file))
+        with measure('validate'):
+            if self.return_bytes:
+                return
 
-        else:
-            raise FilePathError("The path to the output file does not exist.")
+            if self.is_file_like():
+                # File-like outputs are only validated if they are named, e.g. open files
+                name = getattr(self.output_file, 'name', None)
+                if not isinstance(name, str):
+                    return
+                self.set_extension(get_extension_from_file_path(name))
+
+            elif self._is_valid_parent_directory():
+                self.set_extension(get_extension_from_file_path(self.output_file))
+
+            else:
+                raise FilePathError("The path to the output file does not exist.")
         
-        if not is_extension_supported(self.output_extension, self.supported_extensions):
-            raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(self.supported_extensions)}")
+            if not is_extension_supported(self.output_extension, self.supported_extensions):
+                raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(sorted(self.supported_extensions))}")
         
     def _is_valid_parent_directory(self) -> bool:
-        return Path(self.output_file).parent.exists()
+        return directory_cache.exists(os.path.dirname(os.fspath(self.output_file)))
     
     def set_extension(self, extension: Text) -> Text:
         self.output_extension = extension
         
-    def write(self, data: bytes) -> None:
+    def is_file_like(self) -> bool:
+        return hasattr(self.output_file, 'write')
+
+    def write(self, data: bytes) -> Optional[bytes]:
+        if self.return_bytes:
+            return data
+
+        if self.is_file_like():
+            self._write_chunk(self.output_file, data)
+            return None
+
         try:
             with open(self.output_file, 'wb') as f:
                 try:
@@ -35,3 +60,72 @@ class OutputFileHandler:
                     raise FileWriteError("Error writing to file: " + str(e))
         except (FileNotFoundError, PermissionError, OSError) as e:
             raise FileOpenError("Error opening file: " + str(e))
+
+    async def write_async(self, data: bytes) -> Optional[bytes]:
+        if self.return_bytes:
+            return data
+
+        # asyncio is only imported by the asynchronous client, so that the synchronous client does not pay for it
+        import asyncio
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.write, data)
+
+    def write_stream(self, chunks: Iterable[bytes]) -> None:
+        if self.is_file_like():
+            for chunk in chunks:
+                self._write_chunk(self.output_file, chunk)
+            return
+
+        # Write to a temporary file in the same directory and rename it, so that the output file is never left partially written
+        temporary_file = self._open_temporary_file()
+        try:
+            with temporary_file:
+                for chunk in chunks:
+                    self._write_chunk(temporary_file, chunk)
+            self._replace_output_file(temporary_file.name)
+        except BaseException:
+            self._remove_temporary_file(temporary_file.name)
+            raise
+
+    async def write_stream_async(self, chunks: AsyncIterable[bytes]) -> None:
+        import asyncio
+        loop = asyncio.get_running_loop()
+        if self.is_file_like():
+            async for chunk in chunks:
+                await loop.run_in_executor(None, self._write_chunk, self.output_file, chunk)
+            return
+
+        temporary_file = self._open_temporary_file()
+        try:
+            with temporary_file:
+                async for chunk in chunks:
+                    await loop.run_in_executor(None, self._write_chunk, temporary_file, chunk)
+            self._replace_output_file(temporary_file.name)
+        except BaseException:
+            self._remove_temporary_file(temporary_file.name)
+            raise
+
+    def _write_chunk(self, file, chunk: bytes) -> None:
+        try:
+            file.write(chunk)
+        except (IOError, OSError) as e:
+            raise FileWriteError("Error writing to file: " + str(e))
+
+    def _replace_output_file(self, path: Text) -> None:
+        try:
+            os.replace(path, self.output_file)
+        except OSError as e:
+            raise FileWriteError("Error writing to file: " + str(e))
+
+    def _open_temporary_file(self):
+        output_path = Path(self.output_file)
+        try:
+            return open(output_path.parent / f'.{output_path.name}.{uuid.uuid4().hex}.tmp', 'xb')
+        except (FileNotFoundError, PermissionError, OSError) as e:
+            raise FileOpenError("Error opening file: " + str(e))
+
+    def _remove_temporary_file(self, path: Text) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
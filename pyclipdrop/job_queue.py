@@ -0,0 +1,378 @@
+import os
+import json
+import time
+import socket
+import logging
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
+
+from pyclipdrop.exceptions import (
+    APIRequestError,
+    FileExtensionError,
+    FileOrURLError,
+    FilePathError,
+    ValueNotSupportedError,
+    ValueOutOfRangeError,
+    ValueTooLongError
+)
+
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+# The outcome of a job whose lease was lost before its worker finished, which is left to the worker that claimed it next
+LOST = 'lost'
+
+# Errors in the arguments of a job, which fail again however many times the job is retried
+PERMANENT_ERRORS = (
+    ValueTooLongError,
+    ValueOutOfRangeError,
+    ValueNotSupportedError,
+    FileExtensionError,
+    FileOrURLError,
+    FilePathError,
+    TypeError
+)
+
+
+def is_retryable(exception: Exception) -> bool:
+    """
+    Decide whether a job that failed with an exception may succeed if it is retried.
+
+    Validation errors and client errors returned by the API are permanent. Server errors, rate limiting, connection errors and unknown errors are retryable.
+    """
+    if isinstance(exception, PERMANENT_ERRORS):
+        return False
+
+    if isinstance(exception, APIRequestError) and exception.status_code is not None:
+        return exception.status_code >= 500 or exception.status_code in (408, 429)
+
+    return True
+
+
+class Job:
+    """
+    A job recorded in a `JobQueue`.
+
+    Attributes:
+        id (int): The identifier of the job.
+        operation (Text): The name of the operation, e.g. 'remove_background'.
+        arguments (Dict): The keyword arguments of the operation.
+        status (Text): One of 'pending', 'leased', 'done' and 'failed'.
+        attempts (int): The number of times the job has been claimed.
+        output_file (Text): The output file of the job, once it is done.
+        error (Text): The error of the last failed attempt, if any.
+    """
+
+    def __init__(self, id: int, operation: Text, arguments: Dict, status: Text, attempts: int, output_file: Optional[Text], error: Optional[Text]) -> None:
+        self.id = id
+        self.operation = operation
+        self.arguments = arguments
+        self.status = status
+        self.attempts = attempts
+        self.output_file = output_file
+        self.error = error
+
+    def __repr__(self) -> Text:
+        return f'Job(id={self.id}, operation={self.operation!r}, status={self.status!r}, attempts={self.attempts})'
+
+
+class JobQueue:
+    """
+    A durable queue of operations stored in a SQLite database.
+
+    Workers claim jobs with a lease, so several processes, on one host or on hosts sharing the database file, can drain the same queue without submitting a job twice. A job whose worker crashed is claimed again once its lease expires.
+
+    Args:
+        path (Text): The path to the database file. It is created if it does not exist.
+        lease_duration (float): The time in seconds a claimed job is reserved for its worker. The default value is 600.
+        max_attempts (int): The maximum number of attempts of a job before it is marked as failed. The default value is 5.
+        retry_delay (float): The time in seconds before a job that failed with a retryable error can be claimed again. The default value is 30.
+    """
+
+    def __init__(self, path: Text, lease_duration: float = 600, max_attempts: int = 5, retry_delay: float = 30) -> None:
+        self.path = path
+        self.lease_duration = lease_duration
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._local = threading.local()
+
+        with self._transaction() as connection:
+            connection.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    operation TEXT NOT NULL,
+                    arguments TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    available_at REAL NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires_at REAL,
+                    output_file TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL
+                )
+                '''
+            )
+            connection.execute('CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)')
+
+    def add(self, operation: Text, arguments: Dict) -> int:
+        """
+        Add a job to the queue.
+
+        Returns:
+            int: The identifier of the job.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'INSERT INTO jobs (operation, arguments, updated_at) VALUES (?, ?, ?)',
+                (operation, json.dumps(arguments), time.time())
+            )
+            return cursor.lastrowid
+
+    def add_many(self, jobs: Iterable[Tuple[Text, Dict]], chunk_size: int = 1000) -> int:
+        """
+        Add (operation, arguments) pairs to the queue, committing them in chunks.
+
+        Returns:
+            int: The number of jobs added.
+        """
+        count = 0
+        rows = []
+        for operation, arguments in jobs:
+            rows.append((operation, json.dumps(arguments), time.time()))
+            if len(rows) >= chunk_size:
+                count += self._insert(rows)
+                rows = []
+
+        return count + self._insert(rows)
+
+    def claim(self, limit: int = 1, worker_id: Optional[Text] = None) -> List[Job]:
+        """
+        Claim pending jobs, and jobs whose lease has expired, for a worker. Jobs whose lease expired on their last attempt, e.g. because their worker crashed, are marked as failed instead.
+
+        Args:
+            limit (int): The maximum number of jobs to claim. The default value is 1.
+            worker_id (Text): The identifier of the worker. The default value identifies the host and the process.
+
+        Returns:
+            List: The claimed jobs, which may be fewer than `limit`.
+        """
+        worker_id = worker_id or self._get_thread_worker_id()
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL, updated_at = ? WHERE status = ? AND lease_expires_at <= ? AND attempts >= ?',
+                (FAILED, 'The lease of the last attempt expired before the job was completed', now, LEASED, now, self.max_attempts)
+            )
+
+            rows = connection.execute(
+                '''
+                SELECT id, operation, arguments, status, attempts, output_file, error FROM jobs
+                WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?)
+                ORDER BY id LIMIT ?
+                ''',
+                (PENDING, now, LEASED, now, limit)
+            ).fetchall()
+
+            connection.executemany(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, lease_owner = ?, lease_expires_at = ?, updated_at = ? WHERE id = ?',
+                [(LEASED, worker_id, now + self.lease_duration, now, row[0]) for row in rows]
+            )
+
+        return [Job(id, operation, json.loads(arguments), LEASED, attempts + 1, output_file, error) for id, operation, arguments, _, attempts, output_file, error in rows]
+
+    def renew(self, job: Job, worker_id: Optional[Text] = None) -> bool:
+        """
+        Extend the lease of a claimed job.
+
+        Returns:
+            bool: Whether the worker still held the lease.
+        """
+        return self._update_leased(job, worker_id, 'lease_expires_at = ?', (time.time() + self.lease_duration,))
+
+    def complete(self, job: Job, output_file: Optional[Text] = None, worker_id: Optional[Text] = None) -> bool:
+        """
+        Mark a claimed job as done.
+
+        Returns:
+            bool: Whether the worker still held the lease. If it did not, the job was claimed by another worker and is left to it.
+        """
+        return self._update_leased(job, worker_id, 'status = ?, output_file = ?, error = NULL, lease_owner = NULL, lease_expires_at = NULL', (DONE, output_file))
+
+    def fail(self, job: Job, exception: Exception, worker_id: Optional[Text] = None) -> bool:
+        """
+        Record a failed attempt of a claimed job. The job is made available again if the error is retryable and attempts remain, and marked as failed otherwise.
+
+        Returns:
+            bool: Whether the worker still held the lease.
+        """
+        error = f'{type(exception).__name__}: {exception}'
+        if is_retryable(exception) and job.attempts < self.max_attempts:
+            return self._update_leased(job, worker_id, 'status = ?, error = ?, available_at = ?, lease_owner = NULL, lease_expires_at = NULL', (PENDING, error, time.time() + self.retry_delay))
+
+        return self._update_leased(job, worker_id, 'status = ?, error = ?, lease_owner = NULL, lease_expires_at = NULL', (FAILED, error))
+
+    def get(self, job_id: int) -> Optional[Job]:
+        row = self._connect().execute(
+            'SELECT id, operation, arguments, status, attempts, output_file, error FROM jobs WHERE id = ?', (job_id,)
+        ).fetchone()
+
+        return Job(row[0], row[1], json.loads(row[2]), *row[3:]) if row else None
+
+    def counts(self) -> Dict[Text, int]:
+        """
+        Get the number of jobs in every status.
+        """
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        counts.update(self._connect().execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+        return counts
+
+    def work(self, client: Any, max_workers: int = 1, wait: bool = False, poll_interval: float = 1.0) -> Dict[Text, int]:
+        """
+        Run jobs with the endpoint methods of a client until the queue is drained. The lease of a job is renewed while its call runs, so calls may take longer than the lease duration.
+
+        Args:
+            client (ClipdropClient): The client to run the jobs with. It is shared by all workers of this process.
+            max_workers (int): The number of jobs run concurrently by this process. The default value is 1.
+            wait (bool): Whether to keep polling for jobs held by other workers or waiting for a retry, instead of returning once no job can be claimed. The default value is False.
+            poll_interval (float): The time in seconds between polls for jobs. The default value is 1.
+
+        Returns:
+            Dict: The number of jobs completed and failed by this process, and of jobs it lost to another worker because their lease expired, which are logged as warnings.
+        """
+        results = {DONE: 0, FAILED: 0, LOST: 0}
+        lock = threading.Lock()
+
+        def worker() -> None:
+            try:
+                while True:
+                    jobs = self.claim()
+                    if not jobs:
+                        if wait and self._has_unfinished_jobs():
+                            time.sleep(poll_interval)
+                            continue
+                        return
+
+                    job = jobs[0]
+                    try:
+                        with _LeaseHeartbeat(self, job, self._get_thread_worker_id()):
+                            getattr(client, job.operation)(**job.arguments)
+                    except Exception as e:
+                        outcome = FAILED if self.fail(job, e) else LOST
+                    else:
+                        outcome = DONE if self.complete(job, output_file=job.arguments.get('output_file')) else LOST
+
+                    if outcome == LOST:
+                        logger.warning('The lease of job %d expired before it was finished, and the job was claimed by another worker.', job.id)
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                # Close the connection this thread opened, since the threads of the executor end with the call
+                self.close()
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='pyclipdrop-queue') as executor:
+            for future in [executor.submit(worker) for _ in range(max_workers)]:
+                future.result()
+
+        return results
+
+    def close(self) -> None:
+        """
+        Close the database connection of the calling thread.
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _has_unfinished_jobs(self) -> bool:
+        counts = self.counts()
+        return counts[PENDING] + counts[LEASED] > 0
+
+    def _insert(self, rows: List[Tuple]) -> int:
+        if not rows:
+            return 0
+
+        with self._transaction() as connection:
+            connection.executemany('INSERT INTO jobs (operation, arguments, updated_at) VALUES (?, ?, ?)', rows)
+
+        return len(rows)
+
+    def _update_leased(self, job: Job, worker_id: Optional[Text], assignments: Text, values: Tuple) -> bool:
+        # Only the current holder of the lease may update a job, so a worker whose lease expired cannot overwrite the outcome of the next one
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f'UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+                (*values, time.time(), job.id, LEASED, worker_id or self._get_thread_worker_id())
+            )
+            return cursor.rowcount == 1
+
+    def _get_thread_worker_id(self) -> Text:
+        return f'{self.worker_id}:{threading.get_ident()}'
+
+    def _connect(self) -> sqlite3.Connection:
+        # SQLite connections cannot be shared between threads, so every thread opens its own
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            self._local.connection = connection
+
+        return connection
+
+    def _transaction(self) -> '_Transaction':
+        return _Transaction(self._connect())
+
+
+class _Transaction:
+    """
+    An immediate transaction, which takes the write lock of the database up front so that concurrent claims cannot select the same jobs.
+    """
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exception_type, *args) -> None:
+        self.connection.execute('COMMIT' if exception_type is None else 'ROLLBACK')
+
+
+class _LeaseHeartbeat:
+    """
+    Renews the lease of a job from a background thread while its worker runs it, every third of the lease duration, so that the job is not claimed by another worker as long as its worker is alive.
+    """
+
+    def __init__(self, queue: JobQueue, job: Job, worker_id: Text) -> None:
+        self.queue = queue
+        self.job = job
+        self.worker_id = worker_id
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pyclipdrop-queue-heartbeat', daemon=True)
+
+    def __enter__(self) -> '_LeaseHeartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.queue.lease_duration / 3):
+                # Stop once the lease is lost, since the job then belongs to another worker
+                if not self.queue.renew(self.job, worker_id=self.worker_id):
+                    return
+        finally:
+            self.queue.close()
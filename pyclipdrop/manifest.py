@@ -0,0 +1,208 @@
+import os
+import inspect
+from urllib.parse import urlparse
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Text
+
+from pyclipdrop.batch import SUPPORTED_OPERATIONS
+from pyclipdrop.endpoints import ENDPOINTS, FROM_RESPONSE, SAME_AS_INPUT, Endpoint
+from pyclipdrop.masks import Mask
+from pyclipdrop.utilities import JPG_WEBP, is_extension_supported, is_in_memory_image
+from pyclipdrop.exceptions import FileExtensionError, FileOrURLError, FilePathError, ValueNotSupportedError, ValueOutOfRangeError, ValueTooLongError
+
+
+def _get_file_extensions(endpoint: Endpoint) -> Dict[Text, Optional[FrozenSet[Text]]]:
+    extensions = {}
+    if endpoint.input_field is not None:
+        extensions['input_file'] = endpoint.input_extensions
+    if endpoint.mask_extensions is not None:
+        extensions['mask_file'] = endpoint.mask_extensions
+
+    # The output extension of an endpoint following its input is checked against the input, and the one of an endpoint following its response can be any it returns
+    if endpoint.output_extensions == SAME_AS_INPUT:
+        extensions['output_file'] = None
+    elif endpoint.output_extensions == FROM_RESPONSE:
+        extensions['output_file'] = JPG_WEBP
+    else:
+        extensions['output_file'] = endpoint.output_extensions
+
+    return extensions
+
+
+# The supported extensions of the file arguments of every operation, derived from the endpoint registry
+FILE_EXTENSIONS: Dict[Text, Dict[Text, Optional[FrozenSet[Text]]]] = {name: _get_file_extensions(endpoint) for name, endpoint in ENDPOINTS.items()}
+
+
+class ManifestError:
+    """
+    An invalid argument of an item of a manifest.
+
+    Attributes:
+        index (int): The position of the item in the manifest.
+        argument (Text): The name of the invalid argument, or None if the argument set itself is invalid.
+        exception (Exception): The error the operation would raise for the argument.
+    """
+
+    def __init__(self, index: int, argument: Optional[Text], exception: Exception) -> None:
+        self.index = index
+        self.argument = argument
+        self.exception = exception
+
+    def __repr__(self) -> Text:
+        return f'ManifestError(index={self.index}, argument={self.argument!r}, exception={self.exception!r})'
+
+
+class ManifestValidator:
+    """
+    A validator of the argument sets of many calls to an operation, which reports every invalid argument instead of raising on the first one.
+
+    Input files are checked against a listing of their directory, which is read once per directory, and the directories of output files are checked once each.
+
+    Args:
+        operation (Text): The name of the operation, e.g. 'remove_background'.
+
+    Raises:
+        ValueNotSupportedError: If the operation is not supported.
+    """
+
+    def __init__(self, operation: Text) -> None:
+        if operation not in SUPPORTED_OPERATIONS:
+            raise ValueNotSupportedError(f"The operation must be one of: {', '.join(sorted(SUPPORTED_OPERATIONS))}.")
+
+        # The client is imported here, so that the validator does not depend on the HTTP libraries until it is used
+        from pyclipdrop.client import ClipdropClient
+
+        self.operation = operation
+        self.extensions = FILE_EXTENSIONS[operation]
+        self.parameters = ENDPOINTS[operation].parameters
+        self.signature = inspect.signature(getattr(ClipdropClient, operation))
+        self._listings: Dict[Text, Optional[Set[Text]]] = {}
+        self._directories: Dict[Text, bool] = {}
+
+    def validate(self, inputs: Iterable[Any]) -> List[ManifestError]:
+        """
+        Validate the argument sets of a manifest in one pass.
+
+        Args:
+            inputs (Iterable): The argument sets, as passed to `ClipdropClient.batch`.
+
+        Returns:
+            List: The `ManifestError` objects of every invalid argument, in the order of the items.
+        """
+        errors = []
+        for index, arguments in enumerate(inputs):
+            errors.extend(self.validate_item(index, arguments))
+
+        return errors
+
+    def validate_item(self, index: int, arguments: Any) -> List[ManifestError]:
+        try:
+            if isinstance(arguments, dict):
+                bound = self.signature.bind(None, **arguments)
+            elif isinstance(arguments, (tuple, list)):
+                bound = self.signature.bind(None, *arguments)
+            else:
+                bound = self.signature.bind(None, arguments)
+        except TypeError as e:
+            return [ManifestError(index, None, e)]
+
+        bound.apply_defaults()
+        values = bound.arguments
+        errors = []
+        input_extension = None
+        for parameter in self.parameters:
+            try:
+                parameter.validate(values[parameter.name])
+            except (ValueNotSupportedError, ValueTooLongError, ValueOutOfRangeError, TypeError) as e:
+                errors.append(ManifestError(index, parameter.name, e))
+
+        for argument in ('input_file', 'mask_file'):
+            if argument in self.extensions:
+                try:
+                    extension = self._validate_input(values[argument], self.extensions[argument])
+                except (FileExtensionError, FileOrURLError) as e:
+                    errors.append(ManifestError(index, argument, e))
+                else:
+                    if argument == 'input_file':
+                        input_extension = extension
+
+        output_file = values.get('output_file')
+        if output_file is not None and not values.get('return_bytes'):
+            # The output extension of an operation following its input cannot be checked without a valid input
+            supported_extensions = self.extensions['output_file'] or (frozenset([input_extension]) if input_extension else None)
+            try:
+                self._validate_output(output_file, supported_extensions)
+            except (FileExtensionError, FilePathError) as e:
+                errors.append(ManifestError(index, 'output_file', e))
+
+        return errors
+
+    def _validate_input(self, input_file: Any, supported_extensions: FrozenSet[Text]) -> Optional[Text]:
+        # In-memory inputs and masks drawn from shapes are validated by their content when the operation is called
+        if is_in_memory_image(input_file) or isinstance(input_file, Mask):
+            return None
+
+        if not isinstance(input_file, (str, os.PathLike)):
+            raise FileOrURLError("Input file must be a valid file path, URL or in-memory image.")
+
+        path = os.fspath(input_file)
+        url = urlparse(path)
+        if url.scheme and url.netloc:
+            extension = os.path.splitext(url.path)[1]
+        elif self._file_exists(path):
+            extension = os.path.splitext(path)[1]
+        else:
+            raise FileOrURLError("Input file must be a valid file path, URL or in-memory image.")
+
+        if not is_extension_supported(extension, supported_extensions):
+            raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(sorted(supported_extensions))}")
+
+        return extension
+
+    def _validate_output(self, output_file: Any, supported_extensions: Optional[FrozenSet[Text]]) -> None:
+        # File-like outputs are validated when the operation is called
+        if hasattr(output_file, 'write'):
+            return
+
+        path = os.fspath(output_file)
+        if not self._directory_exists(os.path.dirname(path)):
+            raise FilePathError("The path to the output file does not exist.")
+
+        extension = os.path.splitext(path)[1]
+        if supported_extensions is not None and not is_extension_supported(extension, supported_extensions):
+            raise FileExtensionError(f"The input file should be one of the supported extensions: {', '.join(sorted(supported_extensions))}")
+
+    def _file_exists(self, path: Text) -> bool:
+        directory, name = os.path.split(path)
+        if directory not in self._listings:
+            try:
+                with os.scandir(directory or '.') as entries:
+                    self._listings[directory] = {entry.name for entry in entries}
+            except OSError:
+                self._listings[directory] = None
+
+        listing = self._listings[directory]
+        return listing is not None and name in listing
+
+    def _directory_exists(self, directory: Text) -> bool:
+        exists = self._directories.get(directory)
+        if exists is None:
+            exists = self._directories[directory] = os.path.isdir(directory or '.')
+
+        return exists
+
+
+def validate_manifest(operation: Text, inputs: Iterable[Any]) -> List[ManifestError]:
+    """
+    Validate the argument sets of many calls to an operation in one pass, reporting every invalid argument at once.
+
+    Args:
+        operation (Text): The name of the operation, e.g. 'remove_background'.
+        inputs (Iterable): The argument sets, as passed to `ClipdropClient.batch`.
+
+    Returns:
+        List: The `ManifestError` objects of every invalid argument, which is empty if the manifest is valid.
+
+    Raises:
+        ValueNotSupportedError: If the operation is not supported.
+    """
+    return ManifestValidator(operation).validate(inputs)
@@ -0,0 +1,301 @@
+import os
+import math
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Iterable, List, Optional, Sequence, Text, Tuple
+
+from pyclipdrop.cache import CacheStats
+from pyclipdrop.exceptions import FileOpenError, ImageSizeError
+from pyclipdrop.utilities import encode_grayscale_png
+
+
+# A (left, top, right, bottom) rectangle in pixels, whose right and bottom edges are excluded
+Box = Tuple[float, float, float, float]
+
+# The (x, y) vertices of a polygon in pixels
+Polygon = Sequence[Tuple[float, float]]
+
+
+class Mask:
+    """
+    A mask for `cleanup` and `text_inpainting` drawn from boxes and polygons, which is rasterized and encoded as PNG on the client.
+
+    The shapes are white, i.e. the area to clean up or inpaint, on a black background. Polygons are filled with the even-odd rule, and a pixel is covered if its center is.
+
+    Args:
+        boxes (Iterable): The (left, top, right, bottom) rectangles in pixels. The default value is no boxes.
+        polygons (Iterable): The polygons, each one a sequence of (x, y) vertices in pixels. The default value is no polygons.
+        size (Tuple): The (width, height) of the mask in pixels. The default value is None, which uses the size of the input image, read from its header.
+    """
+
+    def __init__(self, boxes: Iterable[Box] = (), polygons: Iterable[Polygon] = (), size: Optional[Tuple[int, int]] = None) -> None:
+        self.boxes = tuple(tuple(box) for box in boxes)
+        self.polygons = tuple(tuple((x, y) for x, y in polygon) for polygon in polygons)
+        self.size = tuple(size) if size is not None else None
+
+        for box in self.boxes:
+            if len(box) != 4:
+                raise ValueError(f"A box must be a (left, top, right, bottom) tuple, got {box!r}.")
+        for polygon in self.polygons:
+            if len(polygon) < 3:
+                raise ValueError("A polygon must have at least 3 vertices.")
+
+    def get_key(self, size: Tuple[int, int]) -> Hashable:
+        return ('shapes', self.boxes, self.polygons, tuple(size))
+
+    def rasterize(self, size: Tuple[int, int]) -> bytes:
+        """
+        Draw the mask as the scanlines of an 8-bit grayscale PNG image.
+
+        Polygons are filled with NumPy array operations if NumPy is installed. Otherwise, and for masks of boxes only, rows covering the same spans are built once and repeated, so the cost grows with the number of distinct rows rather than with the number of pixels.
+
+        Returns:
+            bytes: The rows of the mask from top to bottom, each one prefixed with the filter type byte 0.
+        """
+        numpy = _import_numpy() if self.polygons else None
+        if numpy is not None:
+            return self._rasterize_array(numpy, size)
+
+        width, height = size
+        white = b'\xff' * width
+        edges = [_get_edges(polygon) for polygon in self.polygons]
+        rows: List[bytes] = []
+        previous_spans = previous_row = None
+        for y in range(height):
+            spans = self._get_spans(y + 0.5, width, edges)
+            if spans != previous_spans:
+                row = bytearray(width + 1)
+                for start, end in spans:
+                    row[start + 1:end + 1] = white[:end - start]
+                previous_spans, previous_row = spans, bytes(row)
+            rows.append(previous_row)
+
+        return b''.join(rows)
+
+    def encode(self, size: Tuple[int, int]) -> bytes:
+        """
+        Rasterize the mask and encode it as PNG.
+        """
+        return encode_grayscale_png(self.rasterize(size), size[0], size[1])
+
+    def _rasterize_array(self, numpy: Any, size: Tuple[int, int]) -> bytes:
+        width, height = size
+        # Every row is prefixed with the filter type byte 0, which the shapes never cover
+        scanlines = numpy.zeros((height, width + 1), dtype=numpy.uint8)
+        for left, top, right, bottom in self.boxes:
+            top, bottom = _clip(_to_pixel(top), _to_pixel(bottom), height)
+            left, right = _clip(_to_pixel(left), _to_pixel(right), width)
+            if top < bottom and left < right:
+                scanlines[top:bottom, left + 1:right + 1] = 255
+
+        for polygon in self.polygons:
+            edges = _get_edges(polygon)
+            if not edges:
+                continue
+            x0, y0, y1, slope = numpy.array(edges, dtype=numpy.float64).T
+
+            # Only the rows between the top and the bottom of the polygon are crossed by its edges
+            first, last = _clip(_to_pixel(y0.min()), _to_pixel(y1.max()), height)
+            if first >= last:
+                continue
+            centers = numpy.arange(first, last, dtype=numpy.float64)[:, None] + 0.5
+
+            # The crossings of every row with every edge, sorted along the row with the edges that do not cross it last
+            crossings = numpy.where((y0 <= centers) & (centers < y1), x0 + (centers - y0) * slope, numpy.inf)
+            crossings.sort(axis=1)
+            pairs = len(edges) // 2
+            starts, ends = crossings[:, 0:2 * pairs:2], crossings[:, 1:2 * pairs:2]
+
+            # A pair is a span of the row if both of its crossings are, i.e. if its end is
+            rows, columns = numpy.nonzero(numpy.isfinite(ends))
+            starts = numpy.clip(numpy.ceil(starts[rows, columns] - 0.5), 0, width).astype(numpy.intp)
+            ends = numpy.clip(numpy.ceil(ends[rows, columns] - 0.5), 0, width).astype(numpy.intp)
+            covered = starts < ends
+
+            # Every span is a single slice of its row, so filling them costs one assignment per span rather than one per pixel
+            for row, start, end in zip((rows[covered] + first).tolist(), (starts[covered] + 1).tolist(), (ends[covered] + 1).tolist()):
+                scanlines[row, start:end] = 255
+
+        return scanlines.tobytes()
+
+    def _get_spans(self, center: float, width: int, edges: List[List[Tuple[float, float, float, float]]]) -> List[Tuple[int, int]]:
+        spans = []
+        for left, top, right, bottom in self.boxes:
+            if top <= center < bottom:
+                spans.append(_clip(_to_pixel(left), _to_pixel(right), width))
+
+        for polygon_edges in edges:
+            crossings = sorted(x0 + (center - y0) * slope for x0, y0, y1, slope in polygon_edges if y0 <= center < y1)
+            for start, end in zip(crossings[::2], crossings[1::2]):
+                spans.append(_clip(_to_pixel(start), _to_pixel(end), width))
+
+        return sorted(span for span in spans if span[0] < span[1])
+
+    def __repr__(self) -> Text:
+        return f'Mask(boxes={len(self.boxes)}, polygons={len(self.polygons)}, size={self.size})'
+
+
+class MaskCache:
+    """
+    A least recently used cache of encoded masks, so that masks shared by many calls, such as a fixed watermark position, are read or encoded once.
+
+    Masks are keyed by their shapes and size, by the digest of the content of arrays, or by the path, modification time and size of files, so an edited file is read again.
+
+    Args:
+        max_bytes (int): The maximum total size of the cached masks. The default value is 64 MB.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = CacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, value: Any, size: Optional[Tuple[int, int]] = None) -> Any:
+        """
+        Get the encoded PNG of a mask, from the cache if it was encoded or read before.
+
+        Args:
+            value (Any): The mask: a `Mask`, a NumPy array of booleans or 8-bit values with one value per pixel, or a file path. Other values, such as URLs and encoded images, are returned unchanged.
+            size (Tuple): The (width, height) of the input image, which `Mask` objects without a size are drawn at.
+
+        Returns:
+            Any: The encoded mask, or the value if it is not one of the above.
+
+        Raises:
+            ImageSizeError: If a `Mask` has no size and the size of the input image is not known.
+        """
+        if isinstance(value, Mask):
+            size = value.size or size
+            if size is None:
+                raise ImageSizeError("The size of the mask is not known, since the size of the input image could not be read from its header. Pass the size to the Mask.")
+            return self._get_or_encode(value.get_key(size), lambda: value.encode(size))
+
+        if type(value).__module__ == 'numpy' and hasattr(value, '__array_interface__'):
+            return self._get_or_encode(_get_array_key(value), lambda: encode_array(value))
+
+        if isinstance(value, (str, os.PathLike)):
+            key = _get_file_key(value)
+            if key is not None:
+                return self._get_or_encode(key, lambda: _read_file(value))
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _get_or_encode(self, key: Hashable, encode) -> bytes:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return data
+            self.stats.misses += 1
+
+        # Masks are encoded outside of the lock, so a mask encoded by two threads at once is simply stored twice
+        data = encode()
+        if len(data) > self.max_bytes:
+            return data
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = data
+            self.size += len(data)
+            self.stats.stores += 1
+
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+                self.stats.evictions += 1
+
+        return data
+
+
+def encode_array(array: Any) -> bytes:
+    """
+    Encode a mask given as a NumPy array as an 8-bit grayscale PNG, without Pillow.
+
+    Arrays of 8-bit unsigned integers are encoded as they are, while other arrays, such as booleans, are white wherever they are not zero.
+
+    Args:
+        array (numpy.ndarray): The (height, width) array of the mask, or a (height, width, 1) array.
+
+    Returns:
+        bytes: The encoded mask.
+    """
+    # NumPy is only imported for arrays, which cannot be passed without it
+    import numpy
+
+    if array.ndim == 3 and array.shape[2] == 1:
+        array = array[:, :, 0]
+    if array.ndim != 2:
+        raise ValueError(f"A mask array must have a single channel, got an array of shape {array.shape}.")
+    if array.dtype != numpy.uint8:
+        array = (array != 0).astype(numpy.uint8) * 255
+
+    # Every row is prefixed with the filter type byte 0 in a single copy of the array
+    height, width = array.shape
+    scanlines = numpy.zeros((height, width + 1), dtype=numpy.uint8)
+    scanlines[:, 1:] = array
+    return encode_grayscale_png(scanlines.tobytes(), width, height)
+
+
+def _get_edges(polygon: Polygon) -> List[Tuple[float, float, float, float]]:
+    # Every non-horizontal edge as (x at its top, its top, its bottom, the change of x per row)
+    edges = []
+    for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+        if y0 == y1:
+            continue
+        if y0 > y1:
+            x0, y0, x1, y1 = x1, y1, x0, y0
+        edges.append((x0, y0, y1, (x1 - x0) / (y1 - y0)))
+
+    return edges
+
+
+def _import_numpy() -> Any:
+    # NumPy is optional and imported on first use, so that importing the client does not pay for it
+    try:
+        import numpy
+    except ImportError:
+        return None
+
+    return numpy
+
+
+def _to_pixel(x: float) -> int:
+    # The first pixel whose center is at or after x
+    return math.ceil(x - 0.5)
+
+
+def _clip(start: int, end: int, width: int) -> Tuple[int, int]:
+    return max(start, 0), min(end, width)
+
+
+def _get_array_key(array: Any) -> Hashable:
+    digest = hashlib.sha256(memoryview(array.tobytes()) if not array.flags['C_CONTIGUOUS'] else memoryview(array).cast('B'))
+    return ('array', array.shape, str(array.dtype), digest.hexdigest())
+
+
+def _get_file_key(path: Any) -> Optional[Hashable]:
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+    return ('file', os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def _read_file(path: Any) -> bytes:
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except (PermissionError, OSError) as e:
+        raise FileOpenError("Error opening file: " + str(e)) from e
@@ -0,0 +1,124 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple, Union
+
+from pyclipdrop.batch import BatchRun, SUPPORTED_OPERATIONS
+from pyclipdrop.io_file_handlers import OutputFileHandler
+from pyclipdrop.timeouts import check_deadline, within_deadline
+from pyclipdrop.utilities import get_extension_from_content
+from pyclipdrop.exceptions import ValueNotSupportedError
+
+
+# The arguments the pipeline passes to every step itself
+RESERVED_ARGUMENTS = frozenset(['input_file', 'output_file', 'return_bytes'])
+
+OUTPUT_EXTENSIONS = ('.png', '.jpg', '.webp')
+
+
+class Pipeline:
+    """
+    A chain of operations, where the result of each operation is passed in memory as the input of the next one.
+
+    The format of every intermediate result is detected from its content, so the extension chosen by an operation, e.g. WEBP or JPG by `image_upscaling`, propagates to the following operations and to the output file.
+
+    Args:
+        client (ClipdropClient): The client to run the operations with.
+        steps (List): The (operation, arguments) pairs of the pipeline. Steps are usually added with `then`.
+    """
+
+    def __init__(self, client: Any, steps: Optional[List[Tuple[Text, Dict]]] = None) -> None:
+        self.client = client
+        self.steps = list(steps or [])
+
+    def then(self, operation: Text, **arguments) -> 'Pipeline':
+        """
+        Add an operation to the end of the pipeline.
+
+        Args:
+            operation (Text): The name of the operation, e.g. 'image_upscaling'.
+            **arguments: The arguments of the operation, except for the input file, the output file and `return_bytes`, which are set by the pipeline.
+
+        Returns:
+            Pipeline: A new pipeline with the operation added.
+
+        Raises:
+            ValueNotSupportedError: If the operation is not supported, or if 'text_to_image' is not the first operation.
+            ValueError: If an argument set by the pipeline is passed.
+        """
+        if operation not in SUPPORTED_OPERATIONS:
+            raise ValueNotSupportedError(f"The operation must be one of: {', '.join(sorted(SUPPORTED_OPERATIONS))}.")
+
+        # Text to image takes no input image, so it can only start a pipeline
+        if operation == 'text_to_image' and self.steps:
+            raise ValueNotSupportedError("The text_to_image operation can only be the first operation of a pipeline.")
+
+        reserved = RESERVED_ARGUMENTS.intersection(arguments)
+        if reserved:
+            raise ValueError(f"The arguments {', '.join(sorted(reserved))} are set by the pipeline.")
+
+        return Pipeline(self.client, self.steps + [(operation, arguments)])
+
+    def run(self, input_file: Any = None, output_file: Any = None, deadline: Optional[float] = None) -> Union[bytes, Text, Any]:
+        """
+        Run the operations of the pipeline on an input.
+
+        Args:
+            input_file (Text): The input of the first operation: a file path, a URL or an in-memory image. It is omitted if the pipeline starts with 'text_to_image'.
+            output_file (Text): The output file of the last operation. If the path has no extension, the extension of the result is appended to it. It can also be a binary file-like object. The default value is None, in which case the result is returned as bytes.
+            deadline (float): The time in seconds all operations may take together. Every operation is run within the time left. The default value is None, which only applies the deadline of the client.
+
+        Returns:
+            bytes: The result, if `output_file` is not set. Otherwise, the output file the result was written to.
+
+        Raises:
+            ValueError: If the pipeline has no operations.
+            DeadlineExceededError: If the operations do not complete within the deadline.
+        """
+        if not self.steps:
+            raise ValueError("The pipeline has no operations.")
+
+        with within_deadline(deadline):
+            data = input_file
+            for operation, arguments in self.steps:
+                function = getattr(self.client, operation)
+                if operation == 'text_to_image':
+                    data = function(**arguments, return_bytes=True)
+                else:
+                    data = function(data, **arguments, return_bytes=True)
+
+            if output_file is None:
+                return data
+
+            check_deadline('writing the output')
+            return self._write(data, output_file)
+
+    def map(self, inputs: Iterable, max_workers: int = 4, ordered: bool = True, max_pending: Optional[int] = None, deadline: Optional[float] = None) -> BatchRun:
+        """
+        Run the pipeline concurrently over many inputs. Every item goes through all operations in one worker, so the later operations of an item overlap the earlier operations of the next ones.
+
+        Args:
+            inputs (Iterable): The inputs. A dictionary is passed as the keyword arguments of `run`, a tuple or list as its positional arguments and any other value as the input file.
+            max_workers (int): The maximum number of items processed concurrently. The default value is 4.
+            ordered (bool): Whether to yield results in the order of the inputs instead of the order of completion. The default value is True.
+            max_pending (int): The maximum number of items submitted but not yet yielded. The default value is twice `max_workers`.
+            deadline (float): The time in seconds all items may take together. Every item is run within the time left. The default value is None, which does not limit the items together.
+
+        Returns:
+            BatchRun: An iterator of `BatchResult` objects holding the result or the exception of each item.
+        """
+        return BatchRun(self.run, inputs, max_workers=max_workers, ordered=ordered, max_pending=max_pending, deadline=deadline)
+
+    def _write(self, data: bytes, output_file: Any) -> Union[Text, Any]:
+        extension = get_extension_from_content(data)
+
+        # Complete paths without an extension with the format of the result
+        if extension and not hasattr(output_file, 'write') and not Path(output_file).suffix:
+            output_file = f'{output_file}{extension}'
+
+        output_file_handler = OutputFileHandler(output_file, supported_extensions=[extension] if extension else list(OUTPUT_EXTENSIONS))
+        output_file_handler.validate()
+        output_file_handler.write(data)
+
+        return output_file
+
+    def __repr__(self) -> Text:
+        return f"Pipeline({' -> '.join(operation for operation, _ in self.steps)})"
@@ -0,0 +1,186 @@
+import io
+import math
+from typing import Dict, Optional, Text, Tuple
+
+# Pillow is imported by the first preprocessor, so that clients without one do not pay for it
+Image = ImageOps = None
+
+
+class ImageLimits:
+    """
+    The limits an endpoint places on its input images.
+
+    Args:
+        max_pixels (int): The maximum number of pixels of the image. The default value is None, which does not limit the number of pixels.
+        max_side (int): The maximum width and height of the image in pixels. The default value is None, which does not limit the width or height.
+        max_bytes (int): The maximum size of the encoded image in bytes. The default value is None, which does not limit the size.
+    """
+
+    def __init__(self, max_pixels: Optional[int] = None, max_side: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.max_pixels = max_pixels
+        self.max_side = max_side
+        self.max_bytes = max_bytes
+
+    def get_scale(self, size: Tuple[int, int]) -> float:
+        """
+        Get the factor by which an image of the given size has to be scaled down to fit the limits.
+        """
+        width, height = size
+        scale = 1.0
+        if self.max_pixels is not None and width * height > self.max_pixels:
+            scale = min(scale, math.sqrt(self.max_pixels / (width * height)))
+        if self.max_side is not None and max(width, height) > self.max_side:
+            scale = min(scale, self.max_side / max(width, height))
+
+        return scale
+
+    def __repr__(self) -> Text:
+        return f'ImageLimits(max_pixels={self.max_pixels}, max_side={self.max_side}, max_bytes={self.max_bytes})'
+
+
+MEGABYTE = 1024 * 1024
+
+DEFAULT_LIMITS = {
+    'replace_background': ImageLimits(max_pixels=10_000_000, max_bytes=20 * MEGABYTE),
+    'remove_background': ImageLimits(max_pixels=25_000_000, max_bytes=30 * MEGABYTE),
+    'remove_text': ImageLimits(max_pixels=16_000_000, max_bytes=30 * MEGABYTE),
+    'reimagine': ImageLimits(max_side=1024, max_bytes=20 * MEGABYTE),
+    'sketch_to_image': ImageLimits(max_side=1024, max_bytes=20 * MEGABYTE),
+    'uncrop': ImageLimits(max_pixels=10_000_000, max_bytes=30 * MEGABYTE),
+    'image_upscaling': ImageLimits(max_pixels=16_000_000, max_bytes=30 * MEGABYTE),
+    'cleanup': ImageLimits(max_pixels=16_000_000, max_bytes=30 * MEGABYTE),
+    'portrait_depth_estimation': ImageLimits(max_side=4096, max_bytes=20 * MEGABYTE),
+    'portrait_surface_normals': ImageLimits(max_side=4096, max_bytes=20 * MEGABYTE),
+    'text_inpainting': ImageLimits(max_pixels=10_000_000, max_bytes=20 * MEGABYTE)
+}
+
+FORMATS = {
+    '.png': 'PNG',
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.webp': 'WEBP'
+}
+
+
+class ImagePreprocessor:
+    """
+    Prepares input images on the client before they are uploaded, so that they fit the limits of each endpoint.
+
+    Images are rotated according to their EXIF orientation, scaled down with their aspect ratio preserved, and re-encoded in their original format to a size close to the target. Images that already fit the limits are uploaded unchanged. Masks are resized to match their prepared image.
+
+    Args:
+        target_bytes (int): The target size of the encoded images in bytes. The default value is None, which only applies the limits of the endpoints.
+        limits (Dict): The limits of each endpoint, overriding the default limits. Endpoints missing from the default and the given limits are not preprocessed.
+        quality (int): The initial quality used to re-encode JPEG and WEBP images. The default value is 90.
+        min_quality (int): The lowest quality used to reach the target size before scaling images down further. The default value is 60.
+
+    Raises:
+        ImportError: If Pillow is not installed.
+    """
+
+    def __init__(self, target_bytes: Optional[int] = None, limits: Optional[Dict[Text, ImageLimits]] = None, quality: int = 90, min_quality: int = 60) -> None:
+        _import_pillow()
+
+        self.target_bytes = target_bytes
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self.quality = quality
+        self.min_quality = min_quality
+
+    def prepare(self, operation: Text, data, extension: Text) -> bytes:
+        """
+        Prepare an input image for an endpoint.
+
+        Args:
+            operation (Text): The name of the endpoint, e.g. 'remove_background'.
+            data (bytes): The encoded image. Input streams are read into memory.
+            extension (Text): The extension of the image, which determines the format it is re-encoded in.
+
+        Returns:
+            bytes: The prepared image, or the original image if it already fits the limits.
+        """
+        limits = self.limits.get(operation)
+        if limits is None:
+            return data
+
+        data = self._read(data)
+        max_bytes = min([size for size in [limits.max_bytes, self.target_bytes] if size is not None], default=None)
+
+        image = Image.open(io.BytesIO(data))
+        orientation = image.getexif().get(0x0112, 1)
+        scale = limits.get_scale(image.size)
+        if scale >= 1 and orientation == 1 and (max_bytes is None or len(data) <= max_bytes):
+            return data
+
+        image = ImageOps.exif_transpose(image)
+        if scale < 1:
+            image = self._resize(image, scale)
+
+        return self._encode(image, FORMATS.get(extension.lower(), image.format or 'PNG'), max_bytes)
+
+    def prepare_mask(self, mask_data, image_data: bytes) -> bytes:
+        """
+        Resize a mask to the size of its prepared image, if they differ.
+
+        Args:
+            mask_data (bytes): The encoded mask. Input streams are read into memory.
+            image_data (bytes): The prepared image.
+
+        Returns:
+            bytes: The mask, encoded as PNG if it was resized.
+        """
+        mask_data = self._read(mask_data)
+        mask = Image.open(io.BytesIO(mask_data))
+        size = Image.open(io.BytesIO(image_data)).size
+        if mask.size == size:
+            return mask_data
+
+        # Nearest neighbour sampling keeps the mask binary
+        buffer = io.BytesIO()
+        mask.resize(size, Image.NEAREST).save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def _encode(self, image, image_format: Text, max_bytes: Optional[int]) -> bytes:
+        quality = self.quality
+        while True:
+            buffer = io.BytesIO()
+            if image_format == 'JPEG':
+                image.convert('RGB').save(buffer, format=image_format, quality=quality, optimize=True)
+            elif image_format == 'WEBP':
+                image.convert('RGBA' if 'A' in image.getbands() else 'RGB').save(buffer, format=image_format, quality=quality)
+            else:
+                image.save(buffer, format=image_format, optimize=True)
+
+            data = buffer.getvalue()
+            if max_bytes is None or len(data) <= max_bytes or min(image.size) <= 1:
+                return data
+
+            # Lower the quality of lossy formats first, then scale the image down in proportion to the excess size
+            if image_format in ('JPEG', 'WEBP') and quality > self.min_quality:
+                quality = max(quality - 10, self.min_quality)
+            else:
+                image = self._resize(image, math.sqrt(max_bytes / len(data)) * 0.95)
+
+    @staticmethod
+    def _resize(image, scale: float):
+        width, height = image.size
+        return image.resize((max(round(width * scale), 1), max(round(height * scale), 1)), Image.LANCZOS)
+
+    @staticmethod
+    def _read(data) -> bytes:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            return bytes(data)
+
+        source, _ = data.open()
+        with source:
+            return source.read()
+
+
+def _import_pillow() -> None:
+    global Image, ImageOps
+    if Image is not None:
+        return
+
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        raise ImportError("Preprocessing images requires Pillow. Install it with 'pip install pyclipdrop[images]'.") from None
@@ -0,0 +1,213 @@
+import time
+import threading
+from typing import Mapping, Optional, Text
+
+from pyclipdrop.timeouts import Deadline, check_backoff, check_deadline, within_deadline
+from pyclipdrop.utilities import get_retry_after_from_headers
+
+_STAGE = 'waiting for the rate limiter'
+
+
+class RateLimiter:
+    """
+    A token bucket rate limiter and concurrency governor for requests to the Clipdrop API.
+
+    A single instance can be shared by any number of threads and clients, including the asynchronous client.
+    The limiter adapts to the responses of the API: `Retry-After` pauses all requests, the remaining quota headers spread the remaining requests over the quota window and a rate limited response halves the rate, which then recovers gradually.
+
+    Args:
+        requests_per_second (float): The maximum sustained rate of requests. The default value is None, which does not limit the rate.
+        max_in_flight (int): The maximum number of concurrent requests. The default value is None, which does not limit concurrency.
+        burst (int): The number of requests that can be sent at once after a period of inactivity. The default value is 1.
+        max_throttle_retries (int): The number of times a rate limited request is resubmitted before failing. The default value is 5.
+        remaining_header (Text): The response header holding the number of requests remaining in the quota window.
+        reset_header (Text): The response header holding the number of seconds until the quota window resets.
+    """
+
+    def __init__(
+        self,
+        requests_per_second: Optional[float] = None,
+        max_in_flight: Optional[int] = None,
+        burst: int = 1,
+        max_throttle_retries: int = 5,
+        remaining_header: Text = 'X-RateLimit-Remaining',
+        reset_header: Text = 'X-RateLimit-Reset'
+    ) -> None:
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError("The number of requests per second must be positive.")
+        if max_in_flight is not None and max_in_flight < 1:
+            raise ValueError("The maximum number of requests in flight must be at least 1.")
+
+        self.requests_per_second = requests_per_second
+        self.max_in_flight = max_in_flight
+        self.burst = max(burst, 1)
+        self.max_throttle_retries = max_throttle_retries
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+
+        self._rate = requests_per_second
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._slot_released = threading.Condition(self._lock)
+
+    @property
+    def rate(self) -> Optional[float]:
+        """
+        The current rate of requests per second, after adapting to the responses of the API.
+        """
+        return self._rate
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self, deadline: Optional[Deadline] = None) -> None:
+        """
+        Block until a request can be sent. Every call must be followed by a call to `release`.
+
+        Args:
+            deadline (Deadline): The deadline of the request. The default value is None, which uses the deadline of the current operation, if any.
+
+        Raises:
+            DeadlineExceededError: As soon as the wait would go past the deadline. No slot is held and no token is used when it is raised.
+        """
+        with within_deadline(deadline) as deadline:
+            if self.max_in_flight is not None:
+                with self._slot_released:
+                    while self._in_flight >= self.max_in_flight:
+                        check_deadline(_STAGE)
+                        self._slot_released.wait(deadline.remaining() if deadline is not None else None)
+                    self._in_flight += 1
+
+            try:
+                delay = self._reserve()
+                if delay > 0:
+                    self._check_delay(delay)
+                    time.sleep(delay)
+            except BaseException:
+                self.release()
+                raise
+
+    async def acquire_async(self, deadline: Optional[Deadline] = None) -> None:
+        """
+        Wait until a request can be sent without blocking the event loop. Every call must be followed by a call to `release`.
+
+        Args:
+            deadline (Deadline): The deadline of the request. The default value is None, which uses the deadline of the current operation, if any.
+
+        Raises:
+            DeadlineExceededError: As soon as the wait would go past the deadline. No slot is held and no token is used when it is raised.
+        """
+        # asyncio is only imported by the asynchronous client, so that the synchronous client does not pay for it
+        import asyncio
+
+        with within_deadline(deadline):
+            if self.max_in_flight is not None:
+                # The slots are shared with threads, so they are polled instead of awaited on an asyncio primitive
+                while not self._try_acquire_slot():
+                    check_deadline(_STAGE)
+                    await asyncio.sleep(0.005)
+
+            try:
+                delay = self._reserve()
+                if delay > 0:
+                    self._check_delay(delay)
+                    await asyncio.sleep(delay)
+            except BaseException:
+                # Give the slot back if the task is cancelled while waiting
+                self.release()
+                raise
+
+    def release(self) -> None:
+        """
+        Mark a request started with `acquire` as finished.
+        """
+        if self.max_in_flight is not None:
+            with self._slot_released:
+                self._in_flight -= 1
+                self._slot_released.notify()
+
+    def update(self, status_code: int, headers: Mapping[Text, Text]) -> None:
+        """
+        Adapt the limiter to the response of a request.
+
+        Args:
+            status_code (int): The status code of the response.
+            headers (Mapping): The headers of the response.
+        """
+        now = time.monotonic()
+        retry_after = get_retry_after_from_headers(headers)
+        remaining = self._parse_float(headers.get(self.remaining_header))
+        reset = self._parse_float(headers.get(self.reset_header))
+
+        with self._lock:
+            if status_code == 429:
+                self._blocked_until = max(self._blocked_until, now + (retry_after if retry_after is not None else 1.0))
+                if self._rate is not None:
+                    self._rate = max(self._rate / 2, 0.1)
+                self._tokens = min(self._tokens, 0.0)
+                return
+
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+            if remaining is not None and reset is not None and reset > 0:
+                if remaining < 1:
+                    self._blocked_until = max(self._blocked_until, now + reset)
+                elif self.requests_per_second is None or remaining / reset < self.requests_per_second:
+                    # Spread the remaining quota evenly over the rest of the window
+                    self._rate = remaining / reset
+                    return
+
+            if self.requests_per_second is not None and self._rate < self.requests_per_second:
+                # Recover additively from earlier rate limiting
+                self._rate = min(self._rate + self.requests_per_second / 10, self.requests_per_second)
+            elif self.requests_per_second is None:
+                self._rate = None
+
+    def _try_acquire_slot(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self.max_in_flight:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _check_delay(self, delay: float) -> None:
+        try:
+            check_backoff(delay, _STAGE)
+        except BaseException:
+            # The request is not sent, so the token it took is given back to the callers that can wait
+            with self._lock:
+                if self._rate is not None:
+                    self._tokens = min(self._tokens + 1, float(self.burst))
+            raise
+
+    def _reserve(self) -> float:
+        """
+        Take a token from the bucket and return how long the caller has to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            delay = max(self._blocked_until - now, 0.0)
+            if self._rate is None:
+                return delay
+
+            self._tokens = min(self._tokens + (now - self._updated_at) * self._rate, float(self.burst))
+            self._updated_at = now
+            self._tokens -= 1
+
+            # A negative balance is a debt that is paid off by waiting, which keeps callers in first come, first served order
+            if self._tokens < 0:
+                delay = max(delay, -self._tokens / self._rate)
+
+            return delay
+
+    @staticmethod
+    def _parse_float(value: Optional[Text]) -> Optional[float]:
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
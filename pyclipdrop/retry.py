@@ -0,0 +1,112 @@
+import random
+from typing import Callable, Collection, Optional, Text, Tuple, Type
+
+
+class RequestAttempt:
+    """
+    The timing and outcome of a single attempt of a request to the Clipdrop API.
+
+    Attributes:
+        number (int): The number of the attempt, starting at 1.
+        duration (float): The time taken by the attempt in seconds.
+        status_code (int): The status code of the response, if one was received.
+        exception (Exception): The exception raised by the attempt, if no response was received.
+        backoff (float): The time waited after the attempt before retrying, in seconds.
+    """
+
+    def __init__(self, number: int, duration: float, status_code: Optional[int] = None, exception: Optional[Exception] = None) -> None:
+        self.number = number
+        self.duration = duration
+        self.status_code = status_code
+        self.exception = exception
+        self.backoff = 0.0
+
+    def __repr__(self) -> Text:
+        outcome = f'status_code={self.status_code}' if self.exception is None else f'exception={self.exception!r}'
+        return f'RequestAttempt(number={self.number}, duration={self.duration:.3f}, {outcome}, backoff={self.backoff:.3f})'
+
+
+class RetryPolicy:
+    """
+    The policy for retrying requests to the Clipdrop API that fail with a transient error.
+
+    The backoff grows exponentially with every attempt, up to a cap, and is fully jittered by default so that concurrent clients do not retry in lockstep.
+    A `Retry-After` header sent by the API is always honoured as the minimum backoff.
+
+    Args:
+        max_attempts (int): The maximum number of attempts, including the first one. The default value is 3.
+        backoff_base (float): The backoff after the first attempt in seconds. The default value is 0.5.
+        backoff_cap (float): The maximum backoff in seconds. The default value is 30.
+        jitter (bool): Whether to pick the backoff uniformly between zero and the exponential value. The default value is True.
+        retry_status_codes (Collection): The status codes to retry. The default value is 429, 500, 502, 503 and 504.
+        retry_exceptions (Tuple): The exceptions to retry. The default value is None, which retries the connection and timeout errors of the HTTP client in use.
+        on_attempt (Callable): A function called with the URL and the `RequestAttempt` after every attempt. The default value is None.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        jitter: bool = True,
+        retry_status_codes: Collection[int] = (429, 500, 502, 503, 504),
+        retry_exceptions: Optional[Tuple[Type[Exception], ...]] = None,
+        on_attempt: Optional[Callable[[Text, RequestAttempt], None]] = None
+    ) -> None:
+        if max_attempts < 1:
+            raise ValueError("The maximum number of attempts must be at least 1.")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.retry_exceptions = retry_exceptions
+        self.on_attempt = on_attempt
+
+    def get_backoff(self, attempt_number: int, retry_after: Optional[float] = None) -> float:
+        """
+        Get the time to wait after a failed attempt.
+
+        Args:
+            attempt_number (int): The number of the failed attempt, starting at 1.
+            retry_after (float): The delay requested by the API in seconds, if any.
+
+        Returns:
+            float: The time to wait in seconds.
+        """
+        backoff = min(self.backoff_cap, self.backoff_base * 2 ** (attempt_number - 1))
+        if self.jitter:
+            backoff = random.uniform(0, backoff)
+
+        return max(backoff, retry_after or 0.0)
+
+    def next_backoff(self, url: Text, attempt: RequestAttempt, failures: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Decide whether a request is retried after an attempt, and report the attempt to `on_attempt`.
+
+        Args:
+            url (Text): The URL of the request.
+            attempt (RequestAttempt): The attempt that just finished. Its exception is expected to be retryable.
+            failures (int): The number of attempts counted against `max_attempts` so far, including this one.
+            retry_after (float): The delay requested by the API in seconds, if any.
+
+        Returns:
+            float: The time to wait before the next attempt in seconds, or None if the request is not retried.
+        """
+        backoff = None
+        if (attempt.exception is not None or attempt.status_code in self.retry_status_codes) and failures < self.max_attempts:
+            backoff = attempt.backoff = self.get_backoff(failures, retry_after)
+
+        self.notify(url, attempt)
+        return backoff
+
+    def notify(self, url: Text, attempt: RequestAttempt) -> None:
+        """
+        Report an attempt to `on_attempt`, if it is set.
+        """
+        if self.on_attempt is not None:
+            self.on_attempt(url, attempt)
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
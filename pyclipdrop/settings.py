@@ -1,11 +1,13 @@
-from typing import Text
-from pydantic_settings import BaseSettings
+import os
+from typing import Optional, Text
 
 
-class PyClipdropSettings(BaseSettings):
+class PyClipdropSettings:
     """
     Settings for the PyClipdrop package.
 
+    Every setting can be overridden by the environment variable of the same name, matched regardless of case.
+
     Attributes:
         BASE_URL (Text): Base URL for the Clipdrop API.
         VERSION (Text): Version of the Clipdrop API.
@@ -14,5 +16,29 @@ class PyClipdropSettings(BaseSettings):
     BASE_URL: Text = "https://clipdrop-api.co"
     VERSION: Text = "v1"
 
+    def __init__(self, **values: Text) -> None:
+        for name in ('BASE_URL', 'VERSION'):
+            value = values.get(name)
+            if value is None:
+                value = _get_environment_variable(name)
+            if value is not None:
+                setattr(self, name, value)
+
+    def __repr__(self) -> Text:
+        return f'PyClipdropSettings(BASE_URL={self.BASE_URL!r}, VERSION={self.VERSION!r})'
+
+
+def _get_environment_variable(name: Text) -> Optional[Text]:
+    value = os.environ.get(name)
+    if value is not None:
+        return value
+
+    name = name.lower()
+    for key, value in os.environ.items():
+        if key.lower() == name:
+            return value
+
+    return None
+
 
-settings = PyClipdropSettings()
\ No newline at end of file
+settings = PyClipdropSettings()
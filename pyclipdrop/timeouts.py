@@ -0,0 +1,161 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator, Optional, Text, Tuple, Union
+
+from pyclipdrop.exceptions import DeadlineExceededError
+
+if TYPE_CHECKING:
+    import httpx
+
+
+# A timeout in seconds, either as a single value or as a (connect, read) pair
+Timeout = Union[float, Tuple[float, float]]
+
+# The default timeout of the requests of the clients. Connections should be quick, while the API may take a while to process an image.
+DEFAULT_TIMEOUT = (10.0, 300.0)
+
+# The timeout given to network calls made when the deadline has all but expired, so that they fail at once instead of blocking
+_MINIMUM_TIMEOUT = 0.001
+
+# The deadline of the operation being run in the current thread or task, if it has one
+_current_deadline = ContextVar('pyclipdrop_deadline', default=None)
+
+
+class Deadline:
+    """
+    The point in time by which an operation must be complete, covering the download of its inputs, the upload, retries and backoff, and the write of its output.
+
+    Args:
+        seconds (float): The time in seconds the operation may take from now.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError("The deadline must not be negative.")
+
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """
+        Get the time in seconds left before the deadline, which is 0 once it has expired.
+        """
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def check(self, stage: Text, cause: Optional[BaseException] = None) -> None:
+        """
+        Raise an error if the deadline has expired.
+
+        Args:
+            stage (Text): What the operation is doing, for the message of the error, e.g. 'uploading the input'.
+            cause (Exception): The error the expired deadline caused, e.g. the timeout of a request cut short by the deadline, if any.
+
+        Raises:
+            DeadlineExceededError: If the deadline has expired.
+        """
+        if self.expired:
+            raise DeadlineExceededError(f"The deadline of {self.seconds:g} seconds was exceeded while {stage}.", seconds=self.seconds) from cause
+
+    def limit(self, timeout: Optional[Timeout]) -> Timeout:
+        """
+        Cap a timeout at the time left before the deadline.
+
+        Args:
+            timeout (Timeout): The timeout to cap, either as a single value or as a (connect, read) pair, or None for no timeout.
+
+        Returns:
+            Timeout: The capped timeout, in the same form.
+        """
+        remaining = max(self.remaining(), _MINIMUM_TIMEOUT)
+        if timeout is None:
+            return remaining
+        if isinstance(timeout, tuple):
+            return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+
+        return min(timeout, remaining)
+
+    def __repr__(self) -> Text:
+        return f'Deadline(seconds={self.seconds:g}, remaining={self.remaining():.3f})'
+
+
+def get_current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextmanager
+def within_deadline(seconds: Optional[Union[float, Deadline]]) -> Iterator[Optional[Deadline]]:
+    """
+    Run the operations in the context within a deadline. Deadlines nest: an operation within an earlier outer deadline keeps the outer one.
+
+    Args:
+        seconds (float): The time in seconds the operations may take from now, or an existing `Deadline` to share its remaining time. None leaves the current deadline, if any, unchanged.
+
+    Yields:
+        Deadline: The deadline in effect, or None if there is none.
+    """
+    outer = _current_deadline.get()
+    if seconds is None:
+        yield outer
+        return
+
+    current = seconds if isinstance(seconds, Deadline) else Deadline(seconds)
+    if outer is not None and outer.expires_at <= current.expires_at:
+        current = outer
+
+    token = _current_deadline.set(current)
+    try:
+        yield current
+    finally:
+        _current_deadline.reset(token)
+
+
+def check_deadline(stage: Text, cause: Optional[BaseException] = None) -> None:
+    """
+    Raise an error if the deadline of the current operation, if any, has expired.
+
+    Raises:
+        DeadlineExceededError: If the deadline has expired.
+    """
+    current = _current_deadline.get()
+    if current is not None:
+        current.check(stage, cause)
+
+
+def check_backoff(backoff: float, stage: Text) -> None:
+    """
+    Raise an error if the deadline of the current operation, if any, would expire before a backoff is over, so that the operation fails at once instead of waiting for nothing.
+
+    Raises:
+        DeadlineExceededError: If the deadline would expire during the backoff.
+    """
+    current = _current_deadline.get()
+    if current is not None and backoff >= current.remaining():
+        raise DeadlineExceededError(f"The deadline of {current.seconds:g} seconds would be exceeded while {stage}.", seconds=current.seconds)
+
+
+def limit_timeout(timeout: Optional[Timeout]) -> Optional[Timeout]:
+    """
+    Cap a timeout at the time left before the deadline of the current operation, if any.
+    """
+    current = _current_deadline.get()
+    return timeout if current is None else current.limit(timeout)
+
+
+def get_httpx_timeout(timeout: Optional[Timeout]) -> 'httpx.Timeout':
+    """
+    Convert a timeout to the timeout of an httpx request.
+    """
+    # httpx is an optional dependency that is only required by the asynchronous client
+    import httpx
+
+    # A (connect, read) pair applies the read timeout to writing the request and waiting for a pooled connection too
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+
+    return httpx.Timeout(timeout)
@@ -1,2 +1,7 @@
-from pyclipdrop.utilities.validators import is_extension_supported
-from pyclipdrop.utilities.extractors import get_extension_from_file_path, get_extension_from_url
+from pyclipdrop.utilities.validators import JPG, JPG_WEBP, PNG, PNG_JPG, PNG_JPG_WEBP, DirectoryCache, directory_cache, is_extension_supported
+from pyclipdrop.utilities.extractors import get_extension_from_content, get_extension_from_file_path, get_extension_from_url, get_retry_after_from_headers
+from pyclipdrop.utilities.multipart import MultipartEncoder, get_stream_size
+from pyclipdrop.utilities.converters import convert_to_bytes, is_in_memory_image
+from pyclipdrop.utilities.shared_memory import SharedPayload
+from pyclipdrop.utilities.image_headers import HEADER_SIZE, ImageInfo, get_image_info, read_image_info
+from pyclipdrop.utilities.png import encode_grayscale_png
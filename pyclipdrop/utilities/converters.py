@@ -0,0 +1,45 @@
+import io
+from typing import Any, Optional
+
+
+def is_in_memory_image(value: Any) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) or hasattr(value, 'read') or _is_pil_image(value) or _is_numpy_array(value)
+
+
+def convert_to_bytes(value: Any) -> Optional[bytes]:
+    """
+    Convert an in-memory image to the bytes of an encoded image.
+
+    Bytes-like objects and binary file-like objects are expected to hold an encoded image already. PIL images and NumPy arrays are encoded as PNG, which requires Pillow.
+    """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value)
+
+    if hasattr(value, 'read'):
+        data = value.read()
+        if isinstance(data, str):
+            raise TypeError("File-like inputs must be opened in binary mode.")
+        return data
+
+    if _is_numpy_array(value):
+        try:
+            from PIL import Image
+        except ImportError as e:
+            raise ImportError("Uploading NumPy arrays requires Pillow. Install it with 'pip install pillow'.") from e
+        value = Image.fromarray(value)
+
+    if _is_pil_image(value):
+        buffer = io.BytesIO()
+        value.save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    return None
+
+
+def _is_pil_image(value: Any) -> bool:
+    # Pillow is an optional dependency, so images are recognized without importing it
+    return type(value).__module__.startswith('PIL.') and hasattr(value, 'save') and hasattr(value, 'mode')
+
+
+def _is_numpy_array(value: Any) -> bool:
+    return type(value).__module__ == 'numpy' and hasattr(value, '__array_interface__')
@@ -1,6 +1,8 @@
-from typing import Text
+import time
 from pathlib import Path
+from typing import Mapping, Optional, Text
 from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
 
 
 def get_extension_from_file_path(file_path: Text) -> Text: 
@@ -8,4 +10,31 @@ def get_extension_from_file_path(file_path: Text) -> Text:
 
 
 def get_extension_from_url(url: Text) -> Text:
-    return Path(urlparse(url).path).suffix
\ No newline at end of file
+    return Path(urlparse(url).path).suffix
+
+
+def get_extension_from_content(data: bytes) -> Optional[Text]:
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return '.png'
+    if data[:3] == b'\xff\xd8\xff':
+        return '.jpg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return '.webp'
+
+    return None
+
+
+def get_retry_after_from_headers(headers: Mapping[Text, Text]) -> Optional[float]:
+    value = headers.get('Retry-After')
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,223 @@
+import struct
+from typing import Callable, Optional, Text, Tuple
+
+
+# The number of bytes read from the start of an image to parse its header. It holds the header of PNG and WEBP images and of most JPEG images.
+HEADER_SIZE = 16 * 1024
+
+# The number of bytes read from the start of a JPEG image whose size is not found in the first `HEADER_SIZE` bytes, e.g. behind a large EXIF thumbnail
+MAX_HEADER_SIZE = 256 * 1024
+
+# The signatures of the formats that are recognized but not parsed, so that mislabeled files in these formats can be rejected
+OTHER_SIGNATURES = (
+    (b'GIF87a', 'GIF', '.gif'),
+    (b'GIF89a', 'GIF', '.gif'),
+    (b'BM', 'BMP', '.bmp'),
+    (b'II*\x00', 'TIFF', '.tiff'),
+    (b'MM\x00*', 'TIFF', '.tiff')
+)
+
+# The JPEG markers that stand alone, without a length
+_STANDALONE_MARKERS = frozenset([0x01, 0xd8] + list(range(0xd0, 0xd8)))
+
+# The JPEG start of frame markers, which hold the size of the image. 0xc4, 0xc8 and 0xcc are other markers in the same range.
+_START_OF_FRAME_MARKERS = frozenset(range(0xc0, 0xd0)) - frozenset([0xc4, 0xc8, 0xcc])
+
+# The EXIF tag of the orientation of an image, whose values 5 to 8 rotate it by a quarter turn
+_ORIENTATION_TAG = 0x0112
+_TRANSPOSED_ORIENTATIONS = frozenset([5, 6, 7, 8])
+
+
+class ImageInfo:
+    """
+    The format, size and transparency of an image, read from its header.
+
+    Attributes:
+        format (Text): The format of the image, e.g. 'PNG'.
+        extension (Text): The extension of the format, e.g. '.png'.
+        width (int): The width of the image in pixels as it is displayed, i.e. after the EXIF orientation of JPEG images, or None if it could not be read.
+        height (int): The height of the image in pixels as it is displayed, or None if it could not be read.
+        has_alpha (bool): Whether the image has an alpha channel or a transparent color, or None if it could not be read.
+    """
+
+    def __init__(self, format: Text, extension: Text, width: Optional[int] = None, height: Optional[int] = None, has_alpha: Optional[bool] = None) -> None:
+        self.format = format
+        self.extension = extension
+        self.width = width
+        self.height = height
+        self.has_alpha = has_alpha
+
+    @property
+    def size(self) -> Optional[Tuple[int, int]]:
+        if self.width is None or self.height is None:
+            return None
+
+        return self.width, self.height
+
+    @property
+    def is_complete(self) -> bool:
+        return self.size is not None and self.has_alpha is not None
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ImageInfo) and (self.format, self.width, self.height, self.has_alpha) == (other.format, other.width, other.height, other.has_alpha)
+
+    def __repr__(self) -> Text:
+        return f'ImageInfo(format={self.format!r}, width={self.width}, height={self.height}, has_alpha={self.has_alpha})'
+
+
+def get_image_info(data: bytes) -> Optional[ImageInfo]:
+    """
+    Read the format, size and transparency of an image from the start of its content, without decoding it.
+
+    Args:
+        data (bytes): The content of the image, or its first bytes. `HEADER_SIZE` bytes are enough for PNG and WEBP images and for most JPEG images.
+
+    Returns:
+        ImageInfo: The information found in the header, whose size and transparency are None if the header is cut short. None if the format is not recognized.
+    """
+    data = memoryview(data)
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return _get_png_info(data)
+    if data[:3] == b'\xff\xd8\xff':
+        return _get_jpeg_info(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _get_webp_info(data)
+
+    for signature, image_format, extension in OTHER_SIGNATURES:
+        if data[:len(signature)] == signature:
+            return ImageInfo(image_format, extension)
+
+    return None
+
+
+def _get_png_info(data: memoryview) -> ImageInfo:
+    info = ImageInfo('PNG', '.png')
+    # The first chunk is always IHDR: width, height, bit depth and color type
+    if len(data) < 26 or data[12:16] != b'IHDR':
+        return info
+
+    info.width, info.height = struct.unpack('>II', data[16:24])
+    color_type = data[25]
+
+    # Grayscale and truecolor images with alpha have an alpha channel, while other images are transparent if they have a tRNS chunk before their data
+    if color_type in (4, 6):
+        info.has_alpha = True
+        return info
+
+    offset = 33
+    while offset + 8 <= len(data):
+        length, chunk_type = struct.unpack('>I4s', data[offset:offset + 8])
+        if chunk_type == b'tRNS':
+            info.has_alpha = True
+            return info
+        if chunk_type in (b'IDAT', b'IEND'):
+            info.has_alpha = False
+            return info
+        offset += 12 + length
+
+    return info
+
+
+def _get_jpeg_info(data: memoryview) -> ImageInfo:
+    # JPEG images have no alpha channel
+    info = ImageInfo('JPEG', '.jpg', has_alpha=False)
+    orientation = None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xff:
+            return info
+
+        marker = data[offset + 1]
+        # Markers may be padded with any number of fill bytes
+        if marker == 0xff:
+            offset += 1
+            continue
+        if marker in _STANDALONE_MARKERS:
+            offset += 2
+            continue
+
+        length = struct.unpack('>H', data[offset + 2:offset + 4])[0]
+        if marker in _START_OF_FRAME_MARKERS:
+            if offset + 9 <= len(data):
+                info.height, info.width = struct.unpack('>HH', data[offset + 5:offset + 9])
+                # Photos taken in portrait are usually stored in landscape, with an orientation that rotates them when they are displayed
+                if orientation in _TRANSPOSED_ORIENTATIONS:
+                    info.width, info.height = info.height, info.width
+            return info
+
+        # The EXIF metadata precedes the start of frame
+        if marker == 0xe1 and data[offset + 4:offset + 10] == b'Exif\x00\x00':
+            orientation = _get_exif_orientation(data[offset + 10:offset + 2 + length])
+
+        # The image data starts after the start of scan, so there is no size past it
+        if marker == 0xda:
+            return info
+
+        offset += 2 + length
+
+    return info
+
+
+def _get_exif_orientation(exif: memoryview) -> Optional[int]:
+    # The EXIF metadata is a TIFF header followed by the entries of the first image, which hold the orientation
+    if len(exif) < 8 or bytes(exif[:2]) not in (b'II', b'MM'):
+        return None
+    byte_order = '<' if exif[:2] == b'II' else '>'
+
+    offset = struct.unpack(byte_order + 'I', exif[4:8])[0]
+    if offset + 2 > len(exif):
+        return None
+
+    count = struct.unpack(byte_order + 'H', exif[offset:offset + 2])[0]
+    for entry in range(offset + 2, min(offset + 2 + 12 * count, len(exif) - 11), 12):
+        tag, value_type = struct.unpack(byte_order + 'HH', exif[entry:entry + 4])
+        # The orientation is a single short, stored in the first bytes of the value of its entry
+        if tag == _ORIENTATION_TAG:
+            return struct.unpack(byte_order + 'H', exif[entry + 8:entry + 10])[0] if value_type == 3 else None
+
+    return None
+
+
+def _get_webp_info(data: memoryview) -> ImageInfo:
+    info = ImageInfo('WEBP', '.webp')
+    chunk_type = bytes(data[12:16])
+    payload = data[20:]
+
+    if chunk_type == b'VP8 ' and len(payload) >= 10 and payload[3:6] == b'\x9d\x01\x2a':
+        # Lossy images without an extended header have no alpha channel
+        width, height = struct.unpack('<HH', payload[6:10])
+        info.width, info.height = width & 0x3fff, height & 0x3fff
+        info.has_alpha = False
+
+    elif chunk_type == b'VP8L' and len(payload) >= 5 and payload[0] == 0x2f:
+        bits = struct.unpack('<I', payload[1:5])[0]
+        info.width = (bits & 0x3fff) + 1
+        info.height = ((bits >> 14) & 0x3fff) + 1
+        info.has_alpha = bool((bits >> 28) & 1)
+
+    elif chunk_type == b'VP8X' and len(payload) >= 10:
+        info.has_alpha = bool(payload[0] & 0x10)
+        info.width = int.from_bytes(payload[4:7], 'little') + 1
+        info.height = int.from_bytes(payload[7:10], 'little') + 1
+
+    return info
+
+
+def read_image_info(read: Callable[[int], bytes]) -> Optional[ImageInfo]:
+    """
+    Read the format, size and transparency of an image from its header, reading only the first bytes of the image.
+
+    Args:
+        read (Callable): A function that returns up to the given number of bytes from the start of the image.
+
+    Returns:
+        ImageInfo: The information found in the header, or None if the format is not recognized.
+    """
+    data = read(HEADER_SIZE)
+    info = get_image_info(data)
+
+    # The size of a JPEG image may follow a large EXIF block, e.g. with a thumbnail, in which case a larger part of the image is read
+    if info is not None and info.format == 'JPEG' and info.size is None and len(data) >= HEADER_SIZE:
+        info = get_image_info(read(MAX_HEADER_SIZE))
+
+    return info
@@ -0,0 +1,134 @@
+import os
+import stat
+import binascii
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterator, List, Optional, Text, Union
+
+if TYPE_CHECKING:
+    from urllib3.fields import RequestField
+
+
+class MultipartEncoder:
+    """
+    A multipart/form-data body that is read from its sources in chunks instead of being built in memory.
+
+    The fields and files are laid out in the same order and with the same headers as requests does. The content of a file can be bytes, a string or an object with an `open` method returning a binary file-like object and its size, such as `InputStream`.
+
+    Args:
+        files (Dict): The files to upload, as (filename, content, content type) tuples.
+        data (Dict): The form fields to upload.
+        chunk_size (int): The size of the chunks read from file-like sources. The default value is 64 KB.
+    """
+
+    def __init__(self, files: Dict, data: Optional[Dict] = None, chunk_size: int = 64 * 1024) -> None:
+        # urllib3 is imported on first use, so that importing the utilities, e.g. for the asynchronous client, does not import it
+        from urllib3.fields import RequestField
+
+        self.boundary = binascii.hexlify(os.urandom(16)).decode('ascii')
+        self.chunk_size = chunk_size
+        self._parts: List[Union[bytes, BinaryIO]] = []
+        self._sources: List[BinaryIO] = []
+
+        # The length is unknown if any of the sources does not report its size, in which case the body is sent with chunked encoding
+        self.len: Optional[int] = 0
+
+        try:
+            for name, value in (data or {}).items():
+                if value is None:
+                    continue
+                field = RequestField(name=name, data=b'')
+                field.make_multipart()
+                self._add_part(field, str(value).encode('utf-8'))
+
+            for name, (filename, content, content_type) in files.items():
+                field = RequestField(name=name, data=b'', filename=filename)
+                field.make_multipart(content_type=content_type)
+                self._add_part(field, content)
+
+            self._add_bytes(f'--{self.boundary}--\r\n'.encode('latin-1'))
+        except BaseException:
+            self.close()
+            raise
+
+        self._chunks = self._iter_chunks()
+        self._buffer = b''
+
+    @property
+    def content_type(self) -> Text:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._chunks
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._buffer + b''.join(self._chunks)
+            self._buffer = b''
+            return data
+
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self) -> None:
+        for source in self._sources:
+            source.close()
+
+    def _add_part(self, field: 'RequestField', content) -> None:
+        self._add_bytes(f'--{self.boundary}\r\n'.encode('latin-1') + field.render_headers().encode('latin-1'))
+
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            self._add_bytes(bytes(content))
+        else:
+            source, size = content.open()
+            self._sources.append(source)
+            self._parts.append(source)
+            self.len = None if self.len is None or size is None else self.len + size
+
+        self._add_bytes(b'\r\n')
+
+    def _add_bytes(self, data: bytes) -> None:
+        self._parts.append(data)
+        if self.len is not None:
+            self.len += len(data)
+
+    def _iter_chunks(self) -> Iterator[bytes]:
+        try:
+            for part in self._parts:
+                if isinstance(part, bytes):
+                    for offset in range(0, len(part), self.chunk_size):
+                        yield part[offset:offset + self.chunk_size]
+                else:
+                    while True:
+                        chunk = part.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        yield chunk
+        finally:
+            self.close()
+
+
+def get_stream_size(source: BinaryIO) -> Optional[int]:
+    """
+    Get the size of a binary stream without reading it, if it can be determined.
+    """
+    # HTTP responses expose the remaining length of their content
+    length = getattr(source, 'length', None)
+    if isinstance(length, int):
+        return length
+
+    try:
+        file_stat = os.fstat(source.fileno())
+        if stat.S_ISREG(file_stat.st_mode):
+            return file_stat.st_size - source.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+
+    return None
@@ -0,0 +1,36 @@
+import zlib
+import struct
+
+
+# The zlib compression level of encoded masks, which are mostly runs of the same value and compress well at low levels
+COMPRESSION_LEVEL = 6
+
+
+def encode_grayscale_png(scanlines: bytes, width: int, height: int, level: int = COMPRESSION_LEVEL) -> bytes:
+    """
+    Encode an 8-bit grayscale image as PNG, without Pillow.
+
+    Args:
+        scanlines (bytes): The rows of the image from top to bottom, each one made of a filter type byte, which is 0 for no filtering, and `width` pixel values.
+        width (int): The width of the image in pixels.
+        height (int): The height of the image in pixels.
+        level (int): The zlib compression level. The default value is 6.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if len(scanlines) != (width + 1) * height:
+        raise ValueError(f"Expected {(width + 1) * height} bytes of scanlines for a {width}x{height} image, got {len(scanlines)}.")
+
+    # Bit depth 8, color type 0 (grayscale), default compression, filtering and no interlacing
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return b''.join([
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', header),
+        _chunk(b'IDAT', zlib.compress(scanlines, level)),
+        _chunk(b'IEND', b'')
+    ])
+
+
+def _chunk(chunk_type: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)))
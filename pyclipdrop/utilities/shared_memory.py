@@ -0,0 +1,78 @@
+from typing import Any, Optional, Text
+
+
+class SharedPayload:
+    """
+    A reference to bytes held in a shared memory block, which is pickled as its name and size instead of its content.
+
+    The process that creates a payload hands its ownership to the process that reads it last, which unlinks it.
+    """
+
+    def __init__(self, name: Text, size: int) -> None:
+        self.name = name
+        self.size = size
+
+    @classmethod
+    def create(cls, data: bytes, owned: bool = True) -> 'SharedPayload':
+        """
+        Copy bytes into a new shared memory block.
+
+        Args:
+            data (bytes): The bytes to share.
+            owned (bool): Whether this process will unlink the block. A block created for another process to unlink is removed from the resource tracker of this process, so that it is not reported as leaked. The default value is True.
+        """
+        # Shared memory blocks cannot be empty
+        block = _get_shared_memory().SharedMemory(create=True, size=max(len(data), 1))
+        try:
+            block.buf[:len(data)] = data
+        finally:
+            block.close()
+
+        if not owned:
+            _unregister(block)
+
+        return cls(block.name, len(data))
+
+    def read(self, unlink: bool = False) -> bytes:
+        """
+        Copy the bytes out of the shared memory block.
+
+        Args:
+            unlink (bool): Whether to remove the block after reading it. The default value is False.
+        """
+        block = _get_shared_memory().SharedMemory(name=self.name)
+        try:
+            return bytes(block.buf[:self.size])
+        finally:
+            block.close()
+            if unlink:
+                block.unlink()
+
+    def unlink(self) -> None:
+        try:
+            block = _get_shared_memory().SharedMemory(name=self.name)
+        except FileNotFoundError:
+            return
+        block.close()
+        block.unlink()
+
+    def __repr__(self) -> Text:
+        return f'SharedPayload(name={self.name!r}, size={self.size})'
+
+
+def _get_shared_memory():
+    # multiprocessing is only imported by batches in processes, so that importing the utilities stays cheap
+    from multiprocessing import shared_memory
+    return shared_memory
+
+
+def _unregister(block: Any) -> None:
+    try:
+        from multiprocessing import resource_tracker
+    except ImportError:
+        # There is no resource tracker on Windows, where blocks are freed with their last handle
+        return
+
+    name: Optional[Text] = getattr(block, '_name', None)
+    if name is not None:
+        resource_tracker.unregister(name, 'shared_memory')
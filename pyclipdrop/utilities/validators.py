@@ -1,6 +1,58 @@
-from typing import Text, List
+import os
+import time
+import threading
+from typing import Collection, Dict, Text
 
 
-def is_extension_supported(extension: Text, supported_extensions: List) -> bool:
-    supported_extensions = supported_extensions + ['.jpeg'] if '.jpg' in supported_extensions else supported_extensions
-    return extension in supported_extensions
\ No newline at end of file
+PNG = frozenset(['.png'])
+JPG = frozenset(['.jpg'])
+PNG_JPG = frozenset(['.png', '.jpg'])
+PNG_JPG_WEBP = frozenset(['.png', '.jpg', '.webp'])
+JPG_WEBP = frozenset(['.jpg', '.webp'])
+
+
+def is_extension_supported(extension: Text, supported_extensions: Collection[Text]) -> bool:
+    # JPEG is accepted wherever JPG is, without building a new collection on every call
+    return extension in supported_extensions or (extension == '.jpeg' and '.jpg' in supported_extensions)
+
+
+class DirectoryCache:
+    """
+    A cache of the directories known to exist, which saves a stat call for every output written to the same directory.
+
+    Only existing directories are cached, and only for `ttl` seconds, so a directory that is created later is found immediately and a removed directory is noticed soon after.
+
+    Args:
+        ttl (float): The time in seconds a directory is remembered. The default value is 1.
+        max_entries (int): The maximum number of directories remembered. The default value is 1024.
+    """
+
+    def __init__(self, ttl: float = 1.0, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._checked_at: Dict[Text, float] = {}
+        self._lock = threading.Lock()
+
+    def exists(self, directory: Text) -> bool:
+        now = time.monotonic()
+        checked_at = self._checked_at.get(directory)
+        if checked_at is not None and now - checked_at < self.ttl:
+            return True
+
+        if not os.path.isdir(directory or '.'):
+            return False
+
+        with self._lock:
+            if len(self._checked_at) >= self.max_entries:
+                self._checked_at.clear()
+            self._checked_at[directory] = now
+
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._checked_at.clear()
+
+
+# The directory cache shared by all output file handlers
+directory_cache = DirectoryCache()
@@ -0,0 +1,294 @@
+import json
+import hashlib
+import time
+import random
+import threading
+from typing import Optional, Text
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# The paths of the endpoints called by the clients, with the version of the API as a placeholder
+ENDPOINT_PATHS = frozenset([
+    '/text-to-image/{version}',
+    '/replace-background/{version}',
+    '/remove-background/{version}',
+    '/remove-text/{version}',
+    '/reimagine/{version}/reimagine',
+    '/sketch-to-image/{version}/sketch-to-image',
+    '/uncrop/{version}',
+    '/image-upscaling/{version}/upscale',
+    '/cleanup/{version}',
+    '/portrait-depth-estimation/{version}',
+    '/portrait-surface-normals/{version}',
+    '/text-inpainting/{version}'
+])
+
+# The signatures that make generated payloads recognizable as images of each content type
+SIGNATURES = {
+    'image/png': b'\x89PNG\r\n\x1a\n',
+    'image/jpeg': b'\xff\xd8\xff\xe0',
+    'image/webp': b'RIFF\x00\x00\x00\x00WEBPVP8 '
+}
+
+
+class MockClipdropServer:
+    """
+    A local stand-in for the Clipdrop API that can be used by tests and benchmarks.
+
+    Requests to the paths of the endpoints of the API are answered with the configured content, and requests to any other path are rejected with a 404 status code.
+
+    Args:
+        response_content (bytes): The content returned for every request.
+        content_type (Text): The content type returned for every request.
+        status_code (int): The status code returned for every request. An error message is returned as JSON for codes other than 200.
+        rate_limit (float): The quota of requests per second. Requests over the quota are rejected with a 429 status code. The default value is None, which does not enforce a quota.
+        keep_request_body (bool): Whether to keep the body of the last request in `last_request`. Bodies are discarded while they are read otherwise, which keeps the memory of the server out of measurements. The default value is True.
+        response_size (int): The size in bytes of a generated response, starting with the signature of the content type. It replaces `response_content`. The default value is None.
+        latency (float): The time in seconds the server takes to process every request. The default value is 0.
+        latency_jitter (float): The maximum time in seconds added at random to the latency. The default value is 0.
+        download_latency (float): The time in seconds the server takes to answer every download of an input over GET. The default value is 0.
+        error_rate (float): The fraction of requests failed at random with `error_status_code`. The default value is 0.
+        error_status_code (int): The status code of random failures. The default value is 500.
+        retry_after (float): The value of the Retry-After header of 429 responses, or None to leave it out. The default value is 1.
+        rate_limit_headers (bool): Whether to send the remaining quota and the time until it is refilled in the X-RateLimit-Remaining and X-RateLimit-Reset headers. The default value is False.
+        remaining_credits (float): The credits left on the account. Successful requests consume `credits_per_request` of them and report it in the x-credits-consumed and x-remaining-credits headers, and requests are rejected with a 402 status code once they run out. The default value is None, which does not account for credits.
+        credits_per_request (float): The credits consumed by every successful request. The default value is 1.
+        version (Text): The version of the API in the paths of the endpoints. The default value is 'v1'.
+        seed (int): The seed of the random latency and failures, which makes runs reproducible. The default value is None.
+    """
+
+    def __init__(
+        self,
+        response_content: bytes = b'\x89PNG\r\n\x1a\n',
+        content_type: Text = 'image/png',
+        status_code: int = 200,
+        rate_limit: float = None,
+        keep_request_body: bool = True,
+        response_size: Optional[int] = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        download_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status_code: int = 500,
+        retry_after: Optional[float] = 1,
+        rate_limit_headers: bool = False,
+        remaining_credits: Optional[float] = None,
+        credits_per_request: float = 1,
+        version: Text = 'v1',
+        seed: Optional[int] = None
+    ) -> None:
+        if response_size is not None:
+            signature = SIGNATURES.get(content_type, b'')
+            response_content = signature + b'\x00' * max(response_size - len(signature), 0)
+
+        self.response_content = response_content
+        self.content_type = content_type
+        self.status_code = status_code
+        self.rate_limit = rate_limit
+        self.keep_request_body = keep_request_body
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.download_latency = download_latency
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self.retry_after = retry_after
+        self.rate_limit_headers = rate_limit_headers
+        self.remaining_credits = remaining_credits
+        self.credits_per_request = credits_per_request
+        self.paths = frozenset(path.format(version=version) for path in ENDPOINT_PATHS)
+        self.throttled_count = 0
+        self.error_count = 0
+        self.download_count = 0
+        self._random = random.Random(seed)
+        self._failures = []
+        self._quota = rate_limit
+        self._quota_updated_at = time.monotonic()
+        self.last_request = None
+        self.request_count = 0
+        self.connection_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> 'MockClipdropServer':
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def base_url(self) -> Text:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> None:
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._create_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def fail_next(self, count: int, status_code: int = 502) -> None:
+        """
+        Fail the next requests with the given status code.
+        """
+        with self._lock:
+            self._failures.extend([status_code] * count)
+
+    def _consume_quota(self) -> bool:
+        if self.rate_limit is None:
+            return True
+
+        now = time.monotonic()
+        self._quota = min(self._quota + (now - self._quota_updated_at) * self.rate_limit, self.rate_limit)
+        self._quota_updated_at = now
+        if self._quota < 1:
+            self.throttled_count += 1
+            return False
+
+        self._quota -= 1
+        return True
+
+    def _get_rate_limit_headers(self) -> dict:
+        if self.rate_limit is None or not self.rate_limit_headers:
+            return {}
+
+        return {
+            'X-RateLimit-Remaining': str(int(self._quota)),
+            'X-RateLimit-Reset': f'{(self.rate_limit - self._quota) / self.rate_limit:.3f}'
+        }
+
+    def _consume_credits(self) -> Optional[dict]:
+        if self.remaining_credits is None:
+            return {}
+        if self.remaining_credits < self.credits_per_request:
+            return None
+
+        self.remaining_credits -= self.credits_per_request
+        return {
+            'x-credits-consumed': f'{self.credits_per_request:g}',
+            'x-remaining-credits': f'{self.remaining_credits:g}'
+        }
+
+    def _create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with server._lock:
+                    server.connection_count += 1
+
+            def do_GET(self) -> None:
+                # Inputs served over GET carry an ETag, so that they can be revalidated
+                etag = f'"{hashlib.sha256(server.response_content).hexdigest()[:16]}"'
+                with server._lock:
+                    server.download_count += 1
+
+                if server.download_latency:
+                    time.sleep(server.download_latency)
+
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                # Range requests for the start of the content, e.g. for the header of an image, are answered with that part only
+                requested_range = self.headers.get('Range', '')
+                if requested_range.startswith('bytes=0-'):
+                    end = min(int(requested_range[len('bytes=0-'):]), len(server.response_content) - 1)
+                    content_range = f'bytes 0-{end}/{len(server.response_content)}'
+                    self._send(206, server.content_type, server.response_content[:end + 1], {'ETag': etag, 'Content-Range': content_range})
+                    return
+
+                self._send(200, server.content_type, server.response_content, {'ETag': etag})
+
+            def do_POST(self) -> None:
+                body = self._read_body()
+                with server._lock:
+                    server.request_count += 1
+                    server.last_request = (self.path, dict(self.headers), body)
+                    throttled = not server._consume_quota()
+                    rate_limit_headers = server._get_rate_limit_headers()
+                    failure_status_code = server._failures.pop(0) if server._failures else None
+                    if failure_status_code is None and server.error_rate and server._random.random() < server.error_rate:
+                        failure_status_code = server.error_status_code
+                    if failure_status_code is not None:
+                        server.error_count += 1
+                    latency = server.latency + server._random.uniform(0, server.latency_jitter)
+                    # Credits are only consumed by the requests that succeed
+                    credit_headers = {}
+                    if self.path in server.paths and not throttled and failure_status_code is None and server.status_code == 200:
+                        credit_headers = server._consume_credits()
+
+                if self.path not in server.paths:
+                    self._send(404, 'application/json', json.dumps({'error': 'Not found'}).encode())
+                    return
+
+                if latency:
+                    time.sleep(latency)
+
+                if throttled:
+                    if server.retry_after is not None:
+                        rate_limit_headers['Retry-After'] = f'{server.retry_after:g}'
+                    self._send(429, 'application/json', json.dumps({'error': 'Too many requests'}).encode(), rate_limit_headers)
+                elif failure_status_code is not None:
+                    self._send(failure_status_code, 'application/json', json.dumps({'error': 'Mock failure'}).encode())
+                elif credit_headers is None:
+                    self._send(402, 'application/json', json.dumps({'error': 'Not enough credits'}).encode(), rate_limit_headers)
+                elif server.status_code == 200:
+                    self._send(200, server.content_type, server.response_content, {**rate_limit_headers, **credit_headers})
+                else:
+                    self._send(server.status_code, 'application/json', json.dumps({'error': 'Mock error'}).encode())
+
+            def _read_body(self) -> bytes:
+                chunks = []
+                if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+                    self._read(int(self.headers.get('Content-Length', 0)), chunks)
+                    return b''.join(chunks)
+
+                while True:
+                    size = int(self.rfile.readline().split(b';')[0], 16)
+                    self._read(size, chunks)
+                    self.rfile.readline()
+                    if size == 0:
+                        return b''.join(chunks)
+
+            def _read(self, size: int, chunks: list) -> None:
+                while size > 0:
+                    chunk = self.rfile.read(min(size, 64 * 1024))
+                    if not chunk:
+                        return
+                    size -= len(chunk)
+                    if server.keep_request_body:
+                        chunks.append(chunk)
+
+            def _send(self, status_code: int, content_type: Text, content: bytes, headers: dict = None) -> None:
+                self.send_response(status_code)
+                self.send_header('Content-Type', content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(content)))
+                if self.close_connection:
+                    self.send_header('Connection', 'close')
+                try:
+                    self.end_headers()
+                    self.wfile.write(content)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on the request, e.g. on a timeout
+                    self.close_connection = True
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
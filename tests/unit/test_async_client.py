@@ -0,0 +1,78 @@
+import os
+import asyncio
+import tempfile
+import unittest
+
+from pyclipdrop import AsyncClipdropClient, RetryPolicy
+from pyclipdrop.exceptions import APIRequestError, ValueTooLongError, FileExtensionError
+from tests.mock_server import MockClipdropServer
+
+
+class TestAsyncClipdropClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.output_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def _output_path(self, name: str) -> str:
+        return os.path.join(self.output_directory.name, name)
+
+    async def test_remove_background(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            await client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self._output_path('output.png'))
+
+        path, headers, body = self.server.last_request
+        self.assertEqual(path, '/remove-background/v1')
+        self.assertEqual(headers['x-api-key'], 'test')
+        self.assertIn(b'name="image_file"', body)
+        with open(self._output_path('output.png'), 'rb') as f:
+            self.assertEqual(f.read(), self.server.response_content)
+
+    async def test_text_to_image_sends_prompt(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            await client.text_to_image(prompt='a dog in miami', output_file=self._output_path('output.png'))
+
+        self.assertIn(b'a dog in miami', self.server.last_request[2])
+
+    async def test_concurrent_requests(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url, max_connections=8) as client:
+            await asyncio.gather(*[
+                client.remove_text(input_file='tests/integration/input/billboard.jpg', output_file=self._output_path(f'output_{i}.png'))
+                for i in range(32)
+            ])
+
+        self.assertEqual(self.server.request_count, 32)
+        self.assertLessEqual(self.server.connection_count, 8)
+
+    async def test_validation_errors(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            with self.assertRaises(ValueTooLongError):
+                await client.text_to_image(prompt='a' * 1001, output_file=self._output_path('output.png'))
+
+            with self.assertRaises(FileExtensionError):
+                await client.remove_text(input_file='tests/integration/input/apartment.webp', output_file=self._output_path('output.png'))
+
+        self.assertEqual(self.server.request_count, 0)
+
+    async def test_api_errors(self):
+        self.server.status_code = 400
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            with self.assertRaises(APIRequestError) as context:
+                await client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self._output_path('output.png'))
+
+        self.assertIn('Mock error', str(context.exception))
+
+    async def test_transient_failures_are_retried(self):
+        self.server.fail_next(2, status_code=502)
+        async with AsyncClipdropClient('test', base_url=self.server.base_url, retry_policy=RetryPolicy(backoff_base=0.01)) as client:
+            await client.remove_text(input_file='tests/integration/input/billboard.jpg', output_file=self._output_path('output.png'))
+
+        self.assertEqual(self.server.request_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
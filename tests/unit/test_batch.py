@@ -0,0 +1,88 @@
+import time
+import threading
+import unittest
+
+from pyclipdrop.batch import BatchRun
+from pyclipdrop.exceptions import BatchCancelledError
+
+
+class TestBatchRun(unittest.TestCase):
+    def test_results_in_input_order(self):
+        def function(delay, value):
+            time.sleep(delay)
+            return value
+
+        inputs = [(0.05, 0), (0.01, 1), (0.03, 2), (0, 3)]
+        results = list(BatchRun(function, inputs, max_workers=4))
+
+        self.assertEqual([result.result for result in results], [0, 1, 2, 3])
+        self.assertEqual([result.index for result in results], [0, 1, 2, 3])
+
+    def test_results_in_completion_order(self):
+        def function(delay):
+            time.sleep(delay)
+            return delay
+
+        results = list(BatchRun(function, [0.2, 0.1, 0], max_workers=3, ordered=False))
+
+        self.assertEqual([result.result for result in results], [0, 0.1, 0.2])
+
+    def test_exceptions_are_returned_per_item(self):
+        def function(value):
+            if value % 2:
+                raise ValueError(value)
+            return value
+
+        results = list(BatchRun(function, range(6), max_workers=2))
+
+        self.assertEqual([result.succeeded for result in results], [True, False] * 3)
+        self.assertIsInstance(results[1].exception, ValueError)
+
+    def test_keyword_arguments(self):
+        results = list(BatchRun(lambda a, b: a + b, [{'a': 1, 'b': 2}], max_workers=1))
+
+        self.assertEqual(results[0].result, 3)
+
+    def test_inputs_are_pulled_lazily(self):
+        pulled = []
+
+        def inputs():
+            for i in range(1000):
+                pulled.append(i)
+                yield i
+
+        run = BatchRun(lambda value: value, inputs(), max_workers=2, max_pending=4)
+        next(run)
+
+        self.assertLessEqual(len(pulled), 6)
+        run.cancel()
+        list(run)
+
+    def test_cancel(self):
+        started = threading.Event()
+
+        def function(value):
+            started.set()
+            time.sleep(0.05)
+            return value
+
+        run = BatchRun(function, range(100), max_workers=2)
+        first = next(run)
+        run.cancel()
+        remaining = list(run)
+
+        self.assertEqual(first.result, 0)
+        self.assertEqual(remaining, [])
+        self.assertTrue(run.cancelled)
+
+    def test_cancelled_items_are_not_called(self):
+        calls = []
+        run = BatchRun(calls.append, range(10), max_workers=1)
+        run.cancel()
+
+        self.assertIsInstance(run._call(0, 0).exception, BatchCancelledError)
+        self.assertEqual(calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import time
+import tempfile
+import unittest
+
+from pyclipdrop import ClipdropClient
+from pyclipdrop.cache import CachedResponse, DiskCache, MemoryCache, ResponseCache
+from tests.mock_server import MockClipdropServer
+
+
+class TestResponseCacheKey(unittest.TestCase):
+    def test_key_ignores_file_names(self):
+        first = ResponseCache.make_key('url', {'image_file': ('a.png', b'data', 'image/png')}, {'mode': 'fast'})
+        second = ResponseCache.make_key('url', {'image_file': ('b.png', b'data', 'image/png')}, {'mode': 'fast'})
+
+        self.assertEqual(first, second)
+
+    def test_key_depends_on_content_and_data(self):
+        key = ResponseCache.make_key('url', {'image_file': ('a.png', b'data', 'image/png')}, {'mode': 'fast'})
+
+        self.assertNotEqual(key, ResponseCache.make_key('url', {'image_file': ('a.png', b'other', 'image/png')}, {'mode': 'fast'}))
+        self.assertNotEqual(key, ResponseCache.make_key('url', {'image_file': ('a.png', b'data', 'image/png')}, {'mode': 'quality'}))
+        self.assertNotEqual(key, ResponseCache.make_key('other', {'image_file': ('a.png', b'data', 'image/png')}, {'mode': 'fast'}))
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_least_recently_used_is_evicted(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.set('a', CachedResponse(b'aaaa', 'image/png'))
+        cache.set('b', CachedResponse(b'bbbb', 'image/png'))
+        cache.get('a')
+        cache.set('c', CachedResponse(b'cccc', 'image/png'))
+
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.size, 8)
+        self.assertEqual(cache.stats.as_dict(), {'hits': 2, 'misses': 1, 'stores': 3, 'evictions': 1})
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        cache = DiskCache(self.directory.name)
+        cache.set('a', CachedResponse(b'content', 'image/webp'))
+
+        response = DiskCache(self.directory.name).get('a')
+
+        self.assertEqual(response.content, b'content')
+        self.assertEqual(response.headers['content-type'], 'image/webp')
+
+    def test_size_eviction(self):
+        cache = DiskCache(self.directory.name, max_bytes=10)
+        cache.set('a', CachedResponse(b'aaaa', 'image/png'))
+        os.utime(os.path.join(self.directory.name, 'a.bin'), (0, 0))
+        cache.set('b', CachedResponse(b'bbbb', 'image/png'))
+        cache.set('c', CachedResponse(b'cccc', 'image/png'))
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('c'))
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_age_eviction(self):
+        cache = DiskCache(self.directory.name, max_age=0.05)
+        cache.set('a', CachedResponse(b'aaaa', 'image/png'))
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class TestCachedClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.cache = MemoryCache()
+        self.output_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def _output_path(self, name: str) -> str:
+        return os.path.join(self.output_directory.name, name)
+
+    def test_deterministic_endpoint_is_served_from_cache(self):
+        with ClipdropClient('test', base_url=self.server.base_url, cache=self.cache) as client:
+            client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self._output_path('first.png'))
+            client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self._output_path('second.png'))
+
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.cache.stats.hits, 1)
+        with open(self._output_path('second.png'), 'rb') as f:
+            self.assertEqual(f.read(), self.server.response_content)
+
+    def test_nondeterministic_endpoint_skips_cache(self):
+        with ClipdropClient('test', base_url=self.server.base_url, cache=self.cache) as client:
+            for _ in range(2):
+                client.reimagine(input_file='tests/integration/input/car.jpg', output_file=self._output_path('output.jpg'))
+                client.uncrop(input_file='tests/integration/input/car.jpg', extend_up=10, output_file=self._output_path('output.jpg'))
+
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(self.cache.stats.as_dict(), {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0})
+
+    def test_uncrop_with_seed_is_cached(self):
+        with ClipdropClient('test', base_url=self.server.base_url, cache=self.cache) as client:
+            for _ in range(2):
+                client.uncrop(input_file='tests/integration/input/car.jpg', extend_up=10, seed=42, output_file=self._output_path('output.jpg'))
+
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_nondeterministic_endpoint_opt_in(self):
+        with ClipdropClient('test', base_url=self.server.base_url, cache=self.cache, cache_nondeterministic=True) as client:
+            for _ in range(2):
+                client.reimagine(input_file='tests/integration/input/car.jpg', output_file=self._output_path('output.jpg'))
+
+        self.assertEqual(self.server.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+import subprocess
+import sys
+from unittest import mock
+
+from pyclipdrop.cli import main
+from pyclipdrop.exceptions import FileWriteError
+from pyclipdrop.io_file_handlers import OutputFileHandler
+from tests.mock_server import MockClipdropServer
+
+
+class TestCommandLineInterface(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.directory = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.directory.name, 'input')
+        self.output_dir = os.path.join(self.directory.name, 'output')
+        self.state_file = os.path.join(self.directory.name, 'state.jsonl')
+        os.makedirs(self.input_dir)
+        for name in ['car.jpg', 'wine.jpg', 'owl.png']:
+            shutil.copy(os.path.join('tests/integration/input', name), self.input_dir)
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.directory.cleanup()
+
+    def _main(self, *args) -> int:
+        return main(['--api-key', 'test', '--base-url', self.server.base_url, '--quiet', '--state-file', self.state_file, *args])
+
+    def test_directory(self):
+        self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir), 0)
+
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['car.png', 'owl.png', 'wine.png'])
+        with open(self.state_file) as f:
+            self.assertEqual([json.loads(line)['status'] for line in f], ['done'] * 3)
+
+    def test_resume_skips_done_items(self):
+        self._main('remove-background', self.input_dir, self.output_dir)
+        os.remove(os.path.join(self.output_dir, 'car.png'))
+        shutil.copy('tests/integration/input/portrait.jpg', self.input_dir)
+
+        self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir), 0)
+
+        self.assertEqual(self.server.request_count, 4)
+        self.assertNotIn('car.png', os.listdir(self.output_dir))
+
+    def test_failures_are_recorded(self):
+        self.server.status_code = 400
+
+        self.assertEqual(self._main('remove-text', self.input_dir, self.output_dir), 1)
+
+        with open(self.state_file) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['status'] for record in records], ['failed'] * 3)
+        self.assertIn('APIRequestError', records[0]['error'])
+
+    def test_manifest_with_parameters(self):
+        manifest = os.path.join(self.directory.name, 'manifest.jsonl')
+        with open(manifest, 'w') as f:
+            f.write(json.dumps({'input_file': 'tests/integration/input/car.jpg', 'target_height': 1000}) + '\n')
+
+        self.assertEqual(self._main('upscale', manifest, self.output_dir, '-p', 'target_width=2000', '-p', 'target_height=500'), 0)
+
+        self.assertIn(b'name="target_width"\r\n\r\n2000', self.server.last_request[2])
+        self.assertIn(b'name="target_height"\r\n\r\n1000', self.server.last_request[2])
+        self.assertEqual(os.listdir(self.output_dir), ['car.png'])
+
+    def test_only_declared_numbers_are_converted(self):
+        manifest = os.path.join(self.directory.name, 'manifest.csv')
+        with open(manifest, 'w') as f:
+            f.write('input_file,seed\ntests/integration/input/car.jpg,42\n')
+
+        prompts = os.path.join(self.directory.name, 'prompts.jsonl')
+        with open(prompts, 'w') as f:
+            f.write('{}\n')
+
+        self.assertEqual(self._main('text-to-image', prompts, self.output_dir, '-p', 'prompt=1e3'), 0)
+        self.assertIn(b'\r\n\r\n1e3\r\n', self.server.last_request[2])
+
+        self.assertEqual(self._main('uncrop', manifest, self.output_dir, '-p', 'extend_left=64', '--overwrite'), 0)
+        self.assertIn(b'name="extend_left"\r\n\r\n64\r\n', self.server.last_request[2])
+        self.assertIn(b'name="seed"\r\n\r\n42\r\n', self.server.last_request[2])
+
+    def test_duplicate_names_get_their_own_outputs(self):
+        manifest = os.path.join(self.directory.name, 'manifest.jsonl')
+        with open(manifest, 'w') as f:
+            for directory in ['a', 'b']:
+                os.makedirs(os.path.join(self.input_dir, directory))
+                shutil.copy('tests/integration/input/car.jpg', os.path.join(self.input_dir, directory))
+                f.write(json.dumps({'input_file': os.path.join(self.input_dir, directory, 'car.jpg')}) + '\n')
+
+        self.assertEqual(self._main('remove-background', manifest, self.output_dir), 0)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['car.png', 'car_1.png'])
+
+        # A resumed run finds both outputs
+        self.assertEqual(self._main('remove-background', manifest, self.output_dir, '--state-file', os.path.join(self.directory.name, 'other.jsonl')), 0)
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_other_parameters_are_not_done(self):
+        self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir), 0)
+        self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir, '--overwrite', '-p', 'transparency_handling=discard_alpha_layer'), 0)
+
+        self.assertEqual(self.server.request_count, 6)
+
+    def test_recursive_glob_keeps_directories(self):
+        for directory in ['a', 'b']:
+            os.makedirs(os.path.join(self.input_dir, directory))
+            shutil.copy('tests/integration/input/car.jpg', os.path.join(self.input_dir, directory))
+
+        self.assertEqual(self._main('remove-background', os.path.join(self.input_dir, '**', 'car.jpg'), self.output_dir), 0)
+
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['a', 'b', 'car.png'])
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, 'a', 'car.png')))
+
+    def test_failed_writes_leave_no_output(self):
+        def write_chunk(handler, file, chunk):
+            # Write part of the result before failing, like a full disk
+            file.write(chunk[:10])
+            raise FileWriteError('No space left on device')
+
+        with mock.patch.object(OutputFileHandler, '_write_chunk', write_chunk):
+            self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir), 1)
+
+        # Neither a partial output, which a resumed run would skip, nor a temporary file is left
+        self.assertEqual(os.listdir(self.output_dir), [])
+        self.assertEqual(self._main('remove-background', self.input_dir, self.output_dir), 0)
+        self.assertEqual(sorted(os.listdir(self.output_dir)), ['car.png', 'owl.png', 'wine.png'])
+
+    def test_startup_does_not_import_client(self):
+        code = 'import sys, pyclipdrop.cli; print("requests" in sys.modules, "pydantic" in sys.modules)'
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), 'False False')
+
+
+if __name__ == '__main__':
+    unittest.main()
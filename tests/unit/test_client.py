@@ -0,0 +1,110 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyclipdrop import ClipdropClient
+from pyclipdrop.exceptions import ValueNotSupportedError
+from tests.mock_server import MockClipdropServer
+
+
+def _get_size(result):
+    return len(result)
+
+
+class TestClipdropClientSession(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.files = {'image_file': ('input.png', b'\x89PNG\r\n\x1a\n', 'image/png')}
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_connections_are_reused(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            for _ in range(5):
+                client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+
+        self.assertEqual(self.server.request_count, 5)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_connections_are_pooled_across_threads(self):
+        with ClipdropClient('test', base_url=self.server.base_url, pool_maxsize=4, pool_block=True) as client:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda _: client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files), range(40)))
+
+        self.assertEqual(self.server.request_count, 40)
+        self.assertLessEqual(self.server.connection_count, 4)
+
+    def test_keep_alive_disabled(self):
+        with ClipdropClient('test', base_url=self.server.base_url, keep_alive=False) as client:
+            for _ in range(3):
+                client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+
+        self.assertEqual(self.server.connection_count, 3)
+
+    def test_close_releases_sessions(self):
+        client = ClipdropClient('test', base_url=self.server.base_url)
+        client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+        client.close()
+
+        self.assertEqual(len(client._sessions), 0)
+
+    def test_sessions_of_finished_threads_are_dropped(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            for _ in range(5):
+                thread = threading.Thread(target=client._submit_request, args=(f'{self.server.base_url}/remove-text/v1', self.files))
+                thread.start()
+                thread.join()
+            del thread
+            gc.collect()
+
+            self.assertEqual(len(client._sessions), 0)
+            self.assertEqual(self.server.connection_count, 1)
+
+
+class TestClipdropClientBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.client = ClipdropClient('test', base_url=self.server.base_url)
+        self.output_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def test_batch(self):
+        inputs = [
+            {'input_file': 'tests/integration/input/car.jpg', 'output_file': os.path.join(self.output_directory.name, f'output_{i}.png')}
+            for i in range(8)
+        ] + [{'input_file': 'tests/integration/input/car.gif', 'output_file': os.path.join(self.output_directory.name, 'output.png')}]
+
+        results = list(self.client.batch('remove_background', inputs, max_workers=4))
+
+        self.assertEqual(self.server.request_count, 8)
+        self.assertTrue(all(result.succeeded for result in results[:8]))
+        self.assertIsInstance(results[8].exception, Exception)
+        self.assertEqual(len(os.listdir(self.output_directory.name)), 8)
+
+    def test_batch_in_processes(self):
+        with open('tests/integration/input/car.jpg', 'rb') as file:
+            image = file.read()
+
+        inputs = [{'input_file': image, 'return_bytes': True} for _ in range(4)]
+        results = list(self.client.batch('remove_background', inputs, max_workers=2, processes=True, postprocess=_get_size))
+
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual([result.result for result in results], [len(self.server.response_content)] * 4)
+
+    def test_batch_unsupported_operation(self):
+        with self.assertRaises(ValueNotSupportedError):
+            self.client.batch('_submit_request', [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient
+from pyclipdrop.coalescing import RequestCoalescer
+from pyclipdrop.exceptions import APIRequestError
+from tests.mock_server import MockClipdropServer
+
+
+INPUT_FILE = 'tests/integration/input/car.jpg'
+
+
+class TestRequestCoalescer(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(response_size=64 * 1024, latency=0.3)
+        self.server.start()
+        self.coalescer = RequestCoalescer()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_concurrent_identical_calls_share_a_request(self):
+        records = []
+        with ClipdropClient('test', base_url=self.server.base_url, coalescer=self.coalescer, hooks=[records.append]) as client:
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                results = list(executor.map(lambda _: client.remove_background(input_file=INPUT_FILE, return_bytes=True), range(5)))
+
+        self.assertEqual(results, [self.server.response_content] * 5)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.coalescer.stats.as_dict(), {'requests': 1, 'coalesced': 4})
+        self.assertEqual(sum(record.coalesced for record in records), 4)
+
+    def test_different_and_nondeterministic_calls_are_not_coalesced(self):
+        with ClipdropClient('test', base_url=self.server.base_url, coalescer=self.coalescer) as client:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                list(executor.map(lambda mode: client.cleanup(input_file='tests/integration/input/jeep_in_desert.jpg', mask_file='tests/integration/input/jeep_in_desert_mask.png', mode=mode, return_bytes=True), ['fast', 'quality']))
+                list(executor.map(lambda _: client.reimagine(input_file=INPUT_FILE, return_bytes=True), range(2)))
+
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(self.coalescer.stats.coalesced, 0)
+
+    def test_errors_are_shared(self):
+        self.server.status_code = 400
+        with ClipdropClient('test', base_url=self.server.base_url, coalescer=self.coalescer) as client:
+            def call(_):
+                with self.assertRaises(APIRequestError):
+                    client.remove_background(input_file=INPUT_FILE, return_bytes=True)
+
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                list(executor.map(call, range(3)))
+
+        self.assertEqual(self.server.request_count, 1)
+
+    async def test_concurrent_identical_tasks_share_a_request(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url, coalescer=self.coalescer) as client:
+            results = await asyncio.gather(*[client.remove_background(input_file=INPUT_FILE, return_bytes=True) for _ in range(5)])
+
+        self.assertEqual(results, [self.server.response_content] * 5)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(self.coalescer.stats.coalesced, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
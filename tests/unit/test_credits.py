@@ -0,0 +1,125 @@
+import unittest
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient
+from pyclipdrop.cache import MemoryCache
+from pyclipdrop.credits import PRIORITY_HIGH, PRIORITY_LOW, CreditLedger, CreditScheduler, within_credit_job
+from pyclipdrop.exceptions import CreditBudgetExceededError, DeadlineExceededError
+from pyclipdrop.timeouts import within_deadline
+from tests.mock_server import MockClipdropServer
+
+
+INPUT_FILE = 'tests/integration/input/car.jpg'
+
+
+class TestCreditLedger(unittest.TestCase):
+    def test_credits_are_aggregated_per_endpoint(self):
+        ledger = CreditLedger()
+        ledger.record('remove_background', {'x-credits-consumed': '1', 'x-remaining-credits': '99'})
+        ledger.record('remove_background', {'x-credits-consumed': '1', 'x-remaining-credits': '98'})
+        ledger.record('text_to_image', {'x-credits-consumed': '4', 'x-remaining-credits': '94'})
+
+        self.assertEqual(ledger.as_dict(), {
+            'remaining': 94.0,
+            'consumed': 6.0,
+            'endpoints': {'remove_background': {'calls': 2, 'credits': 2.0}, 'text_to_image': {'calls': 1, 'credits': 4.0}}
+        })
+        self.assertEqual(ledger.estimate('text_to_image'), 4.0)
+        self.assertEqual(ledger.estimate('uncrop', default=2.0), 2.0)
+
+    def test_missing_and_malformed_headers_are_ignored(self):
+        ledger = CreditLedger()
+
+        self.assertEqual(ledger.record('remove_background', {}), 0.0)
+        self.assertEqual(ledger.record('remove_background', {'x-credits-consumed': 'n/a', 'x-remaining-credits': '10'}), 0.0)
+        self.assertEqual((ledger.remaining, ledger.consumed, ledger.endpoints), (10.0, 0.0, {}))
+
+
+class TestCreditScheduler(unittest.TestCase):
+    def test_budgets_are_enforced(self):
+        scheduler = CreditScheduler(CreditLedger(), default_cost=2.0)
+        job = scheduler.job(budget=5)
+        with job.reserve('remove_background') as first:
+            first.charge(2.0)
+            with job.reserve('remove_background'):
+                self.assertEqual((job.reserved, scheduler.reserved), (4.0, 4.0))
+                with self.assertRaises(CreditBudgetExceededError):
+                    job.reserve('remove_background')
+
+        self.assertEqual((job.spent, job.reserved, job.calls, scheduler.reserved), (2.0, 0.0, 2, 0.0))
+
+    def test_low_priority_jobs_back_off_at_their_reserve(self):
+        ledger = CreditLedger()
+        ledger.update(50)
+        scheduler = CreditScheduler(ledger, max_wait=0.2, poll_interval=0.05)
+
+        with self.assertRaises(CreditBudgetExceededError):
+            scheduler.job(priority=PRIORITY_LOW).reserve('remove_background')
+        with scheduler.job(priority=PRIORITY_HIGH).reserve('remove_background'):
+            pass
+
+        # A low priority job waiting for credits goes through once the account is topped up
+        with within_deadline(0.1):
+            with self.assertRaises(DeadlineExceededError):
+                scheduler.job(priority=PRIORITY_LOW).reserve('remove_background')
+        ledger.update(500)
+        with scheduler.job(priority=PRIORITY_LOW).reserve('remove_background'):
+            pass
+
+
+class TestCreditClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(remaining_credits=120, credits_per_request=2)
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_responses_are_recorded_in_the_ledger(self):
+        records = []
+        with ClipdropClient('test', base_url=self.server.base_url, cache=MemoryCache(), hooks=[records.append]) as client:
+            for _ in range(3):
+                client.remove_background(input_file=INPUT_FILE, return_bytes=True)
+            client.text_to_image(prompt='a car', return_bytes=True)
+
+        # The cached responses consume no credits
+        self.assertEqual(client.credits.as_dict(), {
+            'remaining': 116.0,
+            'consumed': 4.0,
+            'endpoints': {'remove_background': {'calls': 1, 'credits': 2.0}, 'text_to_image': {'calls': 1, 'credits': 2.0}}
+        })
+        self.assertEqual([record.credits for record in records], [2.0, 0.0, 0.0, 2.0])
+
+    def test_batches_stay_within_their_budget_and_reserve(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            scheduler = CreditScheduler(client.credits, reserves={PRIORITY_LOW: 100})
+            job = scheduler.job(budget=7, priority=PRIORITY_LOW)
+            results = list(client.batch('text_to_image', [{'prompt': 'a car', 'return_bytes': True}] * 5, max_workers=1, credit_job=job))
+
+            self.assertEqual([result.succeeded for result in results], [True, True, True, False, False])
+            self.assertIsInstance(results[3].exception, CreditBudgetExceededError)
+            self.assertEqual((job.spent, job.calls), (6.0, 3))
+
+            # The next low priority job is held back by the reserve, while calls of higher priorities or outside of any job go through
+            results = list(client.batch('text_to_image', [{'prompt': 'a car', 'return_bytes': True}] * 10, max_workers=1, credit_job=scheduler.job(priority=PRIORITY_LOW)))
+            self.assertEqual(sum(result.succeeded for result in results), 7)
+            with within_credit_job(scheduler.job(priority=PRIORITY_HIGH)):
+                client.text_to_image(prompt='a car', return_bytes=True)
+            client.text_to_image(prompt='a car', return_bytes=True)
+
+        self.assertEqual(client.credits.remaining, 96.0)
+        self.assertEqual(self.server.request_count, 12)
+
+    async def test_async_calls_are_charged_to_the_current_job(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            job = CreditScheduler(client.credits).job(budget=4)
+            with within_credit_job(job):
+                await client.text_to_image(prompt='a car', return_bytes=True)
+                await client.text_to_image(prompt='a car', return_bytes=True)
+                with self.assertRaises(CreditBudgetExceededError):
+                    await client.text_to_image(prompt='a car', return_bytes=True)
+
+        self.assertEqual((job.spent, client.credits.remaining), (4.0, 116.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
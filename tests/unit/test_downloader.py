@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.cache import DiskCache
+from pyclipdrop.downloader import SourceDownloader
+from pyclipdrop.exceptions import URLReadError
+from tests.mock_server import MockClipdropServer
+
+
+class TestSourceDownloader(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(response_size=1024)
+        self.server.start()
+        self.url = f'{self.server.base_url}/input.png'
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_connections_are_reused(self):
+        with SourceDownloader() as downloader:
+            for _ in range(3):
+                self.assertEqual(downloader.fetch(self.url), self.server.response_content)
+
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_cached_inputs_are_revalidated(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = DiskCache(directory)
+            with SourceDownloader(cache=cache) as downloader:
+                downloader.fetch(self.url)
+                self.assertEqual(downloader.fetch(self.url), self.server.response_content)
+
+            self.assertEqual(cache.stats.hits, 1)
+            self.assertEqual(self.server.download_count, 2)
+
+    def test_prefetched_inputs_are_fetched_once(self):
+        with SourceDownloader() as downloader:
+            self.assertTrue(downloader.prefetch(self.url))
+            self.assertEqual(downloader.fetch(self.url), self.server.response_content)
+
+            self.assertEqual(self.server.download_count, 1)
+            self.assertEqual(downloader.prefetched_bytes, 0)
+
+    def test_prefetching_respects_the_memory_budget(self):
+        with SourceDownloader(max_prefetch_bytes=1) as downloader:
+            self.assertTrue(downloader.prefetch(self.url))
+            downloader._prefetched[self.url].result()
+            self.assertFalse(downloader.prefetch(f'{self.url}?other'))
+
+            downloader.clear()
+            self.assertEqual(downloader.prefetched_bytes, 0)
+
+    def test_errors(self):
+        with SourceDownloader(timeout=1) as downloader:
+            with self.assertRaises(URLReadError):
+                downloader.fetch('http://127.0.0.1:1/input.png')
+
+    def test_batch_with_prefetch(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client, tempfile.TemporaryDirectory() as directory:
+            inputs = [
+                {'input_file': f'{self.url}?{index}', 'output_file': os.path.join(directory, f'{index}.png')}
+                for index in range(6)
+            ]
+            results = list(client.batch('remove_background', inputs, max_workers=2, prefetch=4))
+
+        self.assertTrue(all(result.succeeded for result in results))
+        self.assertEqual(self.server.download_count, 6)
+        self.assertEqual(results[0].arguments, inputs[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.endpoints import ENDPOINTS, FROM_RESPONSE, SAME_AS_INPUT
+from pyclipdrop.exceptions import ValueNotSupportedError, ValueOutOfRangeError, ValueTooLongError
+
+
+class TestEndpoints(unittest.TestCase):
+    def test_every_endpoint_has_a_client_method(self):
+        for name in ENDPOINTS:
+            self.assertTrue(callable(getattr(ClipdropClient, name)), name)
+
+    def test_get_url(self):
+        self.assertEqual(ENDPOINTS['reimagine'].get_url('https://clipdrop-api.co', 'v1'), 'https://clipdrop-api.co/reimagine/v1/reimagine')
+
+    def test_build_form(self):
+        image = ('a.png', b'image', 'image/png')
+        mask = ('mask.png', b'mask', 'image/png')
+
+        files, data = ENDPOINTS['text_inpainting'].build_form({'prompt': 'A sign'}, image, mask)
+        self.assertEqual(files, {'image_file': image, 'mask_file': mask})
+        self.assertEqual(data, {'text_prompt': 'A sign'})
+
+        files, data = ENDPOINTS['sketch_to_image'].build_form({'prompt': 'A house'}, image)
+        self.assertEqual(files, {'sketch_file': image, 'prompt': (None, 'A house', 'text/plain')})
+        self.assertEqual(data, {})
+
+    def test_build_form_omits_empty_fields(self):
+        arguments = {'extend_up': 0, 'extend_down': 10, 'extend_left': 0, 'extend_right': 0, 'seed': None}
+
+        _, data = ENDPOINTS['uncrop'].build_form(arguments)
+        self.assertEqual(data, {'extend_up': 0, 'extend_down': 10, 'extend_left': 0, 'extend_right': 0})
+
+        _, data = ENDPOINTS['remove_background'].build_form({'transparency_handling': None})
+        self.assertEqual(data, {})
+
+    def test_validate_parameters(self):
+        with self.assertRaises(ValueTooLongError):
+            ENDPOINTS['text_to_image'].validate_parameters({'prompt': 'a' * 1001})
+
+        with self.assertRaises(ValueNotSupportedError):
+            ENDPOINTS['cleanup'].validate_parameters({'mode': 'slow'})
+
+        with self.assertRaises(ValueOutOfRangeError):
+            ENDPOINTS['image_upscaling'].validate_parameters({'target_width': 4097, 'target_height': 100})
+
+        ENDPOINTS['image_upscaling'].validate_parameters({'target_width': 4096, 'target_height': 1})
+
+    def test_is_deterministic(self):
+        self.assertTrue(ENDPOINTS['remove_background'].is_deterministic({}))
+        self.assertFalse(ENDPOINTS['reimagine'].is_deterministic({}))
+        self.assertFalse(ENDPOINTS['uncrop'].is_deterministic({'seed': None}))
+        self.assertTrue(ENDPOINTS['uncrop'].is_deterministic({'seed': 42}))
+
+    def test_get_output_extensions(self):
+        self.assertEqual(ENDPOINTS['replace_background'].output_extensions, SAME_AS_INPUT)
+        self.assertEqual(ENDPOINTS['replace_background'].get_output_extensions('.webp'), frozenset(['.webp']))
+
+        self.assertEqual(ENDPOINTS['image_upscaling'].output_extensions, FROM_RESPONSE)
+        self.assertEqual(ENDPOINTS['image_upscaling'].get_output_extensions('.png', 'image/webp'), frozenset(['.webp']))
+        self.assertEqual(ENDPOINTS['image_upscaling'].get_output_extensions('.png', 'image/jpeg'), frozenset(['.jpg']))
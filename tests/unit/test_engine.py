@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+
+from pyclipdrop.engine import run_steps, run_steps_async
+
+
+def steps(log: list):
+    # A step raising an error is caught by the steps, like a failed attempt of a request
+    try:
+        yield lambda: log.append('first') or 1 / 0
+    except ZeroDivisionError:
+        log.append('caught')
+
+    result = yield lambda: 42
+    return result + 1
+
+
+class TestRunSteps(unittest.IsolatedAsyncioTestCase):
+    def test_results_and_errors_are_sent_back(self):
+        log = []
+
+        self.assertEqual(run_steps(steps(log)), 43)
+        self.assertEqual(log, ['first', 'caught'])
+
+    async def test_async_steps_are_awaited(self):
+        async def value(result):
+            await asyncio.sleep(0)
+            return result
+
+        def async_steps():
+            result = yield lambda: value(42)
+            return result + 1
+
+        self.assertEqual(await run_steps_async(async_steps()), 43)
+
+    def test_uncaught_errors_are_raised(self):
+        def failing_steps():
+            yield lambda: 1 / 0
+
+        with self.assertRaises(ZeroDivisionError):
+            run_steps(failing_steps())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+import io
+import os
+import struct
+import tempfile
+import unittest
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.downloader import SourceDownloader
+from pyclipdrop.endpoints import ENDPOINTS
+from pyclipdrop.exceptions import FileExtensionError, ImageSizeError, ValueOutOfRangeError
+from pyclipdrop.utilities import HEADER_SIZE, ImageInfo, get_image_info, read_image_info
+from tests.mock_server import MockClipdropServer
+
+
+INPUT_DIRECTORY = 'tests/integration/input'
+
+
+def read_header(path: str, size: int = HEADER_SIZE) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+
+class TestImageHeaders(unittest.TestCase):
+    def test_input_images(self):
+        expected = {
+            'apartment.webp': ImageInfo('WEBP', '.webp', 1024, 576, False),
+            'car.jpg': ImageInfo('JPEG', '.jpg', 1920, 1280, False),
+            'owl.png': ImageInfo('PNG', '.png', 898, 898, True),
+            'woman_in_scarf_mask.png': ImageInfo('PNG', '.png', 1024, 1024, False)
+        }
+        for name, info in expected.items():
+            with self.subTest(name=name):
+                self.assertEqual(get_image_info(read_header(os.path.join(INPUT_DIRECTORY, name))), info)
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_encoded_images(self):
+        cases = [
+            ('RGB', 'PNG', {}, False),
+            ('LA', 'PNG', {}, True),
+            ('P', 'PNG', {'transparency': 0}, True),
+            ('RGB', 'JPEG', {'progressive': True}, False),
+            ('RGB', 'WEBP', {}, False),
+            ('RGBA', 'WEBP', {}, True),
+            ('RGB', 'WEBP', {'lossless': True}, False),
+            ('RGBA', 'WEBP', {'lossless': True}, True)
+        ]
+        for mode, image_format, options, has_alpha in cases:
+            with self.subTest(mode=mode, format=image_format, options=options):
+                buffer = io.BytesIO()
+                Image.new(mode, (37, 23)).save(buffer, format=image_format, **options)
+                info = get_image_info(buffer.getvalue())
+
+                self.assertEqual((info.format, info.size, info.has_alpha), (image_format, (37, 23), has_alpha))
+
+    def test_unknown_and_truncated_content(self):
+        self.assertIsNone(get_image_info(b'not an image'))
+        self.assertEqual(get_image_info(b'GIF89a\x01\x00').format, 'GIF')
+        self.assertIsNone(get_image_info(read_header(os.path.join(INPUT_DIRECTORY, 'car.jpg'), 64)).size)
+
+    def test_large_jpeg_header(self):
+        # A JPEG image whose size follows more than `HEADER_SIZE` bytes of metadata
+        data = read_header(os.path.join(INPUT_DIRECTORY, 'car.jpg'), 1024 * 1024)
+        segment = b'\xff\xe1' + struct.pack('>H', 60002) + b'\x00' * 60000
+        data = data[:2] + segment + data[2:]
+        sizes = []
+
+        def read(size: int) -> bytes:
+            sizes.append(size)
+            return data[:size]
+
+        self.assertEqual(read_image_info(read).size, (1920, 1280))
+        self.assertEqual(len(sizes), 2)
+
+    def test_jpeg_orientation(self):
+        # A JPEG image stored at 40x30 pixels, with an EXIF orientation in either byte order
+        def jpeg(orientation: int, byte_order: str) -> bytes:
+            tiff = (b'II*\x00' if byte_order == '<' else b'MM\x00*') + struct.pack(byte_order + 'IHHHIHH', 8, 1, 0x0112, 3, 1, orientation, 0)
+            exif = b'Exif\x00\x00' + tiff
+            frame = struct.pack('>BHHB', 8, 30, 40, 3)
+            return b'\xff\xd8' + b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif + b'\xff\xc0' + struct.pack('>H', len(frame) + 2) + frame
+
+        for byte_order in '<>':
+            with self.subTest(byte_order=byte_order):
+                self.assertEqual(get_image_info(jpeg(1, byte_order)).size, (40, 30))
+                self.assertEqual(get_image_info(jpeg(3, byte_order)).size, (40, 30))
+                self.assertEqual(get_image_info(jpeg(6, byte_order)).size, (30, 40))
+                self.assertEqual(get_image_info(jpeg(8, byte_order)).size, (30, 40))
+
+
+class TestImageValidation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(response_size=64 * 1024)
+        self.server.start()
+        self.output_directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def _output_path(self, name: str) -> str:
+        return os.path.join(self.output_directory.name, name)
+
+    def test_mislabeled_file(self):
+        input_file = self._output_path('input.png')
+        with open(input_file, 'wb') as f:
+            f.write(b'GIF89a' + b'\x00' * 64)
+
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            with self.assertRaises(FileExtensionError):
+                client.remove_background(input_file=input_file, output_file=self._output_path('output.png'))
+
+        self.assertEqual(self.server.request_count, 0)
+
+    def test_mask_of_another_size(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            with self.assertRaises(ImageSizeError):
+                client.cleanup(
+                    input_file=os.path.join(INPUT_DIRECTORY, 'jeep_in_desert.jpg'),
+                    mask_file=os.path.join(INPUT_DIRECTORY, 'woman_in_scarf_mask.png'),
+                    output_file=self._output_path('output.png')
+                )
+
+        self.assertEqual(self.server.request_count, 0)
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_mask_of_a_rotated_photo(self):
+        # A portrait photo stored in landscape, whose mask has the size of the photo as it is displayed
+        input_file, mask_file = self._output_path('portrait.jpg'), self._output_path('mask.png')
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        Image.new('RGB', (40, 30)).save(input_file, exif=exif.tobytes())
+        Image.new('L', (30, 40)).save(mask_file)
+
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            client.cleanup(input_file=input_file, mask_file=mask_file, output_file=self._output_path('output.png'))
+
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_upscaling_target(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            with self.assertRaises(ValueOutOfRangeError):
+                client.image_upscaling(input_file=os.path.join(INPUT_DIRECTORY, 'car.jpg'), target_width=960, target_height=640, output_file=self._output_path('output.jpg'))
+
+            # A target that is larger than the image on one side is fitted by the API
+            client.image_upscaling(input_file=os.path.join(INPUT_DIRECTORY, 'car.jpg'), target_width=2000, target_height=1000, output_file=self._output_path('output.jpg'))
+
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_predicted_upscaling_extension(self):
+        self.assertEqual(ENDPOINTS['image_upscaling'].get_output_extensions('.png', image=ImageInfo('PNG', '.png', 10, 10, True)), frozenset(['.webp']))
+        self.assertIsNone(ENDPOINTS['image_upscaling'].get_output_extensions('.png'))
+
+        # An explicit output file is checked against the content type of the response rather than the prediction, since an opaque image with an alpha channel may be upscaled to JPEG
+        self.server.content_type = 'image/jpeg'
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            client.image_upscaling(input_file=os.path.join(INPUT_DIRECTORY, 'owl.png'), target_width=2048, target_height=2048, output_file=self._output_path('output.jpg'))
+
+            self.server.content_type = 'image/webp'
+            with self.assertRaises(FileExtensionError):
+                client.image_upscaling(input_file=os.path.join(INPUT_DIRECTORY, 'owl.png'), target_width=2048, target_height=2048, output_file=self._output_path('output.jpg'))
+
+        self.assertTrue(os.path.exists(self._output_path('output.jpg')))
+        self.assertEqual(self.server.request_count, 2)
+
+    def test_streamed_url_header(self):
+        url = f'{self.server.base_url}/input.png'
+        with SourceDownloader() as downloader:
+            self.assertEqual(downloader.fetch_header(url, 1024), self.server.response_content[:1024])
+
+        with ClipdropClient('test', base_url=self.server.base_url, stream_uploads=True) as client:
+            client.remove_background(input_file=url, output_file=self._output_path('output.png'))
+
+        self.assertEqual(self.server.request_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
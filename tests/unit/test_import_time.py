@@ -0,0 +1,45 @@
+import sys
+import subprocess
+import unittest
+
+
+# The modules that must not be imported by each module of the package, so that cold starts only pay for what they use
+IMPORT_BUDGETS = {
+    'pyclipdrop': ['requests', 'urllib3', 'httpx', 'pydantic', 'pydantic_settings', 'asyncio'],
+    'pyclipdrop.client': ['httpx', 'pydantic', 'pydantic_settings', 'asyncio', 'inspect', 'multiprocessing', 'PIL', 'numpy'],
+    'pyclipdrop.async_client': ['requests', 'urllib3', 'pydantic', 'pydantic_settings', 'multiprocessing', 'PIL', 'numpy']
+}
+
+
+def get_imported_modules(module: str) -> set:
+    # Every module is imported in a fresh interpreter, since the test runner has imported most of them already
+    process = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    return {name.split('.')[0] for name in process.stdout.split()}
+
+
+class TestImportBudget(unittest.TestCase):
+    def test_imports_stay_within_budget(self):
+        for module, excluded_modules in IMPORT_BUDGETS.items():
+            with self.subTest(module=module):
+                imported_modules = get_imported_modules(module)
+                self.assertEqual(sorted(imported_modules.intersection(excluded_modules)), [])
+
+    def test_settings_are_read_from_the_environment(self):
+        process = subprocess.run(
+            [sys.executable, '-c', 'from pyclipdrop.settings import settings; print(settings.BASE_URL, settings.VERSION)'],
+            capture_output=True,
+            text=True,
+            check=True,
+            env={'BASE_URL': 'http://localhost:8000', 'version': 'v2'}
+        )
+
+        self.assertEqual(process.stdout.split(), ['http://localhost:8000', 'v2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import io
+import unittest
+
+try:
+    import numpy
+    from PIL import Image
+except ImportError:
+    numpy = Image = None
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient
+from pyclipdrop.exceptions import FileExtensionError
+from pyclipdrop.io_file_handlers import InputFileHandler
+from pyclipdrop.utilities import get_extension_from_content
+from tests.mock_server import MockClipdropServer
+
+
+class TestContentSniffing(unittest.TestCase):
+    def test_formats(self):
+        with open('tests/integration/input/car.jpg', 'rb') as f:
+            self.assertEqual(get_extension_from_content(f.read()), '.jpg')
+        with open('tests/integration/input/owl.png', 'rb') as f:
+            self.assertEqual(get_extension_from_content(f.read()), '.png')
+        with open('tests/integration/input/apartment.webp', 'rb') as f:
+            self.assertEqual(get_extension_from_content(f.read()), '.webp')
+        self.assertIsNone(get_extension_from_content(b'GIF89a'))
+
+    def test_in_memory_inputs(self):
+        with open('tests/integration/input/car.jpg', 'rb') as f:
+            data = f.read()
+
+        for value in [data, bytearray(data), memoryview(data), io.BytesIO(data)]:
+            handler = InputFileHandler(value, supported_extensions=['.jpg'])
+            handler.validate()
+            self.assertEqual(handler.read(), data)
+            self.assertEqual(handler.get_name(), 'image.jpg')
+
+    @unittest.skipIf(Image is None, 'Pillow and NumPy are not installed')
+    def test_images_and_arrays_are_encoded_as_png(self):
+        for value in [Image.new('RGB', (4, 4)), numpy.zeros((4, 4, 3), dtype=numpy.uint8)]:
+            handler = InputFileHandler(value, supported_extensions=['.png'])
+            handler.validate()
+            self.assertEqual(handler.get_extension(), '.png')
+            self.assertEqual(Image.open(io.BytesIO(handler.read())).size, (4, 4))
+
+    def test_unsupported_content(self):
+        with self.assertRaises(FileExtensionError):
+            InputFileHandler(b'GIF89a', supported_extensions=['.png']).validate()
+
+
+class TestInMemoryClient(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        with open('tests/integration/input/car.jpg', 'rb') as f:
+            self.image = f.read()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_return_bytes(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            result = client.remove_background(input_file=self.image, return_bytes=True)
+
+        self.assertEqual(result, self.server.response_content)
+        self.assertIn(b'filename="image.jpg"', self.server.last_request[2])
+        self.assertIn(b'Content-Type: image/jpg', self.server.last_request[2])
+
+    def test_return_bytes_while_streaming(self):
+        with ClipdropClient('test', base_url=self.server.base_url, stream=True) as client:
+            result = client.remove_text(input_file=io.BytesIO(self.image), return_bytes=True)
+
+        self.assertEqual(result, self.server.response_content)
+
+    def test_file_like_output(self):
+        output = io.BytesIO()
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            result = client.replace_background(input_file=self.image, prompt='a kitchen', output_file=output)
+
+        self.assertIsNone(result)
+        self.assertEqual(output.getvalue(), self.server.response_content)
+
+    @unittest.skipIf(Image is None, 'Pillow is not installed')
+    def test_in_memory_mask(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            client.cleanup(input_file=self.image, mask_file=Image.new('L', (1920, 1280)), return_bytes=True)
+
+        self.assertIn(b'filename="image.png"', self.server.last_request[2])
+
+    async def test_async_return_bytes(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url) as client:
+            result = await client.remove_background(input_file=self.image, return_bytes=True)
+
+        self.assertEqual(result, self.server.response_content)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+import warnings
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient, RetryPolicy
+from pyclipdrop.exceptions import APIRequestError
+from pyclipdrop.instrumentation import OpenTelemetryHook, PrometheusHook, get_current_record
+from tests.mock_server import MockClipdropServer
+
+INPUT_FILE = 'tests/integration/input/car.jpg'
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.records = []
+        self.output_directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.output_directory.name, 'output.png')
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def test_call_record(self):
+        with ClipdropClient('test', base_url=self.server.base_url, hooks=[self.records.append]) as client:
+            client.remove_background(INPUT_FILE, output_file=self.output_file)
+
+        record, = self.records
+        self.assertEqual(record.endpoint, 'remove_background')
+        self.assertEqual(record.status_code, 200)
+        self.assertEqual(record.retries, 0)
+        self.assertEqual(set(record.phases), {'validate', 'read', 'request', 'write'})
+        self.assertEqual(record.request_bytes, int(self.server.last_request[1]['Content-Length']))
+        self.assertEqual(record.response_bytes, len(self.server.response_content))
+        self.assertGreaterEqual(record.duration, sum(record.phases.values()))
+        self.assertIsNone(get_current_record())
+
+    def test_failed_call_record(self):
+        self.server.fail_next(3, status_code=503)
+        retry_policy = RetryPolicy(max_attempts=2, backoff_base=0)
+        with ClipdropClient('test', base_url=self.server.base_url, retry_policy=retry_policy, hooks=[self.records.append]) as client:
+            with self.assertRaises(APIRequestError):
+                client.remove_background(INPUT_FILE, output_file=self.output_file)
+
+        record, = self.records
+        self.assertEqual((record.status_code, record.retries), (503, 1))
+        self.assertIsInstance(record.exception, APIRequestError)
+
+    def test_failing_hook_does_not_fail_the_call(self):
+        def hook(record):
+            raise RuntimeError('Broken hook')
+
+        with ClipdropClient('test', base_url=self.server.base_url, hooks=[hook]) as client:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                client.remove_background(INPUT_FILE, output_file=self.output_file)
+
+        self.assertIn('Broken hook', str(caught[0].message))
+
+    def test_prometheus_hook(self):
+        try:
+            from prometheus_client import CollectorRegistry
+        except ImportError:
+            self.skipTest('prometheus-client is not installed')
+
+        registry = CollectorRegistry()
+        with ClipdropClient('test', base_url=self.server.base_url, hooks=[PrometheusHook(registry=registry)]) as client:
+            client.remove_background(INPUT_FILE, output_file=self.output_file)
+
+        self.assertEqual(registry.get_sample_value('clipdrop_requests_total', {'endpoint': 'remove_background', 'status': '200'}), 1)
+        self.assertEqual(registry.get_sample_value('clipdrop_phase_duration_seconds_count', {'endpoint': 'remove_background', 'phase': 'request'}), 1)
+
+    def test_opentelemetry_hook(self):
+        try:
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+            from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+        except ImportError:
+            self.skipTest('opentelemetry-sdk is not installed')
+
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        with ClipdropClient('test', base_url=self.server.base_url, hooks=[OpenTelemetryHook(provider.get_tracer('test'))]) as client:
+            client.remove_background(INPUT_FILE, output_file=self.output_file)
+
+        span, = exporter.get_finished_spans()
+        self.assertEqual(span.name, 'clipdrop.remove_background')
+        self.assertEqual(span.attributes['http.response.status_code'], 200)
+
+
+class TestAsyncInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def test_call_record(self):
+        records = []
+        with MockClipdropServer() as server, tempfile.TemporaryDirectory() as output_directory:
+            async with AsyncClipdropClient('test', base_url=server.base_url, stream=True, hooks=[records.append]) as client:
+                await client.remove_background(INPUT_FILE, output_file=os.path.join(output_directory, 'output.png'))
+
+        record, = records
+        self.assertEqual((record.endpoint, record.status_code), ('remove_background', 200))
+        self.assertEqual(record.response_bytes, len(server.response_content))
+        self.assertIn('write', record.phases)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.exceptions import APIRequestError, ValueTooLongError
+from pyclipdrop.job_queue import JobQueue, is_retryable
+from tests.mock_server import MockClipdropServer
+
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'jobs.db')
+        self.queue = JobQueue(self.path, retry_delay=0)
+
+    def tearDown(self):
+        self.queue.close()
+        self.directory.cleanup()
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        self.queue.add_many(('text_to_image', {'prompt': str(index)}) for index in range(3))
+
+        first = self.queue.claim(limit=2, worker_id='a')
+        second = self.queue.claim(limit=2, worker_id='b')
+
+        self.assertEqual([job.arguments['prompt'] for job in first], ['0', '1'])
+        self.assertEqual([job.arguments['prompt'] for job in second], ['2'])
+
+    def test_expired_leases_are_claimed_again(self):
+        queue = JobQueue(self.path, lease_duration=0.05)
+        job_id = queue.add('text_to_image', {'prompt': 'a'})
+        job = queue.claim(worker_id='a')[0]
+        time.sleep(0.1)
+
+        reclaimed = queue.claim(worker_id='b')[0]
+
+        self.assertEqual((reclaimed.id, reclaimed.attempts), (job_id, 2))
+        self.assertFalse(queue.complete(job, worker_id='a'))
+        self.assertTrue(queue.complete(reclaimed, worker_id='b'))
+        queue.close()
+
+    def test_expired_leases_of_last_attempts_fail(self):
+        queue = JobQueue(self.path, lease_duration=0.05, max_attempts=1)
+        job_id = queue.add('text_to_image', {'prompt': 'a'})
+        queue.claim(worker_id='a')
+        time.sleep(0.1)
+
+        self.assertEqual(queue.claim(worker_id='b'), [])
+        self.assertEqual(queue.get(job_id).status, 'failed')
+        queue.close()
+
+    def test_leases_are_renewed_while_jobs_run(self):
+        queue = JobQueue(self.path, lease_duration=0.1)
+        other = JobQueue(self.path)
+        queue.add('text_to_image', {'prompt': 'a'})
+        claimed = []
+
+        class SlowClient:
+            def text_to_image(self, prompt):
+                # The call outlives the lease several times over, while another worker tries to claim the job
+                for _ in range(4):
+                    time.sleep(0.1)
+                    claimed.extend(other.claim(worker_id='b'))
+
+        self.assertEqual(queue.work(SlowClient()), {'done': 1, 'failed': 0, 'lost': 0})
+        self.assertEqual(claimed, [])
+        self.assertEqual(queue.get(1).attempts, 1)
+        queue.close()
+        other.close()
+
+    def test_lost_leases_are_not_counted_as_done(self):
+        queue = JobQueue(self.path, lease_duration=0.05)
+        other = JobQueue(self.path)
+        queue.add('text_to_image', {'prompt': 'a'})
+
+        class StalledClient:
+            def text_to_image(self, prompt):
+                # The worker stalls past its lease, and another worker claims the job
+                time.sleep(0.1)
+                other.claim(worker_id='b')
+
+        with mock.patch.object(JobQueue, 'renew', return_value=True), self.assertLogs('pyclipdrop.job_queue', 'WARNING'):
+            self.assertEqual(queue.work(StalledClient()), {'done': 0, 'failed': 0, 'lost': 1})
+
+        self.assertEqual(queue.get(1).status, 'leased')
+        queue.close()
+        other.close()
+
+    def test_failures_are_retried_unless_permanent(self):
+        self.queue.add('text_to_image', {'prompt': 'a'})
+        self.queue.add('text_to_image', {'prompt': 'b'})
+        retryable, permanent = self.queue.claim(limit=2, worker_id='a')
+
+        self.queue.fail(retryable, APIRequestError('Bad gateway', status_code=502), worker_id='a')
+        self.queue.fail(permanent, ValueTooLongError('Too long'), worker_id='a')
+
+        self.assertEqual(self.queue.get(retryable.id).status, 'pending')
+        self.assertEqual(self.queue.get(permanent.id).status, 'failed')
+        self.assertEqual(self.queue.get(permanent.id).error, 'ValueTooLongError: Too long')
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(APIRequestError('', status_code=503)))
+        self.assertTrue(is_retryable(APIRequestError('', status_code=429)))
+        self.assertTrue(is_retryable(ConnectionError()))
+        self.assertFalse(is_retryable(APIRequestError('', status_code=400)))
+
+    def test_work_drains_the_queue(self):
+        with MockClipdropServer() as server:
+            server.fail_next(1, status_code=500)
+            for index in range(4):
+                self.queue.add('text_to_image', {'prompt': 'a', 'output_file': os.path.join(self.directory.name, f'{index}.png')})
+
+            with ClipdropClient(api_key='key', base_url=server.base_url) as client:
+                self.queue.work(client, max_workers=2)
+
+        self.assertEqual(self.queue.counts()['done'], 4)
+        self.assertTrue(os.path.exists(self.queue.get(1).output_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
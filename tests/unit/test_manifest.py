@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from pyclipdrop.manifest import validate_manifest
+from pyclipdrop.utilities import DirectoryCache, PNG_JPG, is_extension_supported
+from pyclipdrop.exceptions import FileExtensionError, FileOrURLError, FilePathError, ValueNotSupportedError
+
+
+class TestValidateManifest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        for name in ('a.jpg', 'b.png', 'c.gif', 'mask.png'):
+            open(os.path.join(self.directory.name, name), 'wb').close()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory.name, name)
+
+    def test_valid_manifest(self):
+        inputs = [
+            {'input_file': self._path('a.jpg'), 'mask_file': self._path('mask.png'), 'output_file': self._path('a.png')},
+            {'input_file': 'https://example.com/b.jpeg', 'mask_file': b'\x89PNG\r\n\x1a\n', 'return_bytes': True}
+        ]
+
+        self.assertEqual(validate_manifest('cleanup', inputs), [])
+
+    def test_all_errors_are_reported(self):
+        inputs = [
+            {'input_file': self._path('c.gif'), 'output_file': self._path('c.png')},
+            {'input_file': self._path('missing.png'), 'output_file': self._path('missing/b.png')},
+            {'input_file': self._path('b.png'), 'output_file': self._path('b.jpg')},
+            {'input_file': self._path('b.png'), 'prompt': 'An unexpected argument'}
+        ]
+
+        errors = validate_manifest('remove_text', inputs)
+
+        self.assertEqual([(error.index, error.argument, type(error.exception)) for error in errors], [
+            (0, 'input_file', FileExtensionError),
+            (1, 'input_file', FileOrURLError),
+            (1, 'output_file', FilePathError),
+            (2, 'output_file', FileExtensionError),
+            (3, None, TypeError)
+        ])
+
+    def test_output_extension_following_the_input(self):
+        errors = validate_manifest('replace_background', [(self._path('a.jpg'), 'A beach', self._path('a.png'))])
+
+        self.assertEqual([(error.argument, type(error.exception)) for error in errors], [('output_file', FileExtensionError)])
+
+    def test_invalid_parameter_values(self):
+        inputs = [
+            {'input_file': self._path('a.jpg'), 'mask_file': self._path('mask.png'), 'mode': 'slow', 'return_bytes': True},
+            {'input_file': self._path('a.jpg'), 'mask_file': self._path('mask.png'), 'mode': 'quality', 'return_bytes': True}
+        ]
+
+        errors = validate_manifest('cleanup', inputs)
+
+        self.assertEqual([(error.index, error.argument, type(error.exception)) for error in errors], [(0, 'mode', ValueNotSupportedError)])
+
+    def test_unsupported_operation(self):
+        with self.assertRaises(ValueNotSupportedError):
+            validate_manifest('batch', [])
+
+
+class TestValidators(unittest.TestCase):
+    def test_is_extension_supported(self):
+        self.assertTrue(is_extension_supported('.jpeg', PNG_JPG))
+        self.assertTrue(is_extension_supported('.png', ['.png']))
+        self.assertFalse(is_extension_supported('.webp', PNG_JPG))
+
+    def test_directory_cache(self):
+        cache = DirectoryCache(ttl=60)
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertTrue(cache.exists(directory))
+            self.assertFalse(cache.exists(os.path.join(directory, 'missing')))
+        self.assertTrue(cache.exists(directory))
+
+        cache.clear()
+        self.assertFalse(cache.exists(directory))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import numpy
+    from PIL import Image
+except ImportError:
+    numpy = Image = None
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.exceptions import ImageSizeError
+from pyclipdrop import masks
+from pyclipdrop.masks import Mask, MaskCache, encode_array
+from pyclipdrop.utilities import encode_grayscale_png, get_image_info
+from tests.mock_server import MockClipdropServer
+
+
+INPUT_FILE = 'tests/integration/input/jeep_in_desert.jpg'
+MASK_FILE = 'tests/integration/input/jeep_in_desert_mask.png'
+
+
+def get_rows(mask: Mask, size: tuple) -> list:
+    scanlines = mask.rasterize(size)
+    width = size[0] + 1
+    return [scanlines[offset + 1:offset + width] for offset in range(0, len(scanlines), width)]
+
+
+class TestMask(unittest.TestCase):
+    def test_boxes(self):
+        rows = get_rows(Mask(boxes=[(1, 1, 3.4, 3)]), (5, 4))
+
+        self.assertEqual(rows, [b'\x00' * 5, b'\x00\xff\xff\x00\x00', b'\x00\xff\xff\x00\x00', b'\x00' * 5])
+
+    def test_polygons(self):
+        # A triangle covering the pixels whose centers are inside it
+        rows = get_rows(Mask(polygons=[[(0, 0), (4, 0), (0, 4)]]), (4, 4))
+
+        self.assertEqual([row.count(b'\xff') for row in rows], [3, 2, 1, 0])
+        self.assertTrue(all(row.startswith(b'\xff' * row.count(b'\xff')) for row in rows))
+
+    @unittest.skipIf(numpy is None, 'Pillow and NumPy are not installed')
+    def test_polygons_are_filled_the_same_without_numpy(self):
+        mask = Mask(
+            boxes=[(2, 30, 50, 35.5)],
+            polygons=[[(-5, 3), (40.2, 10.7), (12, 48), (30, 25)], [(10, 10), (20, 10), (20, 20), (10, 20)], [(45, 0), (60, 60), (45, 60)]]
+        )
+
+        with mock.patch.object(masks, '_import_numpy', return_value=None):
+            expected = mask.rasterize((50, 40))
+
+        self.assertEqual(mask.rasterize((50, 40)), expected)
+
+    def test_encoding(self):
+        info = get_image_info(Mask(boxes=[(0, 0, 10, 10)]).encode((40, 30)))
+
+        self.assertEqual((info.format, info.size, info.has_alpha), ('PNG', (40, 30), False))
+        with self.assertRaises(ValueError):
+            encode_grayscale_png(b'\x00' * 3, 2, 2)
+
+    @unittest.skipIf(numpy is None, 'Pillow and NumPy are not installed')
+    def test_encoded_masks_decode_to_the_same_pixels(self):
+        array = numpy.zeros((30, 40), dtype=bool)
+        array[5:15, 10:20] = True
+
+        from_array = numpy.array(Image.open(io.BytesIO(encode_array(array))))
+        from_box = numpy.array(Image.open(io.BytesIO(Mask(boxes=[(10, 5, 20, 15)]).encode((40, 30)))))
+
+        self.assertTrue((from_array == array * 255).all())
+        self.assertTrue((from_box == from_array).all())
+
+
+class TestMaskCache(unittest.TestCase):
+    def test_masks_are_encoded_once(self):
+        cache = MaskCache()
+        first = cache.encode(Mask(boxes=[(0, 0, 10, 10)]), (40, 30))
+        second = cache.encode(Mask(boxes=[(0, 0, 10, 10)]), (40, 30))
+
+        self.assertIs(first, second)
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        self.assertIsNot(cache.encode(Mask(boxes=[(0, 0, 10, 10)]), (80, 60)), first)
+        self.assertEqual(cache.encode('https://example.com/mask.png'), 'https://example.com/mask.png')
+
+        with self.assertRaises(ImageSizeError):
+            cache.encode(Mask(boxes=[(0, 0, 10, 10)]))
+
+    def test_edited_files_are_read_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'mask.png')
+            shutil.copy(MASK_FILE, path)
+            cache = MaskCache()
+            self.assertEqual(cache.encode(path), cache.encode(path))
+
+            with open(path, 'wb') as f:
+                f.write(Mask(boxes=[(0, 0, 1, 1)]).encode((2, 2)))
+            os.utime(path, ns=(0, 0))
+
+            self.assertEqual(get_image_info(cache.encode(path)).size, (2, 2))
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 2))
+
+    def test_masks_are_evicted_beyond_the_size_limit(self):
+        cache = MaskCache(max_bytes=150)
+        for size in [(10, 10), (20, 20), (30, 30)]:
+            cache.encode(Mask(boxes=[(0, 0, 5, 5)]), size)
+
+        self.assertLessEqual(cache.size, 150)
+        self.assertGreater(cache.stats.evictions, 0)
+
+
+class TestMaskClient(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_shapes_are_drawn_at_the_size_of_the_image(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            for _ in range(3):
+                client.cleanup(input_file=INPUT_FILE, mask_file=Mask(boxes=[(100, 100, 400, 300)]), return_bytes=True)
+
+            self.assertEqual((client.mask_cache.stats.hits, client.mask_cache.stats.misses), (2, 1))
+
+        # The mask is the last part of the request and the same size as the image
+        body = self.server.last_request[2]
+        mask = body[body.rindex(b'\x89PNG'):]
+        self.assertEqual(get_image_info(mask).size, (1590, 900))
+
+    def test_mask_files_are_read_once(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            for _ in range(3):
+                client.text_inpainting(input_file=INPUT_FILE, mask_file=MASK_FILE, prompt='a car', return_bytes=True)
+
+            self.assertEqual(client.mask_cache.stats.hits, 2)
+        self.assertEqual(self.server.request_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import time
+import unittest
+
+import requests
+
+from tests.mock_server import MockClipdropServer
+
+
+class TestMockClipdropServer(unittest.TestCase):
+    def test_unknown_paths_are_rejected(self):
+        with MockClipdropServer() as server:
+            self.assertEqual(requests.post(f'{server.base_url}/remove-background/v1').status_code, 200)
+            self.assertEqual(requests.post(f'{server.base_url}/reimagine/v1/reimagine').status_code, 200)
+            self.assertEqual(requests.post(f'{server.base_url}/remove-backgrounds/v1').status_code, 404)
+
+    def test_response_size(self):
+        with MockClipdropServer(response_size=1024, content_type='image/webp') as server:
+            content = requests.post(f'{server.base_url}/uncrop/v1').content
+
+        self.assertEqual(len(content), 1024)
+        self.assertEqual(content[8:12], b'WEBP')
+
+    def test_latency_and_error_rate(self):
+        with MockClipdropServer(latency=0.05, error_rate=0.5, error_status_code=503, seed=1) as server:
+            started_at = time.perf_counter()
+            status_codes = [requests.post(f'{server.base_url}/cleanup/v1').status_code for _ in range(20)]
+
+        self.assertGreaterEqual(time.perf_counter() - started_at, 1.0)
+        self.assertEqual(status_codes.count(503), server.error_count)
+        self.assertTrue(0 < server.error_count < 20)
+
+    def test_rate_limit_headers(self):
+        with MockClipdropServer(rate_limit=2, rate_limit_headers=True, retry_after=0.5) as server:
+            responses = [requests.post(f'{server.base_url}/cleanup/v1') for _ in range(3)]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertEqual(responses[1].headers['X-RateLimit-Remaining'], '0')
+        self.assertEqual(responses[2].headers['Retry-After'], '0.5')
+
+
+if __name__ == '__main__':
+    unittest.main()
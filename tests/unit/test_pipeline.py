@@ -0,0 +1,67 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pyclipdrop.client import ClipdropClient
+from pyclipdrop.pipeline import Pipeline
+from pyclipdrop.exceptions import ValueNotSupportedError
+from tests.mock_server import MockClipdropServer
+
+
+WEBP = b'RIFF\x00\x00\x00\x00WEBPVP8 '
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(response_content=WEBP, content_type='image/webp')
+        self.server.start()
+        self.client = ClipdropClient('test', base_url=self.server.base_url)
+        self.output_directory = tempfile.TemporaryDirectory()
+        self.pipeline = Pipeline(self.client).then('remove_background').then('image_upscaling', target_width=256, target_height=256)
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def test_results_are_passed_in_memory(self):
+        result = self.pipeline.run('tests/integration/input/car.jpg')
+
+        self.assertEqual(result, WEBP)
+        self.assertEqual(self.server.request_count, 2)
+        path, _, body = self.server.last_request
+        self.assertTrue(path.startswith('/image-upscaling/'))
+        self.assertIn(b'filename="image.webp"', body)
+        self.assertIn(b'Content-Type: image/webp', body)
+
+    def test_output_extension_follows_the_result(self):
+        output_file = self.pipeline.run('tests/integration/input/car.jpg', os.path.join(self.output_directory.name, 'car'))
+
+        self.assertEqual(output_file, os.path.join(self.output_directory.name, 'car.webp'))
+        with open(output_file, 'rb') as file:
+            self.assertEqual(file.read(), WEBP)
+
+    def test_output_to_file_like_object(self):
+        output = io.BytesIO()
+        self.pipeline.run('tests/integration/input/car.jpg', output)
+
+        self.assertEqual(output.getvalue(), WEBP)
+
+    def test_map(self):
+        results = list(self.pipeline.map(['tests/integration/input/car.jpg'] * 4, max_workers=2))
+
+        self.assertTrue(all(result.result == WEBP for result in results))
+        self.assertEqual(self.server.request_count, 8)
+
+    def test_invalid_steps(self):
+        with self.assertRaises(ValueNotSupportedError):
+            self.pipeline.then('text_to_image', prompt='A car')
+        with self.assertRaises(ValueError):
+            self.pipeline.then('uncrop', output_file='output.png')
+        with self.assertRaises(ValueError):
+            Pipeline(self.client).run('tests/integration/input/car.jpg')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import io
+import os
+import unittest
+
+try:
+    from PIL import Image
+    from pyclipdrop.preprocessing import ImageLimits, ImagePreprocessor
+except ImportError:
+    Image = None
+
+from pyclipdrop import ClipdropClient
+from tests.mock_server import MockClipdropServer
+
+
+def encode(image, image_format: str, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format=image_format, **kwargs)
+    return buffer.getvalue()
+
+
+def noisy_image(size) -> 'Image.Image':
+    return Image.frombytes('RGB', size, os.urandom(size[0] * size[1] * 3))
+
+
+@unittest.skipIf(Image is None, 'Pillow is not installed')
+class TestImagePreprocessor(unittest.TestCase):
+    def test_image_within_limits_is_unchanged(self):
+        data = encode(Image.new('RGB', (100, 50)), 'JPEG')
+
+        self.assertIs(ImagePreprocessor().prepare('remove_background', data, '.jpg'), data)
+
+    def test_image_is_scaled_down_with_aspect_ratio(self):
+        data = encode(Image.new('RGB', (2000, 1000)), 'PNG')
+        preprocessor = ImagePreprocessor(limits={'remove_background': ImageLimits(max_pixels=200_000)})
+
+        image = Image.open(io.BytesIO(preprocessor.prepare('remove_background', data, '.png')))
+
+        self.assertEqual(image.format, 'PNG')
+        self.assertLessEqual(image.width * image.height, 200_000)
+        self.assertAlmostEqual(image.width / image.height, 2, places=1)
+
+    def test_max_side(self):
+        data = encode(Image.new('RGB', (3000, 1500)), 'JPEG')
+
+        image = Image.open(io.BytesIO(ImagePreprocessor().prepare('reimagine', data, '.jpg')))
+
+        self.assertEqual(image.size, (1024, 512))
+
+    def test_exif_orientation_is_applied(self):
+        image = Image.new('RGB', (40, 20))
+        exif = image.getexif()
+        exif[0x0112] = 6
+        data = encode(image, 'JPEG', exif=exif)
+
+        prepared = Image.open(io.BytesIO(ImagePreprocessor().prepare('remove_background', data, '.jpg')))
+
+        self.assertEqual(prepared.size, (20, 40))
+        self.assertEqual(prepared.getexif().get(0x0112, 1), 1)
+
+    def test_target_bytes(self):
+        data = encode(noisy_image((600, 600)), 'JPEG', quality=95)
+        target_bytes = len(data) // 4
+
+        prepared = ImagePreprocessor(target_bytes=target_bytes).prepare('remove_background', data, '.jpg')
+
+        self.assertLessEqual(len(prepared), target_bytes)
+        self.assertGreater(len(prepared), target_bytes // 4)
+
+    def test_mask_is_resized_to_image(self):
+        image = encode(Image.new('RGB', (100, 50)), 'PNG')
+        mask = encode(Image.new('L', (200, 100)), 'PNG')
+
+        prepared = Image.open(io.BytesIO(ImagePreprocessor().prepare_mask(mask, image)))
+
+        self.assertEqual(prepared.size, (100, 50))
+
+    def test_client_uploads_prepared_image(self):
+        data = encode(noisy_image((1200, 800)), 'JPEG', quality=95)
+        preprocessor = ImagePreprocessor(limits={'remove_background': ImageLimits(max_side=300)})
+
+        with MockClipdropServer() as server, ClipdropClient('test', base_url=server.base_url, preprocessor=preprocessor) as client:
+            client.remove_background(input_file=data, return_bytes=True)
+
+        self.assertLess(len(server.last_request[2]), len(data) // 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import time
+import asyncio
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from pyclipdrop import ClipdropClient
+from pyclipdrop.exceptions import DeadlineExceededError
+from pyclipdrop.rate_limiter import RateLimiter
+from pyclipdrop.timeouts import Deadline, within_deadline
+from tests.mock_server import MockClipdropServer
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_rate_is_enforced(self):
+        limiter = RateLimiter(requests_per_second=50)
+
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.acquire()
+            limiter.release()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_max_in_flight_is_enforced(self):
+        limiter = RateLimiter(max_in_flight=2)
+        peak = []
+        lock = threading.Lock()
+
+        def request(_):
+            limiter.acquire()
+            try:
+                with lock:
+                    peak.append(limiter.in_flight)
+                time.sleep(0.01)
+            finally:
+                limiter.release()
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(request, range(32)))
+
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_retry_after_pauses_requests(self):
+        limiter = RateLimiter()
+        limiter.update(429, {'Retry-After': '0.2'})
+
+        start = time.monotonic()
+        limiter.acquire()
+        limiter.release()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_retry_after_past_the_deadline_fails_at_once(self):
+        limiter = RateLimiter(requests_per_second=10, max_in_flight=1)
+        limiter.update(429, {'Retry-After': '60'})
+
+        start = time.monotonic()
+        with self.assertRaises(DeadlineExceededError):
+            limiter.acquire(Deadline(2))
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_waiting_for_a_slot_stops_at_the_deadline(self):
+        limiter = RateLimiter(max_in_flight=1)
+        limiter.acquire()
+
+        start = time.monotonic()
+        with within_deadline(0.1), self.assertRaises(DeadlineExceededError):
+            limiter.acquire()
+        with self.assertRaises(DeadlineExceededError):
+            asyncio.run(limiter.acquire_async(Deadline(0.1)))
+
+        self.assertLess(time.monotonic() - start, 1)
+        limiter.release()
+        self.assertEqual(limiter.in_flight, 0)
+
+    def test_rate_limited_response_halves_rate(self):
+        limiter = RateLimiter(requests_per_second=10)
+        limiter.update(429, {'Retry-After': '0'})
+        self.assertEqual(limiter.rate, 5)
+
+        for _ in range(10):
+            limiter.update(200, {})
+        self.assertEqual(limiter.rate, 10)
+
+    def test_remaining_quota_is_spread_over_window(self):
+        limiter = RateLimiter(requests_per_second=10)
+        limiter.update(200, {'X-RateLimit-Remaining': '4', 'X-RateLimit-Reset': '2'})
+
+        self.assertEqual(limiter.rate, 2)
+
+
+class TestRateLimitedClient(unittest.TestCase):
+    def test_steady_state_throughput_under_quota(self):
+        quota = 20
+        with MockClipdropServer(rate_limit=quota) as server:
+            limiter = RateLimiter(requests_per_second=quota * 2, max_in_flight=4)
+            files = {'image_file': ('input.png', b'\x89PNG\r\n\x1a\n', 'image/png')}
+
+            with ClipdropClient('test', base_url=server.base_url, rate_limiter=limiter) as client:
+                # Drain the initial burst of the quota, so that only the steady state is measured
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    list(executor.map(lambda _: client._submit_request(f'{server.base_url}/remove-text/v1', files=files), range(quota)))
+
+                start = time.monotonic()
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    list(executor.map(lambda _: client._submit_request(f'{server.base_url}/remove-text/v1', files=files), range(quota)))
+                throughput = quota / (time.monotonic() - start)
+
+        # Every request eventually succeeds, at a rate close to the quota
+        self.assertEqual(server.request_count - server.throttled_count, 2 * quota)
+        self.assertGreater(throughput, quota * 0.5)
+        self.assertLess(throughput, quota * 1.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
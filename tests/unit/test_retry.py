@@ -0,0 +1,95 @@
+import os
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+import requests
+
+from pyclipdrop import ClipdropClient
+from pyclipdrop.retry import RetryPolicy
+from pyclipdrop.exceptions import APIRequestError
+from pyclipdrop.io_file_handlers import InputFileHandler
+from tests.mock_server import MockClipdropServer
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_exponential_backoff_is_capped(self):
+        policy = RetryPolicy(backoff_base=1, backoff_cap=5, jitter=False)
+
+        self.assertEqual([policy.get_backoff(n) for n in range(1, 6)], [1, 2, 4, 5, 5])
+
+    def test_jitter_stays_within_bounds(self):
+        policy = RetryPolicy(backoff_base=1, backoff_cap=5)
+
+        self.assertTrue(all(0 <= policy.get_backoff(3) <= 4 for _ in range(100)))
+
+    def test_retry_after_is_minimum_backoff(self):
+        policy = RetryPolicy(backoff_base=0.1, jitter=False)
+
+        self.assertEqual(policy.get_backoff(1, retry_after=2), 2)
+
+
+class TestClientRetries(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.attempts = []
+        self.policy = RetryPolicy(max_attempts=3, backoff_base=0.01, on_attempt=lambda url, attempt: self.attempts.append(attempt))
+        self.client = ClipdropClient('test', base_url=self.server.base_url, retry_policy=self.policy)
+        self.files = {'image_file': ('input.png', b'\x89PNG\r\n\x1a\n', 'image/png')}
+
+    def tearDown(self) -> None:
+        self.client.close()
+        self.server.stop()
+
+    def test_transient_failures_are_retried(self):
+        self.server.fail_next(2, status_code=502)
+
+        response = self.client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([attempt.status_code for attempt in response.attempts], [502, 502, 200])
+        self.assertEqual(len(self.attempts), 3)
+        self.assertTrue(all(attempt.duration > 0 for attempt in self.attempts))
+
+    def test_retries_are_exhausted(self):
+        self.server.fail_next(3, status_code=503)
+
+        with self.assertRaises(APIRequestError) as context:
+            self.client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+
+        self.assertEqual(context.exception.status_code, 503)
+        self.assertEqual(len(context.exception.attempts), 3)
+
+    def test_client_errors_are_not_retried(self):
+        self.server.fail_next(1, status_code=400)
+
+        with self.assertRaises(APIRequestError):
+            self.client._submit_request(f'{self.server.base_url}/remove-text/v1', files=self.files)
+
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_connection_errors_are_retried(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client._submit_request(f'http://127.0.0.1:{port}/remove-text/v1', files=self.files)
+
+        self.assertEqual(len(self.attempts), 3)
+        self.assertTrue(all(attempt.exception is not None for attempt in self.attempts))
+
+    def test_input_is_read_once(self):
+        self.server.fail_next(2, status_code=502)
+
+        with tempfile.TemporaryDirectory() as directory, mock.patch.object(InputFileHandler, 'read', autospec=True, side_effect=InputFileHandler.read) as read:
+            self.client.remove_text(input_file='tests/integration/input/billboard.jpg', output_file=os.path.join(directory, 'output.png'))
+
+        self.assertEqual(read.call_count, 1)
+        self.assertEqual(self.server.request_count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
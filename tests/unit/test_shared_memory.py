@@ -0,0 +1,22 @@
+import unittest
+
+from pyclipdrop.utilities import SharedPayload
+
+
+class TestSharedPayload(unittest.TestCase):
+    def test_read_and_unlink(self):
+        payload = SharedPayload.create(b'image')
+
+        self.assertEqual(payload.read(), b'image')
+        self.assertEqual(payload.read(unlink=True), b'image')
+        with self.assertRaises(FileNotFoundError):
+            payload.read()
+
+    def test_empty_payload(self):
+        payload = SharedPayload.create(b'')
+
+        self.assertEqual(payload.read(unlink=True), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
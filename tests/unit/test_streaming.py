@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient
+from pyclipdrop.exceptions import APIRequestError
+from pyclipdrop.io_file_handlers import OutputFileHandler
+from tests.mock_server import MockClipdropServer
+
+
+class TestStreamingDownload(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(response_content=os.urandom(3 * 1024 * 1024 + 17))
+        self.server.start()
+        self.output_directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.output_directory.name, 'output.png')
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def _read_output(self) -> bytes:
+        with open(self.output_file, 'rb') as f:
+            return f.read()
+
+    def test_streamed_response_is_written(self):
+        with ClipdropClient('test', base_url=self.server.base_url, stream=True, chunk_size=64 * 1024) as client:
+            client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self.output_file)
+
+        self.assertEqual(self._read_output(), self.server.response_content)
+        self.assertEqual(os.listdir(self.output_directory.name), ['output.png'])
+
+    async def test_streamed_response_is_written_asynchronously(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url, stream=True, chunk_size=64 * 1024) as client:
+            await client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self.output_file)
+
+        self.assertEqual(self._read_output(), self.server.response_content)
+
+    def test_streamed_error_message(self):
+        self.server.status_code = 400
+        with ClipdropClient('test', base_url=self.server.base_url, stream=True) as client:
+            with self.assertRaises(APIRequestError) as context:
+                client.remove_background(input_file='tests/integration/input/car.jpg', output_file=self.output_file)
+
+        self.assertIn('Mock error', str(context.exception))
+
+    def test_interrupted_stream_leaves_no_output(self):
+        def chunks():
+            yield b'partial'
+            raise ConnectionError()
+
+        with self.assertRaises(ConnectionError):
+            OutputFileHandler(self.output_file).write_stream(chunks())
+
+        self.assertEqual(os.listdir(self.output_directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
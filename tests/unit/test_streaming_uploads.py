@@ -0,0 +1,106 @@
+import io
+import os
+import tempfile
+import unittest
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient, RetryPolicy
+from pyclipdrop.io_file_handlers import InputStream
+from pyclipdrop.utilities import MultipartEncoder
+from tests.mock_server import MockClipdropServer
+
+
+class TestMultipartEncoder(unittest.TestCase):
+    def test_length_matches_body(self):
+        encoder = MultipartEncoder(
+            files={
+                'image_file': ('tests/integration/input/car.jpg', InputStream('tests/integration/input/car.jpg', True), 'image/jpg'),
+                'prompt': (None, 'a car', 'text/plain')
+            },
+            data={'mode': 'fast', 'seed': 42}
+        )
+
+        body = encoder.read()
+
+        self.assertEqual(len(body), encoder.len)
+        self.assertTrue(body.endswith(f'--{encoder.boundary}--\r\n'.encode()))
+        with open('tests/integration/input/car.jpg', 'rb') as f:
+            self.assertIn(f.read(), body)
+
+    def test_read_in_chunks(self):
+        encoder = MultipartEncoder(files={'image_file': ('input.png', os.urandom(100000), 'image/png')}, chunk_size=1000)
+        expected = MultipartEncoder(files={'image_file': ('input.png', b'', 'image/png')})
+
+        chunks = iter(lambda: encoder.read(333), b'')
+
+        self.assertEqual(len(b''.join(chunks)), encoder.len)
+        self.assertEqual(encoder.len - expected.len, 100000)
+
+    def test_unknown_length(self):
+        class Source:
+            def open(self):
+                return io.BytesIO(b'data'), None
+
+        encoder = MultipartEncoder(files={'image_file': ('input.png', Source(), 'image/png')})
+
+        self.assertIsNone(encoder.len)
+
+
+class TestStreamingUploads(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer()
+        self.server.start()
+        self.output_directory = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.output_directory.name, 'output.png')
+
+    def tearDown(self) -> None:
+        self.server.stop()
+        self.output_directory.cleanup()
+
+    def _normalized_body(self) -> bytes:
+        _, headers, body = self.server.last_request
+        boundary = headers['Content-Type'].split('boundary=')[1].encode()
+        return body.replace(boundary, b'BOUNDARY')
+
+    def _get_body(self, stream_uploads: bool, arguments: dict) -> bytes:
+        with ClipdropClient('test', base_url=self.server.base_url, stream_uploads=stream_uploads) as client:
+            client.cleanup(output_file=self.output_file, **arguments)
+
+        return self._normalized_body()
+
+    def test_streamed_body_matches_buffered_body(self):
+        cases = {
+            'mask file': {'input_file': 'tests/integration/input/jeep_in_desert.jpg', 'mask_file': 'tests/integration/input/jeep_in_desert_mask.png'},
+            'quality mode': {'input_file': 'tests/integration/input/jeep_in_desert.jpg', 'mask_file': 'tests/integration/input/jeep_in_desert_mask.png', 'mode': 'quality'}
+        }
+        for name, arguments in cases.items():
+            with self.subTest(case=name):
+                buffered_body = self._get_body(False, arguments)
+                streamed_body = self._get_body(True, arguments)
+
+                self.assertEqual(streamed_body, buffered_body)
+
+    def test_url_input_is_piped(self):
+        with ClipdropClient('test', base_url=self.server.base_url, stream_uploads=True) as client:
+            client.remove_background(input_file=f'{self.server.base_url}/input.png', output_file=self.output_file)
+
+        self.assertIn(self.server.response_content, self.server.last_request[2])
+
+    def test_streamed_upload_is_retried(self):
+        self.server.fail_next(1, status_code=502)
+        with ClipdropClient('test', base_url=self.server.base_url, stream_uploads=True, retry_policy=RetryPolicy(backoff_base=0.01)) as client:
+            client.remove_text(input_file='tests/integration/input/billboard.jpg', output_file=self.output_file)
+
+        with open('tests/integration/input/billboard.jpg', 'rb') as f:
+            self.assertIn(f.read(), self.server.last_request[2])
+        self.assertEqual(self.server.request_count, 2)
+
+    async def test_async_streamed_upload(self):
+        async with AsyncClipdropClient('test', base_url=self.server.base_url, stream_uploads=True) as client:
+            await client.remove_text(input_file='tests/integration/input/billboard.jpg', output_file=self.output_file)
+
+        with open('tests/integration/input/billboard.jpg', 'rb') as f:
+            self.assertIn(f.read(), self.server.last_request[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
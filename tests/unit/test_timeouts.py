@@ -0,0 +1,131 @@
+import time
+import unittest
+
+from pyclipdrop import AsyncClipdropClient, ClipdropClient, RateLimiter, RetryPolicy
+from pyclipdrop.timeouts import Deadline, get_current_deadline, limit_timeout, within_deadline
+from pyclipdrop.exceptions import DeadlineExceededError
+from pyclipdrop.io_file_handlers import InputFileHandler
+from tests.mock_server import MockClipdropServer
+
+
+INPUT_FILE = 'tests/integration/input/billboard.jpg'
+
+
+class TestDeadline(unittest.TestCase):
+    def test_limit(self):
+        deadline = Deadline(5)
+
+        self.assertEqual(deadline.limit(1), 1)
+        self.assertLessEqual(deadline.limit(10), 5)
+        self.assertEqual(deadline.limit((1, 10))[0], 1)
+        self.assertLessEqual(deadline.limit((1, 10))[1], 5)
+        self.assertLessEqual(deadline.limit(None), 5)
+
+    def test_check(self):
+        Deadline(5).check('testing')
+
+        with self.assertRaises(DeadlineExceededError):
+            Deadline(0).check('testing')
+
+    def test_nested_deadlines_keep_the_earliest(self):
+        with within_deadline(1) as outer:
+            with within_deadline(10) as inner:
+                self.assertIs(inner, outer)
+            with within_deadline(0.5) as inner:
+                self.assertIsNot(inner, outer)
+            with within_deadline(None) as inner:
+                self.assertIs(inner, outer)
+
+        self.assertIsNone(get_current_deadline())
+        self.assertEqual(limit_timeout((1, 10)), (1, 10))
+
+
+class TestClientDeadlines(unittest.TestCase):
+    def setUp(self) -> None:
+        self.server = MockClipdropServer(content_type='image/jpeg', response_content=b'\xff\xd8\xff\xe0', latency=0.5)
+        self.server.start()
+
+    def tearDown(self) -> None:
+        self.server.stop()
+
+    def test_read_timeout(self):
+        with ClipdropClient('test', base_url=self.server.base_url, timeout=(1, 0.1)) as client:
+            with self.assertRaises(Exception) as context:
+                client.reimagine(INPUT_FILE, return_bytes=True)
+
+        self.assertNotIsInstance(context.exception, DeadlineExceededError)
+
+    def test_deadline_cuts_the_request_short(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            started_at = time.monotonic()
+            with self.assertRaises(DeadlineExceededError):
+                client.reimagine(INPUT_FILE, return_bytes=True, deadline=0.1)
+
+        self.assertLess(time.monotonic() - started_at, 0.4)
+
+    def test_deadline_of_the_client(self):
+        with ClipdropClient('test', base_url=self.server.base_url, deadline=0.1) as client:
+            with self.assertRaises(DeadlineExceededError):
+                client.reimagine(INPUT_FILE, return_bytes=True)
+
+            # A call can override the deadline of the client
+            self.assertEqual(client.reimagine(INPUT_FILE, return_bytes=True, deadline=5), b'\xff\xd8\xff\xe0')
+
+    def test_retries_fail_fast(self):
+        self.server.latency = 0
+        self.server.fail_next(3, status_code=503)
+        policy = RetryPolicy(max_attempts=3, backoff_base=10, jitter=False)
+
+        with ClipdropClient('test', base_url=self.server.base_url, retry_policy=policy) as client:
+            started_at = time.monotonic()
+            with self.assertRaises(DeadlineExceededError):
+                client.reimagine(INPUT_FILE, return_bytes=True, deadline=2)
+
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual(self.server.request_count, 1)
+
+    def test_rate_limiter_pause_fails_fast(self):
+        rate_limiter = RateLimiter(max_in_flight=1)
+        rate_limiter.update(429, {'Retry-After': '120'})
+
+        with ClipdropClient('test', base_url=self.server.base_url, rate_limiter=rate_limiter) as client:
+            started_at = time.monotonic()
+            with self.assertRaises(DeadlineExceededError):
+                client.reimagine(INPUT_FILE, return_bytes=True, deadline=2)
+
+        self.assertLess(time.monotonic() - started_at, 1)
+        self.assertEqual((self.server.request_count, rate_limiter.in_flight), (0, 0))
+
+    def test_batch_deadline(self):
+        with ClipdropClient('test', base_url=self.server.base_url) as client:
+            inputs = [{'input_file': INPUT_FILE, 'return_bytes': True}] * 4
+            results = list(client.batch('reimagine', inputs, max_workers=2, deadline=0.8))
+
+        # The first two items complete, while the next two are cut short by the time left
+        self.assertEqual([result.succeeded for result in results], [True, True, False, False])
+        self.assertTrue(all(isinstance(result.exception, DeadlineExceededError) for result in results[2:]))
+
+
+class TestAsyncClientDeadlines(unittest.IsolatedAsyncioTestCase):
+    async def test_deadline(self):
+        with MockClipdropServer(content_type='image/jpeg', response_content=b'\xff\xd8\xff\xe0', latency=0.5) as server:
+            async with AsyncClipdropClient('test', base_url=server.base_url) as client:
+                with self.assertRaises(DeadlineExceededError):
+                    await client.reimagine(INPUT_FILE, return_bytes=True, deadline=0.1)
+
+                self.assertEqual(await client.reimagine(INPUT_FILE, return_bytes=True, deadline=5), b'\xff\xd8\xff\xe0')
+
+    async def test_deadline_cuts_url_downloads_short(self):
+        with MockClipdropServer(download_latency=1) as server:
+            async with AsyncClipdropClient('test', base_url=server.base_url) as client:
+                input_file_handler = InputFileHandler(f'{server.base_url}/input.png')
+                started_at = time.perf_counter()
+                with within_deadline(0.2):
+                    with self.assertRaises(DeadlineExceededError):
+                        await input_file_handler.read_async(client.download_client, client.timeout)
+
+                self.assertLess(time.perf_counter() - started_at, 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()